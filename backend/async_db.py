@@ -0,0 +1,47 @@
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+
+from database import ASYNC_ENABLED, primary, replica_router
+
+
+class AsyncDB:
+    """A request's database session for async routes.
+
+    crud functions are written against a sync Session; run() calls one with this request's
+    session as its first argument without blocking the event loop. With DB_ASYNC=1 the
+    session is an AsyncSession on asyncpg and the function runs through run_sync, where its
+    queries are awaited on the loop. Otherwise it is a regular Session and the function runs
+    in the threadpool, as a sync route would.
+    """
+
+    def __init__(self, target=primary):
+        self.target = target
+        self.session = target.AsyncSessionLocal() if ASYNC_ENABLED else target.SessionLocal()
+
+    async def run(self, fn, *args, **kwargs):
+        if ASYNC_ENABLED:
+            return await self.session.run_sync(lambda session: fn(session, *args, **kwargs))
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def rollback(self):
+        """End the current transaction, e.g. so the next run() can choose its isolation level."""
+        if ASYNC_ENABLED:
+            await self.session.rollback()
+        else:
+            await run_in_threadpool(self.session.rollback)
+
+    async def close(self):
+        if ASYNC_ENABLED:
+            await self.session.close()
+        else:
+            await run_in_threadpool(self.session.close)
+
+
+async def get_async_db(request: Request):
+    """Session for the per-user GET routes: a current replica unless the user wrote recently."""
+    user_id = request.path_params.get("user_id")
+    db = AsyncDB(replica_router.read_target(int(user_id) if user_id and user_id.isdigit() else None))
+    try:
+        yield db
+    finally:
+        await db.close()
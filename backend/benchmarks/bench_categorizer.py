@@ -0,0 +1,133 @@
+"""Throughput benchmark for backend/categorizer.py on synthetic merchants.
+
+    python -m backend.benchmarks.bench_categorizer
+    python -m backend.benchmarks.bench_categorizer --descriptions 100000 --rules 10000 --scaling
+
+No database is needed: rules and descriptions are generated in memory.
+"""
+import argparse
+import random
+import string
+import time
+
+from backend.categorizer import Categorizer, Rule
+
+CATEGORIES = ["Groceries", "Dining", "Transport", "Utilities", "Shopping", "Travel", "Health", "Entertainment"]
+FILLER = ["POS", "PURCHASE", "CARD", "DEBIT", "ONLINE", "PAYMENT", "REF", "TXN", "US", "CA", "NY"]
+
+
+def merchant_name(rng, index: int):
+    # Unique per index, so every rule can match something
+    letters = "".join(rng.choice(string.ascii_lowercase) for _ in range(5))
+    return f"{letters}{index}"
+
+
+def make_rules(rng, count: int):
+    """~75% substring, ~15% prefix, ~10% regex (mostly with a literal, a few without)."""
+    rules, merchants = [], []
+    for index in range(count):
+        name = merchant_name(rng, index)
+        merchants.append(name)
+        roll = rng.random()
+        if roll < 0.75:
+            pattern, match_type = name, "substring"
+        elif roll < 0.90:
+            pattern, match_type = name, "prefix"
+        elif roll < 0.99:
+            pattern, match_type = rf"{name}\s*#\d+", "regex"
+        else:
+            pattern, match_type = rf"[a-z]{{3}}{index}-\d{{2}}", "regex"
+        scope = rng.randint(0, 1)
+        rules.append(Rule(index, pattern, match_type, rng.choice(CATEGORIES), (scope, 100, index)))
+    return rules, merchants
+
+
+def make_descriptions(rng, count: int, merchants, hit_rate: float = 0.7):
+    descriptions = []
+    for _ in range(count):
+        words = rng.sample(FILLER, 3)
+        if rng.random() < hit_rate:
+            merchant = rng.choice(merchants).upper()
+            # Merchant first (prefix rules), or mid-string with a store number (substring/regex)
+            if rng.random() < 0.3:
+                words.insert(0, merchant)
+            else:
+                words.insert(1, f"{merchant} #{rng.randint(1, 9999)}")
+        descriptions.append(" ".join(words))
+    return descriptions
+
+
+def naive_classify(rules, description: str):
+    # Reference implementation: test every rule against every description
+    import re
+    text = description.lower()
+    best = None
+    for rule in rules:
+        if rule.match_type == "substring":
+            hit = rule.pattern in text
+        elif rule.match_type == "prefix":
+            hit = text.startswith(rule.pattern)
+        else:
+            hit = re.search(rule.pattern, description, re.IGNORECASE) is not None
+        if hit and (best is None or rule.rank < best.rank):
+            best = rule
+    return best
+
+
+def run(description_count: int, rule_count: int, seed: int):
+    rng = random.Random(seed)
+    rules, merchants = make_rules(rng, rule_count)
+    descriptions = make_descriptions(rng, description_count, merchants)
+
+    started = time.perf_counter()
+    categorizer = Categorizer(rules)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matched = sum(1 for description in descriptions if categorizer.classify(description) is not None)
+    classify_seconds = time.perf_counter() - started
+
+    return {
+        "rules": rule_count,
+        "descriptions": description_count,
+        "build_seconds": round(build_seconds, 3),
+        "classify_seconds": round(classify_seconds, 3),
+        "descriptions_per_sec": round(description_count / classify_seconds, 1),
+        "matched": matched,
+    }, categorizer, rules, descriptions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the merchant categorizer")
+    parser.add_argument("--descriptions", type=int, default=1_000_000)
+    parser.add_argument("--rules", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--verify", type=int, default=200,
+                        help="descriptions checked against the naive per-rule loop (0 to skip)")
+    parser.add_argument("--scaling", action="store_true",
+                        help="also run 100/1k/10k/100k rules on a 100k description sample")
+    args = parser.parse_args()
+
+    report, categorizer, rules, descriptions = run(args.descriptions, args.rules, args.seed)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+    if args.verify:
+        sample = descriptions[:args.verify]
+        started = time.perf_counter()
+        expected = [naive_classify(rules, description) for description in sample]
+        naive_seconds = time.perf_counter() - started
+        mismatches = sum(1 for description, rule in zip(sample, expected) if categorizer.classify(description) is not rule)
+        print(f"naive_descriptions_per_sec: {round(len(sample) / naive_seconds, 1)}")
+        print(f"verify_mismatches: {mismatches} of {len(sample)}")
+
+    if args.scaling:
+        print()
+        print(f"{'rules':>8} {'build_s':>9} {'desc/s':>12}")
+        for rule_count in (100, 1_000, 10_000, 100_000):
+            result = run(100_000, rule_count, args.seed)[0]
+            print(f"{rule_count:>8} {result['build_seconds']:>9} {result['descriptions_per_sec']:>12}")
+
+
+if __name__ == "__main__":
+    main()
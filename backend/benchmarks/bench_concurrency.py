@@ -0,0 +1,74 @@
+"""Requests/sec and latency of the per-user read routes under concurrent clients.
+
+    READ_CACHE_TTL=0 uvicorn main:app --port 8000               (from backend/, sessions in the threadpool)
+    READ_CACHE_TTL=0 DB_ASYNC=1 uvicorn main:app --port 8000    (asyncpg sessions on the event loop)
+    python -m backend.benchmarks.bench_concurrency --users 1000
+    python -m backend.benchmarks.bench_concurrency --clients 10 100 1000 --path /dashboard/{user_id}
+
+Run it once against each server mode and compare. Each client loops over random users for
+--seconds without If-None-Match, and READ_CACHE_TTL=0 keeps the read cache out of the way,
+so every request reaches the database.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = ["/dashboard/{user_id}", "/expenses/{user_id}", "/net-worth/{user_id}"]
+
+
+async def client(http, paths, users: int, deadline: float, rng: random.Random, latencies, errors):
+    while time.perf_counter() < deadline:
+        path = rng.choice(paths).format(user_id=rng.randint(1, users))
+        started = time.perf_counter()
+        try:
+            response = await http.get(path)
+            if response.status_code >= 500:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run_level(base_url: str, paths, users: int, clients: int, seconds: float, seed: int):
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as http:
+        await http.get("/internal/cache")  # fail fast if the server is not up
+        latencies, errors = [], []
+        started = time.perf_counter()
+        deadline = started + seconds
+        await asyncio.gather(*(
+            client(http, paths, users, deadline, random.Random(seed + i), latencies, errors) for i in range(clients)
+        ))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies) if latencies else 0,
+        "p99": latencies[max(int(len(latencies) * 0.99) - 1, 0)] if latencies else 0,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the read routes under concurrent clients")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--users", type=int, default=100, help="user ids 1..N are requested at random")
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--path", dest="paths", action="append", help=f"route to request (default {DEFAULT_PATHS})")
+    parser.add_argument("--seconds", type=float, default=20.0, help="per concurrency level")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'requests':>9} {'req_per_s':>10} {'p50_ms':>9} {'p99_ms':>9} {'errors':>7}")
+    for clients in args.clients:
+        result = asyncio.run(run_level(args.url, args.paths or DEFAULT_PATHS, args.users, clients, args.seconds, args.seed))
+        print(f"{clients:>8} {result['requests']:>9} {result['rps']:>10.1f} {result['p50']:>9.1f} {result['p99']:>9.1f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Per-user financial summary: the old financial_summary view vs get_user_financial_summary().
+
+    python -m backend.benchmarks.bench_financial_summary
+    python -m backend.benchmarks.bench_financial_summary --users 1000 --transactions 100 --keep
+
+Needs the PostgreSQL database from backend/database.py. Everything is built in a scratch
+schema (dropped afterwards unless --keep), so the application tables are not touched:
+users, income, expenses with the 0002 indexes, income_expense_summary filled from them,
+savings_goals, plus views.sql and functions.sql as they are in this tree.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+from backend.database import engine
+from backend.migrate import DB_DIR, split_statements
+
+SCHEMA = "bench_financial_summary"
+
+# backend/db/views.sql before get_user_financial_summary() replaced it on the API path
+OLD_VIEW_SQL = """
+    CREATE VIEW old_financial_summary AS
+    SELECT
+        u.id AS user_id,
+        u.username,
+        COALESCE(i.total_income, 0) AS total_income,
+        COALESCE(e.total_expenses, 0) AS total_expenses,
+        COALESCE(i.total_income, 0) - COALESCE(e.total_expenses, 0) AS net_savings
+    FROM users u
+    LEFT JOIN (SELECT user_id, SUM(amount) AS total_income FROM income GROUP BY user_id) i ON u.id = i.user_id
+    LEFT JOIN (SELECT user_id, SUM(amount) AS total_expenses FROM expenses GROUP BY user_id) e ON u.id = e.user_id
+"""
+
+SCHEMA_SQL = """
+    CREATE TABLE users (id SERIAL PRIMARY KEY, username VARCHAR UNIQUE, password VARCHAR);
+    CREATE TABLE expenses (id SERIAL PRIMARY KEY, user_id INT, category VARCHAR, amount DOUBLE PRECISION, date DATE NOT NULL);
+    CREATE TABLE income (id SERIAL PRIMARY KEY, user_id INT, source VARCHAR, amount DOUBLE PRECISION, date DATE NOT NULL);
+    CREATE TABLE income_expense_summary (
+        user_id INT, year INT, month INT,
+        total_income DECIMAL(12,2) DEFAULT 0, total_expenses DECIMAL(12,2) DEFAULT 0,
+        UNIQUE (user_id, year, month)
+    );
+    CREATE TABLE savings_goals (
+        user_id INT, goal_amount DECIMAL(10,2), current_amount DECIMAL(10,2), month DATE,
+        UNIQUE (user_id, month)
+    );
+"""
+
+# One in five transactions is income, spread over the last three years
+LOAD_SQL = """
+    INSERT INTO users (username, password) SELECT 'user' || n, 'x' FROM generate_series(1, %(users)s) n;
+
+    INSERT INTO expenses (user_id, category, amount, date)
+    SELECT u, (ARRAY['Food','Rent','Travel','Utilities','Fun'])[1 + (t %% 5)],
+           round((random() * 200)::numeric, 2), CURRENT_DATE - (random() * 1095)::INT
+    FROM generate_series(1, %(users)s) u, generate_series(1, %(expenses)s) t;
+
+    INSERT INTO income (user_id, source, amount, date)
+    SELECT u, (ARRAY['Salary','Freelance'])[1 + (t %% 2)],
+           round((random() * 2000)::numeric, 2), CURRENT_DATE - (random() * 1095)::INT
+    FROM generate_series(1, %(users)s) u, generate_series(1, %(incomes)s) t;
+
+    INSERT INTO income_expense_summary (user_id, year, month, total_income, total_expenses)
+    SELECT user_id, year, month, SUM(income), SUM(expense)
+    FROM (
+        SELECT user_id, EXTRACT(YEAR FROM date)::INT AS year, EXTRACT(MONTH FROM date)::INT AS month,
+               amount AS income, 0 AS expense FROM income
+        UNION ALL
+        SELECT user_id, EXTRACT(YEAR FROM date)::INT, EXTRACT(MONTH FROM date)::INT, 0, amount FROM expenses
+    ) t
+    GROUP BY 1, 2, 3;
+
+    INSERT INTO savings_goals (user_id, goal_amount, current_amount, month)
+    SELECT id, 500, round((random() * 800)::numeric, 2), date_trunc('month', CURRENT_DATE) FROM users;
+
+    CREATE INDEX ix_expenses_user_date ON expenses (user_id, date, id);
+    CREATE INDEX ix_income_user_date ON income (user_id, date, id);
+    ANALYZE;
+"""
+
+QUERIES = {
+    "old view": "SELECT * FROM old_financial_summary WHERE user_id = %(user_id)s",
+    "lateral view": "SELECT * FROM financial_summary WHERE user_id = %(user_id)s",
+    "function": "SELECT * FROM get_user_financial_summary(%(user_id)s)",
+}
+
+
+def run_script(cursor, sql: str, params=None):
+    for statement in split_statements(sql):
+        cursor.execute(statement, params)
+
+
+def build(cursor, users: int, transactions: int):
+    cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+    cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+    cursor.execute(f"SET search_path TO {SCHEMA}")
+    run_script(cursor, SCHEMA_SQL)
+    incomes = transactions // 5
+    run_script(cursor, LOAD_SQL, {"users": users, "expenses": transactions - incomes, "incomes": incomes})
+    cursor.execute(OLD_VIEW_SQL)
+    for script in ("views.sql", "functions.sql"):
+        with open(os.path.join(DB_DIR, script)) as f:
+            run_script(cursor, f.read())
+
+
+def plan_nodes(plan):
+    nodes = [f"{plan['Node Type']}" + (f" on {plan['Relation Name']}" if "Relation Name" in plan else "")]
+    for child in plan.get("Plans", []):
+        nodes.extend(plan_nodes(child))
+    return nodes
+
+
+def time_query(cursor, sql: str, user_ids):
+    timings = []
+    for user_id in user_ids:
+        started = time.perf_counter()
+        cursor.execute(sql, {"user_id": user_id})
+        cursor.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-user financial summary")
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--transactions", type=int, default=1_000, help="per user, one in five is income")
+    parser.add_argument("--queries", type=int, default=200, help="random users looked up per variant")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help=f"keep the {SCHEMA} schema afterwards")
+    args = parser.parse_args()
+
+    connection = engine.raw_connection()
+    connection.dbapi_connection.autocommit = True
+    cursor = connection.cursor()
+    try:
+        started = time.perf_counter()
+        build(cursor, args.users, args.transactions)
+        print(f"built {args.users} users x {args.transactions} transactions in {time.perf_counter() - started:.1f} s")
+
+        rng = random.Random(args.seed)
+        user_ids = [rng.randint(1, args.users) for _ in range(args.queries)]
+
+        # The three must agree on the totals
+        sample = user_ids[0]
+        rows = {}
+        for name, sql in QUERIES.items():
+            cursor.execute(f"SELECT total_income::NUMERIC(14,2), total_expenses::NUMERIC(14,2) FROM ({sql}) q", {"user_id": sample})
+            rows[name] = cursor.fetchone()
+        print(f"user {sample} totals: {rows}")
+
+        print(f"\n{'variant':<14} {'median_ms':>10} {'p95_ms':>10} {'mean_ms':>10}")
+        for name, sql in QUERIES.items():
+            timings = time_query(cursor, sql, user_ids)
+            p95 = sorted(timings)[int(len(timings) * 0.95) - 1]
+            print(f"{name:<14} {statistics.median(timings):>10.3f} {p95:>10.3f} {statistics.mean(timings):>10.3f}")
+
+        print()
+        for name, sql in QUERIES.items():
+            cursor.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + sql, {"user_id": sample})
+            plan = cursor.fetchone()[0][0]
+            print(f"{name}: {plan['Execution Time']:.3f} ms")
+            print(f"  {', '.join(plan_nodes(plan['Plan']))}")
+    finally:
+        if not args.keep:
+            cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""List endpoints: ORM instances + jsonable_encoder vs Core rows + orjson.
+
+    python -m backend.benchmarks.bench_list_serialization
+    python -m backend.benchmarks.bench_list_serialization --rows 50000 --page 500 --repeat 10
+
+Runs against an in-memory SQLite copy of the models, so no database is needed and the
+numbers are mostly the Python side of a page: loading the rows and turning them into the
+response body. "orm" is how the list endpoints built their pages before (db.query(Expense),
+page dict, jsonable_encoder, JSONResponse); "core" is crud._get_page as it is now plus
+fastjson. Peak memory is tracemalloc's peak while building one page.
+"""
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.responses import JSONResponse
+
+from backend import crud, fastjson
+from backend.models import Base, Expense, User
+
+
+def build(rows: int, seed: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(User(id=1, username="bench", password="x"))
+    rng = random.Random(seed)
+    today = date.today()
+    categories = ["Food", "Rent", "Travel", "Utilities", "Fun"]
+    session.bulk_insert_mappings(Expense, [
+        {"user_id": 1, "category": rng.choice(categories), "amount": round(rng.random() * 200, 2),
+         "date": today - timedelta(days=rng.randint(0, 1095))}
+        for _ in range(rows)
+    ])
+    session.commit()
+    return session
+
+
+def orm_page(db, limit: int):
+    rows = (db.query(Expense).filter(Expense.user_id == 1)
+            .order_by(Expense.date.desc(), Expense.id.desc()).limit(limit + 1).all())
+    next_cursor = crud.encode_cursor(rows[limit - 1].date, rows[limit - 1].id) if len(rows) > limit else None
+    return JSONResponse(jsonable_encoder({"items": rows[:limit], "next_cursor": next_cursor})).body
+
+
+def core_page(db, limit: int):
+    items, next_cursor = crud.get_expenses_page(db=db, user_id=1, limit=limit)
+    return fastjson.FastJSONResponse({"items": items, "next_cursor": next_cursor}).body
+
+
+VARIANTS = {"orm": orm_page, "core": core_page}
+
+
+def measure(db, page, limit: int, repeat: int):
+    # Fresh identity map each time, as with the per-request sessions of get_db
+    db.expunge_all()
+    tracemalloc.start()
+    body = page(db, limit)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        db.expunge_all()
+        page(db, limit)
+    elapsed = time.perf_counter() - started
+    return body, limit * repeat / elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list endpoint serialization")
+    parser.add_argument("--rows", type=int, default=20_000, help="expenses of the one benchmark user")
+    parser.add_argument("--page", type=int, default=1_000, help="page size (the API caps it at 1000)")
+    parser.add_argument("--repeat", type=int, default=20, help="pages built per variant for the timing")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    db = build(args.rows, args.seed)
+    bodies = {}
+    print(f"{'variant':<8} {'rows_per_s':>12} {'peak_kib':>10} {'body_kib':>10}")
+    for name, page in VARIANTS.items():
+        body, rate, peak = measure(db, page, args.page, args.repeat)
+        bodies[name] = body
+        print(f"{name:<8} {rate:>12,.0f} {peak / 1024:>10.1f} {len(body) / 1024:>10.1f}")
+
+    # Same items in the same order; fingerprints are the only field the core path leaves out
+    orm_items = [{k: v for k, v in item.items() if k != "fingerprint"} for item in json.loads(bodies["orm"])["items"]]
+    assert orm_items == json.loads(bodies["core"])["items"], "variants returned different pages"
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
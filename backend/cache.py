@@ -0,0 +1,128 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Upper bound on cached responses across all users, and seconds before an entry expires
+DEFAULT_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "10000"))
+DEFAULT_TTL = float(os.getenv("READ_CACHE_TTL", "60"))
+
+
+class ReadCache:
+    """In-process LRU + TTL cache for per-user read endpoints.
+
+    Keys are tuples starting with (endpoint, user_id). A per-user index lets writes drop
+    exactly that user's entries. Each user also has a generation counter, bumped on every
+    invalidation, so a read that started before a write cannot store its stale result.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+
+        self._entries = OrderedDict()  # key -> (expires_at, user_id, value), least recently used first
+        self._by_user = {}  # user_id -> set of keys
+        self._generations = {}  # user_id -> invalidation count
+        self._epoch = 0  # bumped by clear()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Returns (hit, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            expires_at, user_id, value = entry
+            if expires_at <= time.monotonic():
+                self._remove(key, user_id)
+                self.expirations += 1
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, value
+
+    def generation(self, user_id: int):
+        with self._lock:
+            return self._epoch, self._generations.get(user_id, 0)
+
+    def set(self, key, user_id: int, value, generation=None):
+        with self._lock:
+            if generation is not None and (self._epoch, self._generations.get(user_id, 0)) != generation:
+                # The user's data changed while value was being computed
+                return False
+            if key in self._entries:
+                self._remove(key, user_id)
+            self._entries[key] = (time.monotonic() + self.ttl, user_id, value)
+            self._by_user.setdefault(user_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                old_key, (_, old_user_id, _) = next(iter(self._entries.items()))
+                self._remove(old_key, old_user_id)
+                self.evictions += 1
+            return True
+
+    def get_or_load(self, key, user_id: int, loader):
+        hit, value = self.get(key)
+        if hit:
+            return value
+        generation = self.generation(user_id)
+        value = loader()
+        self.set(key, user_id, value, generation)
+        return value
+
+    async def get_or_load_async(self, key, user_id: int, loader):
+        """get_or_load for async routes, where loader() returns an awaitable."""
+        hit, value = self.get(key)
+        if hit:
+            return value
+        generation = self.generation(user_id)
+        value = await loader()
+        self.set(key, user_id, value, generation)
+        return value
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            keys = self._by_user.pop(user_id, ())
+            for key in keys:
+                self._entries.pop(key, None)
+            self.invalidations += 1
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._by_user.clear()
+            self.invalidations += 1
+
+    def _remove(self, key, user_id: int):
+        self._entries.pop(key, None)
+        keys = self._by_user.get(user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[user_id]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "users": len(self._by_user),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "expirations": self.expirations,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,271 @@
+import re
+import threading
+from collections import deque
+
+MATCH_TYPES = ("substring", "prefix", "regex")
+
+
+class Rule:
+    __slots__ = ("id", "pattern", "match_type", "category", "rank", "compiled")
+
+    def __init__(self, id, pattern: str, match_type: str, category: str, rank):
+        self.id = id
+        self.pattern = pattern
+        self.match_type = match_type
+        self.category = category
+        # Lower rank wins when several rules match the same description
+        self.rank = rank
+        self.compiled = None
+
+
+def validate_pattern(pattern: str, match_type: str):
+    if match_type not in MATCH_TYPES:
+        raise ValueError(f"match_type must be one of {', '.join(MATCH_TYPES)}")
+    if not pattern:
+        raise ValueError("pattern must not be empty")
+    if match_type == "regex":
+        try:
+            compiled = re.compile(pattern, re.IGNORECASE)
+        except re.error as e:
+            raise ValueError(f"Invalid regex: {e}")
+        if compiled.groupindex:
+            raise ValueError("Regex rules may not define named groups")
+
+
+def _sre_parse():
+    try:
+        from re import _parser as sre_parse
+    except ImportError:  # Python < 3.11
+        import sre_parse
+    return sre_parse
+
+
+def _has_group_reference(parsed, sre_parse):
+    for op, arg in parsed:
+        if op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS):
+            return True
+        for item in arg if isinstance(arg, (tuple, list)) else (arg,):
+            for sub in item if isinstance(item, list) else (item,):
+                if isinstance(sub, sre_parse.SubPattern) and _has_group_reference(sub, sre_parse):
+                    return True
+    return False
+
+
+def needs_own_regex(pattern: str):
+    """True if pattern cannot be one alternative of the joined regex.
+
+    Numeric backreferences (\\1, (?(1)...)) would point at another rule's group once the
+    groups are renumbered, and inline global flags ((?x), (?s), ...) apply to a whole regex.
+    """
+    sre_parse = _sre_parse()
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return True
+    if parsed.state.flags != sre_parse.parse("").state.flags:
+        return True
+    return _has_group_reference(parsed, sre_parse)
+
+
+def required_literal(pattern: str, min_length: int = 3):
+    """Longest literal run that every match of pattern must contain, or None.
+
+    Only the top-level sequence is inspected: anything under an alternation, repeat or
+    group breaks the run, so the literal is guaranteed to appear in every match.
+    """
+    sre_parse = _sre_parse()
+    try:
+        parsed = sre_parse.parse(pattern)
+    except Exception:
+        return None
+
+    best, run = "", []
+    for op, arg in parsed:
+        if op == sre_parse.LITERAL:
+            run.append(chr(arg))
+        else:
+            best = max(best, "".join(run), key=len)
+            run = []
+    best = max(best, "".join(run), key=len)
+    return best.lower() if len(best) >= min_length else None
+
+
+class AhoCorasick:
+    """Aho-Corasick automaton over lower-cased keywords.
+
+    Built once per rule set; a scan is a single pass over the text, so its cost depends on the
+    text length and the number of matches, not on how many keywords were compiled in.
+    """
+
+    def __init__(self, keywords):
+        # Node 0 is the root. goto[node] maps a character to the next node.
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]  # rule payloads whose keyword ends at this node
+
+        for keyword, payload in keywords:
+            node = 0
+            for char in keyword:
+                next_node = self.goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][char] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                node = next_node
+            self.output[node].append(payload)
+
+        # Breadth-first pass to fill in failure links and merge outputs along them
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                fallback = self.fail[node]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[child] = target if target != child else 0
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def iter_matches(self, text: str):
+        """Yield (end_index, payload) for every keyword occurrence in text."""
+        goto, fail, output = self.goto, self.fail, self.output
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                for payload in output[node]:
+                    yield index, payload
+
+
+class Categorizer:
+    """Classifies merchant descriptions with a fixed set of rules.
+
+    Substring and prefix rules share one Aho-Corasick automaton. Regex rules that contain a
+    required literal (most merchant patterns do) are keyed into the same automaton by that
+    literal and only evaluated when it occurs; the remaining regexes are joined into one
+    alternation. Each description is therefore scanned once, whatever the rule count.
+    The alternation reports the leftmost match rather than the best-ranked one, so only the
+    regexes ranked above the rule it found are then tried on their own. Regexes that cannot
+    share the alternation (see needs_own_regex) are always tried on their own.
+    The best-ranked matching rule wins.
+    """
+
+    def __init__(self, rules):
+        keywords = []
+        regex_parts = []
+        self.regex_rules = {}
+        # Every regex without a required literal, in rank order
+        self.scan_rules = []
+        self._joined = set()
+
+        for rule in sorted(rules, key=lambda r: r.rank):
+            if rule.match_type == "regex":
+                literal = required_literal(rule.pattern)
+                rule.compiled = re.compile(rule.pattern, re.IGNORECASE)
+                if literal:
+                    keywords.append((literal, rule))
+                    continue
+                self.scan_rules.append(rule)
+                if not needs_own_regex(rule.pattern):
+                    group = f"r{len(self.regex_rules)}"
+                    regex_parts.append(f"(?P<{group}>{rule.pattern})")
+                    self.regex_rules[group] = rule
+                    self._joined.add(rule.id)
+            else:
+                keywords.append((rule.pattern.lower(), rule))
+
+        self.automaton = AhoCorasick(keywords) if keywords else None
+        self.regex = re.compile("|".join(regex_parts), re.IGNORECASE) if regex_parts else None
+
+    def classify(self, description: str):
+        text = (description or "").lower()
+        best = None
+
+        if self.automaton:
+            tried = None
+            for end_index, rule in self.automaton.iter_matches(text):
+                if best is not None and rule.rank >= best.rank:
+                    continue
+                if rule.match_type == "prefix":
+                    if end_index + 1 != len(rule.pattern):
+                        continue
+                elif rule.match_type == "regex":
+                    # The literal matched; only now is the full regex worth running
+                    tried = tried or set()
+                    if rule.id in tried:
+                        continue
+                    tried.add(rule.id)
+                    if not rule.compiled.search(description):
+                        continue
+                best = rule
+
+        # The joined rule that matched leftmost, or None if none of the joined rules match
+        found = None
+        if self.regex:
+            match = self.regex.search(description or "")
+            if match:
+                found = self.regex_rules[match.lastgroup]
+
+        # In rank order, so the first match is the best of them
+        for rule in self.scan_rules:
+            if best is not None and rule.rank >= best.rank:
+                break
+            if rule is found:
+                best = rule
+                break
+            if found is None and rule.id in self._joined:
+                continue
+            if rule.compiled.search(description or ""):
+                best = rule
+                break
+
+        return best
+
+    def classify_category(self, description: str, default=None):
+        rule = self.classify(description)
+        return rule.category if rule else default
+
+    def classify_many(self, descriptions, default=None):
+        return [self.classify_category(description, default) for description in descriptions]
+
+
+def build_rules(rows):
+    """Turn category_rules rows into ranked Rules.
+
+    User rules outrank global rules; after that lower priority values win, then older rules.
+    """
+    rules = []
+    for row in rows:
+        scope = 0 if row.user_id is not None else 1
+        rules.append(Rule(row.id, row.pattern, row.match_type, row.category, (scope, row.priority, row.id)))
+    return rules
+
+
+# Compiled categorizers per user, rebuilt when that user's (or the global) rules change
+_cache = {}
+_cache_lock = threading.Lock()
+
+def invalidate(user_id=None):
+    with _cache_lock:
+        if user_id is None:
+            _cache.clear()
+        else:
+            _cache.pop(user_id, None)
+
+def get_categorizer(db, user_id: int):
+    with _cache_lock:
+        categorizer = _cache.get(user_id)
+    if categorizer is not None:
+        return categorizer
+
+    # Local import keeps this module usable without the database layer (e.g. benchmarks)
+    from backend import crud
+    categorizer = Categorizer(build_rules(crud.get_category_rules_for_user(db, user_id)))
+    with _cache_lock:
+        _cache[user_id] = categorizer
+    return categorizer
@@ -1,13 +1,36 @@
-from sqlalchemy import  text  
+from sqlalchemy import  text, insert, delete, tuple_, select, and_, or_
 from sqlalchemy.orm import Session
 from backend.models import User, Expense, Income, Budget
-from backend.models import Debt, Asset
-from datetime import date
+from backend.models import Debt, Asset, RecurringRule, CategoryRule
+from datetime import date, timedelta
+from typing import Optional
 from sqlalchemy.exc import SQLAlchemyError
+import base64
 import logging
 
 
 
+# Write helpers. With commit=False the write is only flushed, so the caller can read
+# aggregates or run further writes in the same transaction and commit once.
+def _save(db: Session, instance, commit: bool):
+    if commit:
+        db.commit()
+        db.refresh(instance)
+    else:
+        db.flush()
+
+def _finish(db: Session, commit: bool):
+    if commit:
+        db.commit()
+    else:
+        db.flush()
+
+# A caller that owns the transaction decides what to roll back (e.g. only a savepoint)
+def _rollback(db: Session, commit: bool):
+    if commit:
+        db.rollback()
+
+
 # User CRUD Operations
 def create_user(db: Session, username: str, password: str):
     new_user = User(username=username, password=password)  # Store plain text
@@ -58,11 +81,10 @@ def check_user_data(db: Session, user_id: int):
 
 
 # Expense CRUD Operations
-def add_expense_db(db: Session, user_id: int, category: str, amount: float, date):
+def add_expense_db(db: Session, user_id: int, category: str, amount: float, date, commit: bool = True):
     new_expense = Expense(user_id=user_id, category=category, amount=amount, date=date)
     db.add(new_expense)
-    db.commit()
-    db.refresh(new_expense)
+    _save(db, new_expense, commit)
     return new_expense
 
 
@@ -70,46 +92,120 @@ def get_expenses_by_user(db: Session, user_id: int):
     return db.query(Expense).filter(Expense.user_id == user_id).all()
 
 # Income CRUD Operations
-def add_income_db(db: Session, user_id: int, source: str, amount: float,date : str):
+def add_income_db(db: Session, user_id: int, source: str, amount: float,date : str, commit: bool = True):
     new_income = Income(user_id=user_id, source=source, amount=amount,date=date)
     db.add(new_income)
-    db.commit()
-    db.refresh(new_income)
+    _save(db, new_income, commit)
     return new_income
 
 def get_incomes_by_user(db: Session, user_id: int):
     return db.query(Income).filter(Income.user_id == user_id).all()
 
+# Bulk Transaction Operations
+# Rows are inserted with one executemany (psycopg2 batches them into multi-row VALUES).
+# income_expense_summary is kept in sync by the delta triggers in db/triggers.sql.
+def add_expenses_bulk_db(db: Session, user_id: int, rows: list):
+    if not rows:
+        return 0
+    try:
+        db.execute(insert(Expense), [
+            {"user_id": user_id, "category": row["category"], "amount": row["amount"], "date": row["date"]}
+            for row in rows
+        ])
+        db.commit()
+        return len(rows)
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise Exception(f"Error adding expenses: {str(e)}")
+
+def add_incomes_bulk_db(db: Session, user_id: int, rows: list):
+    if not rows:
+        return 0
+    try:
+        db.execute(insert(Income), [
+            {"user_id": user_id, "source": row["source"], "amount": row["amount"], "date": row["date"]}
+            for row in rows
+        ])
+        db.commit()
+        return len(rows)
+    except SQLAlchemyError as e:
+        db.rollback()
+        raise Exception(f"Error adding income: {str(e)}")
+
+# Bulk and range deletes. Each runs as one DELETE statement in one transaction; the
+# statement-level trigger in db/triggers.sql subtracts the deleted rows from
+# income_expense_summary with a single grouped UPDATE.
+def _transaction_delete_filters(model, label_column, user_id: int, ids=None, start_date=None, end_date=None, label=None):
+    filters = [model.user_id == user_id]
+    if ids:
+        filters.append(model.id.in_(ids))
+    if start_date:
+        filters.append(model.date >= start_date)
+    if end_date:
+        filters.append(model.date <= end_date)
+    if label:
+        filters.append(label_column == label)
+    return filters
+
+# They return the (date, category/source) of every deleted row so callers can tell which
+# months and categories were affected.
+def delete_expenses_db(db: Session, user_id: int, ids=None, start_date=None, end_date=None, category=None,
+                       commit: bool = True):
+    filters = _transaction_delete_filters(Expense, Expense.category, user_id, ids, start_date, end_date, category)
+    try:
+        deleted = db.execute(
+            delete(Expense).where(*filters).returning(Expense.date, Expense.category)
+            .execution_options(synchronize_session=False)
+        ).fetchall()
+        _finish(db, commit)
+        return deleted
+    except SQLAlchemyError as e:
+        _rollback(db, commit)
+        raise Exception(f"Error deleting expenses: {str(e)}")
+
+def delete_incomes_db(db: Session, user_id: int, ids=None, start_date=None, end_date=None, source=None,
+                      commit: bool = True):
+    filters = _transaction_delete_filters(Income, Income.source, user_id, ids, start_date, end_date, source)
+    try:
+        deleted = db.execute(
+            delete(Income).where(*filters).returning(Income.date, Income.source)
+            .execution_options(synchronize_session=False)
+        ).fetchall()
+        _finish(db, commit)
+        return deleted
+    except SQLAlchemyError as e:
+        _rollback(db, commit)
+        raise Exception(f"Error deleting income: {str(e)}")
+
 # Budget CRUD Operations
 def get_budgets_by_user(db: Session, user_id: int):
     return db.query(Budget).filter(Budget.user_id == user_id).all()
 
-def create_budget_db(db: Session, user_id: int, category: str, budget_amount: float):
+def create_budget_db(db: Session, user_id: int, category: str, budget_amount: float, commit: bool = True):
     new_budget = Budget(user_id=user_id, category=category,
                         budget_amount=budget_amount)
     
     db.add(new_budget)
-    db.commit()
-    db.refresh(new_budget)
+    _save(db, new_budget, commit)
     return new_budget
 
-def update_budget_db(db: Session, budget_id: int, new_amount: float):
+def update_budget_db(db: Session, budget_id: int, new_amount: float, commit: bool = True):
     budget = db.query(Budget).filter(Budget.id == budget_id).first()
     if not budget:
         raise Exception("Budget not found")
     
     budget.budget_amount = new_amount
-    db.commit()
-    db.refresh(budget)
+    _save(db, budget, commit)
     return budget
 
-def delete_budget_db(db: Session, budget_id: int):
+def delete_budget_db(db: Session, budget_id: int, commit: bool = True):
     budget = db.query(Budget).filter(Budget.id == budget_id).first()
     if not budget:
         raise Exception("Budget not found")
     
     db.delete(budget)
-    db.commit()
+    _finish(db, commit)
+    return budget
 
 
 # def delete_budget_db(db: Session, budget_id: int, year: int, month: int):
@@ -129,7 +225,7 @@ def delete_budget_db(db: Session, budget_id: int):
 # Financial Summary Operations
 def get_financial_summary_db(db: Session, user_id: int):
     result = db.execute(
-        text("SELECT * FROM financial_summary WHERE user_id = :user_id"),
+        text("SELECT * FROM get_user_financial_summary(:user_id)"),
         {"user_id": user_id}
     ).fetchone()
 
@@ -167,26 +263,26 @@ def get_expense_breakdown(db: Session, user_id: int):
 
 
 # Assets and Debts :
-def add_debt_db(db: Session, user_id: int, category: str, amount: float, date_incurred: date):
+def add_debt_db(db: Session, user_id: int, category: str, amount: float, date_incurred: date, commit: bool = True):
     try:
         new_debt = Debt(user_id=user_id, category=category, amount=amount, date_incurred=date_incurred)
         db.add(new_debt)
-        db.commit()
-        db.refresh(new_debt)
+        _save(db, new_debt, commit)
         return new_debt
     except SQLAlchemyError as e:
-        db.rollback()
+        _rollback(db, commit)
         raise Exception(f"Error adding debt: {str(e)}")
 
-def delete_debt_db(db: Session, debt_id: int):
+def delete_debt_db(db: Session, debt_id: int, commit: bool = True):
     try:
         debt = db.query(Debt).filter(Debt.id == debt_id).first()
         if not debt:
             raise Exception("Debt not found")
         db.delete(debt)
-        db.commit()
+        _finish(db, commit)
+        return debt
     except SQLAlchemyError as e:
-        db.rollback()
+        _rollback(db, commit)
         raise Exception(f"Error deleting debt: {str(e)}")
 
 def get_debts_by_user(db: Session, user_id: int):
@@ -208,29 +304,29 @@ def get_debts_by_user(db: Session, user_id: int):
 
 logging.basicConfig(level=logging.ERROR)
 
-def add_asset_db(db: Session, user_id: int, category: str, value: float, date_added: date):
+def add_asset_db(db: Session, user_id: int, category: str, value: float, date_added: date, commit: bool = True):
     try:
         new_asset = Asset(user_id=user_id, category=category, value=value, date_added=date_added)
         db.add(new_asset)
-        db.commit()
-        db.refresh(new_asset)
+        _save(db, new_asset, commit)
         return new_asset
     except SQLAlchemyError as e:
-        db.rollback()
+        _rollback(db, commit)
         logging.error(f"Database error: {str(e)}")  # Log the actual SQL error
         raise Exception(f"Error adding asset: {str(e)}")
 
 
 
-def delete_asset_db(db: Session, asset_id: int):
+def delete_asset_db(db: Session, asset_id: int, commit: bool = True):
     try:
         asset = db.query(Asset).filter(Asset.id == asset_id).first()
         if not asset:
             raise Exception("Asset not found")
         db.delete(asset)
-        db.commit()
+        _finish(db, commit)
+        return asset
     except SQLAlchemyError as e:
-        db.rollback()
+        _rollback(db, commit)
         raise Exception(f"Error deleting asset: {str(e)}")
 
 def get_assets_by_user(db: Session, user_id: int):
@@ -238,3 +334,518 @@ def get_assets_by_user(db: Session, user_id: int):
         return db.query(Asset).filter(Asset.user_id == user_id).all()
     except SQLAlchemyError as e:
         raise Exception(f"Error fetching assets: {str(e)}")
+
+
+# Recurring Rules
+def create_recurring_rule_db(db: Session, user_id: int, kind: str, label: str, amount: float, frequency: str,
+                             start_date: date, end_date: date = None, commit: bool = True):
+    rule = RecurringRule(user_id=user_id, kind=kind, label=label, amount=amount, frequency=frequency,
+                         start_date=start_date, end_date=end_date, next_index=0, next_due=start_date)
+    db.add(rule)
+    _save(db, rule, commit)
+    return rule
+
+def get_recurring_rules_by_user(db: Session, user_id: int):
+    return db.query(RecurringRule).filter(RecurringRule.user_id == user_id).all()
+
+def delete_recurring_rule_db(db: Session, rule_id: int, commit: bool = True):
+    rule = db.query(RecurringRule).filter(RecurringRule.id == rule_id).first()
+    if not rule:
+        raise Exception("Recurring rule not found")
+    db.delete(rule)
+    _finish(db, commit)
+    return rule
+
+
+# Category Rules
+def create_category_rule_db(db: Session, user_id, pattern: str, match_type: str, category: str,
+                            priority: int = 100, commit: bool = True):
+    rule = CategoryRule(user_id=user_id, pattern=pattern, match_type=match_type, category=category, priority=priority)
+    db.add(rule)
+    _save(db, rule, commit)
+    return rule
+
+def get_category_rules_for_user(db: Session, user_id):
+    # The user's own rules plus every global rule; user_id None returns only the global ones
+    query = db.query(CategoryRule)
+    if user_id is None:
+        return query.filter(CategoryRule.user_id.is_(None)).all()
+    return query.filter((CategoryRule.user_id == user_id) | CategoryRule.user_id.is_(None)).all()
+
+def delete_category_rule_db(db: Session, rule_id: int, commit: bool = True):
+    rule = db.query(CategoryRule).filter(CategoryRule.id == rule_id).first()
+    if not rule:
+        raise Exception("Category rule not found")
+    db.delete(rule)
+    _finish(db, commit)
+    return rule
+
+# Paginated Listing
+# Pages are ordered newest first by (date, id) and each page starts strictly after the
+# cursor row, so fetching page 1000 costs the same as page 1 (no OFFSET scan).
+# Asset and debt dates are nullable: undated rows come first (Postgres' default for DESC,
+# which is also the backward scan order of the (user_id, date, id) indexes) and a cursor on
+# one of them is encoded with an empty date.
+def encode_cursor(row_date: Optional[date], row_id: int):
+    date_part = row_date.isoformat() if row_date is not None else ""
+    return base64.urlsafe_b64encode(f"{date_part}|{row_id}".encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        row_date, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return (date.fromisoformat(row_date) if row_date else None), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+# Pages are plain dicts of the table's columns, selected as Core rows rather than loaded as
+# ORM instances, so neither loading nor serializing them goes through attribute instrumentation.
+# Import fingerprints are internal and left out.
+def _page_columns(model):
+    return [column for column in model.__table__.c if column.key != "fingerprint"]
+
+def _get_page(db: Session, model, date_column, amount_column, label_column, user_id: int, limit: int,
+              cursor: str = None, start_date: date = None, end_date: date = None, label: str = None,
+              min_amount: float = None, max_amount: float = None):
+    query = select(*_page_columns(model)).where(model.user_id == user_id)
+    if start_date is not None:
+        query = query.where(date_column >= start_date)
+    if end_date is not None:
+        query = query.where(date_column <= end_date)
+    if label is not None:
+        query = query.where(label_column == label)
+    if min_amount is not None:
+        query = query.where(amount_column >= min_amount)
+    if max_amount is not None:
+        query = query.where(amount_column <= max_amount)
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        if cursor_date is None:
+            # Still among the undated rows: the rest of them, then every dated row
+            query = query.where(or_(and_(date_column.is_(None), model.id < cursor_id), date_column.isnot(None)))
+        else:
+            query = query.where(tuple_(date_column, model.id) < tuple_(cursor_date, cursor_id))
+
+    # One extra row tells us whether there is a next page
+    result = db.execute(query.order_by(date_column.desc().nulls_first(), model.id.desc()).limit(limit + 1))
+    rows = [dict(row._mapping) for row in result]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][date_column.key], rows[-1]["id"])
+    return rows, next_cursor
+
+def get_expenses_page(db: Session, user_id: int, limit: int, cursor: str = None, start_date: date = None,
+                      end_date: date = None, category: str = None, min_amount: float = None, max_amount: float = None):
+    try:
+        return _get_page(db, Expense, Expense.date, Expense.amount, Expense.category, user_id, limit, cursor,
+                         start_date, end_date, category, min_amount, max_amount)
+    except SQLAlchemyError as e:
+        raise Exception(f"Error fetching expenses: {str(e)}")
+
+def get_incomes_page(db: Session, user_id: int, limit: int, cursor: str = None, start_date: date = None,
+                     end_date: date = None, source: str = None, min_amount: float = None, max_amount: float = None):
+    try:
+        return _get_page(db, Income, Income.date, Income.amount, Income.source, user_id, limit, cursor,
+                         start_date, end_date, source, min_amount, max_amount)
+    except SQLAlchemyError as e:
+        raise Exception(f"Error fetching income: {str(e)}")
+
+def get_debts_page(db: Session, user_id: int, limit: int, cursor: str = None, start_date: date = None,
+                   end_date: date = None, category: str = None, min_amount: float = None, max_amount: float = None):
+    try:
+        return _get_page(db, Debt, Debt.date_incurred, Debt.amount, Debt.category, user_id, limit, cursor,
+                         start_date, end_date, category, min_amount, max_amount)
+    except SQLAlchemyError as e:
+        raise Exception(f"Error fetching debts: {str(e)}")
+
+def get_assets_page(db: Session, user_id: int, limit: int, cursor: str = None, start_date: date = None,
+                    end_date: date = None, category: str = None, min_amount: float = None, max_amount: float = None):
+    try:
+        return _get_page(db, Asset, Asset.date_added, Asset.value, Asset.category, user_id, limit, cursor,
+                         start_date, end_date, category, min_amount, max_amount)
+    except SQLAlchemyError as e:
+        raise Exception(f"Error fetching assets: {str(e)}")
+
+# Data version behind the ETags of the read endpoints; 0 until the user's first write
+def get_user_data_version(db: Session, user_id: int):
+    try:
+        version = db.execute(
+            text("SELECT version FROM user_data_versions WHERE user_id = :user_id"),
+            {"user_id": user_id}
+        ).scalar()
+        return version or 0
+    except SQLAlchemyError as e:
+        raise Exception(f"Error fetching data version: {str(e)}")
+
+# Aggregates returned by write endpoints. They are read inside the write's transaction,
+# so they already include the write. Totals come from the trigger-maintained
+# income_expense_summary (one row per month) instead of summing raw transactions.
+def get_totals_db(db: Session, user_id: int):
+    row = db.execute(text("""
+        SELECT COALESCE(SUM(total_income), 0) AS total_income,
+               COALESCE(SUM(total_expenses), 0) AS total_expenses
+        FROM income_expense_summary
+        WHERE user_id = :user_id
+    """), {"user_id": user_id}).fetchone()
+    return {
+        "total_income": row.total_income,
+        "total_expenses": row.total_expenses,
+        "net_savings": row.total_income - row.total_expenses
+    }
+
+def get_month_summaries_db(db: Session, user_id: int, dates):
+    months = sorted({d.year * 100 + d.month for d in dates})
+    if not months:
+        return []
+    result = db.execute(text("""
+        SELECT year, month, total_income, total_expenses
+        FROM income_expense_summary
+        WHERE user_id = :user_id
+        AND year * 100 + month = ANY(:months)
+        ORDER BY year, month
+    """), {"user_id": user_id, "months": months}).fetchall()
+    return [
+        {"year": row.year, "month": row.month, "total_income": row.total_income, "total_expenses": row.total_expenses}
+        for row in result
+    ]
+
+def _label_totals(db: Session, query: str, user_id: int, labels, key: str = "category"):
+    labels = sorted(set(labels))
+    if not labels:
+        return []
+    result = db.execute(text(query), {"user_id": user_id, "labels": labels}).fetchall()
+    totals = {row.label: row.total for row in result}
+    return [{key: label, "total": totals.get(label, 0)} for label in labels]
+
+def get_expense_category_totals_db(db: Session, user_id: int, categories):
+    return _label_totals(db, """
+        SELECT category AS label, SUM(amount) AS total
+        FROM expenses
+        WHERE user_id = :user_id AND category = ANY(:labels)
+        GROUP BY category
+    """, user_id, categories)
+
+def get_income_source_totals_db(db: Session, user_id: int, sources):
+    return _label_totals(db, """
+        SELECT source AS label, SUM(amount) AS total
+        FROM income
+        WHERE user_id = :user_id AND source = ANY(:labels)
+        GROUP BY source
+    """, user_id, sources, key="source")
+
+def get_transaction_aggregates(db: Session, user_id: int, dates, categories=(), sources=()):
+    aggregates = {
+        "totals": get_totals_db(db, user_id),
+        "months": get_month_summaries_db(db, user_id, dates),
+    }
+    if categories:
+        aggregates["categories"] = get_expense_category_totals_db(db, user_id, categories)
+    if sources:
+        aggregates["sources"] = get_income_source_totals_db(db, user_id, sources)
+    return aggregates
+
+def get_budget_aggregates(db: Session, user_id: int, category: str):
+    budgets = db.query(Budget).filter(Budget.user_id == user_id, Budget.category == category).all()
+    return {
+        "budgeted": sum(b.budget_amount or 0 for b in budgets),
+        "categories": get_expense_category_totals_db(db, user_id, [category]),
+    }
+
+def get_balance_sheet_db(db: Session, user_id: int, asset_categories=(), debt_categories=()):
+    row = db.execute(text("""
+        SELECT
+            (SELECT COALESCE(SUM(value), 0) FROM assets WHERE user_id = :user_id) AS total_assets,
+            (SELECT COALESCE(SUM(amount), 0) FROM debts WHERE user_id = :user_id) AS total_liabilities
+    """), {"user_id": user_id}).fetchone()
+    aggregates = {
+        "total_assets": row.total_assets,
+        "total_liabilities": row.total_liabilities,
+        "net_worth": row.total_assets - row.total_liabilities,
+    }
+    if asset_categories:
+        aggregates["asset_categories"] = _label_totals(db, """
+            SELECT category AS label, SUM(value) AS total
+            FROM assets
+            WHERE user_id = :user_id AND category = ANY(:labels)
+            GROUP BY category
+        """, user_id, asset_categories)
+    if debt_categories:
+        aggregates["debt_categories"] = _label_totals(db, """
+            SELECT category AS label, SUM(amount) AS total
+            FROM debts
+            WHERE user_id = :user_id AND category = ANY(:labels)
+            GROUP BY category
+        """, user_id, debt_categories)
+    return aggregates
+
+
+# Range totals
+# Two lookups per series in the cumulative_totals prefix sums (db/migrations/0005_cumulative_totals.sql):
+# the running total through end_date minus the running total before start_date.
+# Label '' is the series of every expense (or income); a category/source selects its own series.
+RANGE_TOTALS_SQL = """
+    SELECT
+        COALESCE((SELECT cumulative FROM cumulative_totals
+                  WHERE user_id = :user_id AND kind = 'income' AND label = :source AND day <= :end_date
+                  ORDER BY day DESC LIMIT 1), 0)
+      - COALESCE((SELECT cumulative FROM cumulative_totals
+                  WHERE user_id = :user_id AND kind = 'income' AND label = :source AND day < :start_date
+                  ORDER BY day DESC LIMIT 1), 0) AS total_income,
+        COALESCE((SELECT cumulative FROM cumulative_totals
+                  WHERE user_id = :user_id AND kind = 'expense' AND label = :category AND day <= :end_date
+                  ORDER BY day DESC LIMIT 1), 0)
+      - COALESCE((SELECT cumulative FROM cumulative_totals
+                  WHERE user_id = :user_id AND kind = 'expense' AND label = :category AND day < :start_date
+                  ORDER BY day DESC LIMIT 1), 0) AS total_expenses
+"""
+
+def get_range_totals_db(db: Session, user_id: int, start_date: date = None, end_date: date = None,
+                        category: str = None, source: str = None):
+    """Income and expenses between start_date and end_date, both inclusive and both optional."""
+    if start_date and end_date and start_date > end_date:
+        raise ValueError("from must not be after to")
+    try:
+        row = db.execute(text(RANGE_TOTALS_SQL), {
+            "user_id": user_id,
+            "start_date": start_date or date.min,
+            "end_date": end_date or date.max,
+            "category": category or "",
+            "source": source or "",
+        }).fetchone()
+    except SQLAlchemyError as e:
+        raise Exception(f"Error fetching range totals: {str(e)}")
+    return {
+        "from": start_date,
+        "to": end_date,
+        "category": category,
+        "source": source,
+        "total_income": row.total_income,
+        "total_expenses": row.total_expenses,
+        "net_savings": row.total_income - row.total_expenses,
+    }
+
+def _years_before(day: date, years: int):
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:  # Feb 29
+        return day.replace(year=day.year - years, day=28)
+
+def get_ytd_totals_db(db: Session, user_id: int, as_of: date, category: str = None, source: str = None):
+    return get_range_totals_db(db, user_id, as_of.replace(month=1, day=1), as_of, category, source)
+
+def get_ttm_totals_db(db: Session, user_id: int, as_of: date, category: str = None, source: str = None):
+    """The twelve months ending on as_of."""
+    return get_range_totals_db(db, user_id, _years_before(as_of, 1) + timedelta(days=1), as_of, category, source)
+
+def get_yoy_totals_db(db: Session, user_id: int, as_of: date, category: str = None, source: str = None):
+    """Year to date against the same span of the previous year."""
+    current = get_ytd_totals_db(db, user_id, as_of, category, source)
+    previous = get_ytd_totals_db(db, user_id, _years_before(as_of, 1), category, source)
+    change = {}
+    for key in ("total_income", "total_expenses", "net_savings"):
+        difference = current[key] - previous[key]
+        change[key] = {
+            "change": difference,
+            "percent_change": round(difference / abs(previous[key]) * 100, 2) if previous[key] else None,
+        }
+    return {"current": current, "previous": previous, "change": change}
+
+
+# Budget vs actual
+# Budgets are monthly amounts per category. Spending for all N months comes from one grouped
+# query over the half-open range [first month, month after as_of), which the (user_id, date, id)
+# index can serve, unlike a date_trunc() comparison on each row.
+def _add_months(month_start: date, months: int):
+    index = month_start.year * 12 + month_start.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+def get_budget_vs_actual_db(db: Session, user_id: int, months: int, as_of: date = None):
+    last_month = (as_of or date.today()).replace(day=1)
+    month_starts = [_add_months(last_month, offset) for offset in range(1 - months, 1)]
+    try:
+        budget_rows = db.execute(text("""
+            SELECT COALESCE(NULLIF(category, ''), 'Uncategorized') AS category, SUM(budget_amount) AS budgeted
+            FROM budgets
+            WHERE user_id = :user_id
+            GROUP BY 1
+        """), {"user_id": user_id}).fetchall()
+        spent_rows = db.execute(text("""
+            SELECT date_trunc('month', date)::DATE AS month, COALESCE(NULLIF(category, ''), 'Uncategorized') AS category,
+                   SUM(amount) AS spent
+            FROM expenses
+            WHERE user_id = :user_id AND date >= :start_date AND date < :end_date
+            GROUP BY 1, 2
+        """), {"user_id": user_id, "start_date": month_starts[0], "end_date": _add_months(last_month, 1)}).fetchall()
+    except SQLAlchemyError as e:
+        raise Exception(f"Error fetching budget vs actual: {str(e)}")
+
+    budgets = {row.category: row.budgeted for row in budget_rows}
+    categories = sorted(set(budgets) | {row.category for row in spent_rows})
+    category_index = {category: i for i, category in enumerate(categories)}
+    month_index = {month_start: i for i, month_start in enumerate(month_starts)}
+
+    spent = [[0] * len(month_starts) for _ in categories]
+    for row in spent_rows:
+        spent[category_index[row.category]][month_index[row.month]] = row.spent
+
+    return {
+        "months": [month_start.strftime("%Y-%m") for month_start in month_starts],
+        "categories": categories,
+        "budgeted": [budgets.get(category, 0) for category in categories],
+        "spent": spent,
+    }
+
+
+# Net worth
+# Daily rows of net_worth_snapshots (db/migrations/0006_net_worth_snapshots.sql). The current
+# value is the latest row up to end_date, one backward primary key probe.
+def get_net_worth_db(db: Session, user_id: int, start_date: date = None, end_date: date = None):
+    if start_date and end_date and start_date > end_date:
+        raise ValueError("from must not be after to")
+    params = {"user_id": user_id, "start_date": start_date or date.min, "end_date": end_date or date.max}
+    try:
+        current = db.execute(text("""
+            SELECT day, total_assets, total_liabilities, net_worth
+            FROM net_worth_snapshots
+            WHERE user_id = :user_id AND day <= :end_date
+            ORDER BY day DESC
+            LIMIT 1
+        """), params).fetchone()
+        history = db.execute(text("""
+            SELECT day, total_assets, total_liabilities, net_worth
+            FROM net_worth_snapshots
+            WHERE user_id = :user_id AND day >= :start_date AND day <= :end_date
+            ORDER BY day
+        """), params).fetchall()
+    except SQLAlchemyError as e:
+        raise Exception(f"Error fetching net worth: {str(e)}")
+
+    def snapshot(row):
+        return {"day": row.day, "total_assets": row.total_assets, "total_liabilities": row.total_liabilities,
+                "net_worth": row.net_worth}
+
+    return {
+        "from": start_date,
+        "to": end_date,
+        "current": snapshot(current) if current else None,
+        "history": [snapshot(row) for row in history],
+    }
+
+
+# Expense heatmap
+# Dense category x month matrix from the trigger-maintained expense_category_monthly rollup:
+# every month from the first to the last one with expenses, in order, with 0 for empty cells.
+def get_expense_heatmap_db(db: Session, user_id: int):
+    try:
+        rows = db.execute(text("""
+            SELECT year, month, category, total
+            FROM expense_category_monthly
+            WHERE user_id = :user_id AND expense_count > 0
+            ORDER BY year, month, category
+        """), {"user_id": user_id}).fetchall()
+    except SQLAlchemyError as e:
+        raise Exception(f"Error fetching expense heatmap: {str(e)}")
+
+    if not rows:
+        return {"categories": [], "months": [], "values": []}
+
+    first = rows[0].year * 12 + rows[0].month - 1
+    last = rows[-1].year * 12 + rows[-1].month - 1
+    months = [f"{index // 12}-{index % 12 + 1:02d}" for index in range(first, last + 1)]
+    categories = sorted({row.category for row in rows})
+    category_index = {category: i for i, category in enumerate(categories)}
+
+    values = [[0] * len(months) for _ in categories]
+    for row in rows:
+        values[category_index[row.category]][row.year * 12 + row.month - 1 - first] = row.total
+
+    return {"categories": categories, "months": months, "values": values}
+
+
+# Dashboard
+# Everything the Streamlit dashboard renders, read in one READ ONLY REPEATABLE READ
+# transaction so every widget sees the same snapshot.
+def get_dashboard_db(db: Session, user_id: int, today: date = None):
+    today = today or date.today()
+    # Must be the first statement of the transaction
+    db.execute(text("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY"))
+
+    month_rows = db.execute(text("""
+        SELECT year, month, total_income, total_expenses
+        FROM income_expense_summary
+        WHERE user_id = :user_id
+        ORDER BY year, month
+    """), {"user_id": user_id}).fetchall()
+
+    category_rows = db.execute(text("""
+        SELECT year, month, category, total
+        FROM expense_category_monthly
+        WHERE user_id = :user_id AND expense_count > 0
+        ORDER BY year, month, category
+    """), {"user_id": user_id}).fetchall()
+
+    budget_rows = db.execute(text("""
+        SELECT id, category, budget_amount
+        FROM budgets
+        WHERE user_id = :user_id
+        ORDER BY category
+    """), {"user_id": user_id}).fetchall()
+
+    balance_rows = db.execute(text("""
+        SELECT 'asset' AS kind, category, SUM(value) AS total
+        FROM assets WHERE user_id = :user_id GROUP BY category
+        UNION ALL
+        SELECT 'debt' AS kind, category, SUM(amount) AS total
+        FROM debts WHERE user_id = :user_id GROUP BY category
+    """), {"user_id": user_id}).fetchall()
+
+    goal_amount = db.execute(text("""
+        SELECT goal_amount FROM savings_goals
+        WHERE user_id = :user_id AND month = date_trunc('month', CAST(:today AS DATE))
+    """), {"user_id": user_id, "today": today}).scalar()
+
+    months = [
+        {"year": row.year, "month": row.month, "total_income": row.total_income,
+         "total_expenses": row.total_expenses, "savings": row.total_income - row.total_expenses}
+        for row in month_rows
+    ]
+    total_income = sum(m["total_income"] for m in months)
+    total_expenses = sum(m["total_expenses"] for m in months)
+    current = next((m for m in months if m["year"] == today.year and m["month"] == today.month), None)
+
+    breakdown = {}
+    for row in category_rows:
+        breakdown[row.category] = breakdown.get(row.category, 0) + row.total
+
+    assets = [{"category": row.category, "total": row.total} for row in balance_rows if row.kind == "asset"]
+    debts = [{"category": row.category, "total": row.total} for row in balance_rows if row.kind == "debt"]
+    total_assets = sum(a["total"] for a in assets)
+    total_liabilities = sum(d["total"] for d in debts)
+
+    return {
+        "user_id": user_id,
+        "as_of": today,
+        "totals": {
+            "total_income": total_income,
+            "total_expenses": total_expenses,
+            "net_savings": total_income - total_expenses,
+        },
+        "months": months,
+        "expenses_by_month": [
+            {"year": row.year, "month": row.month, "category": row.category, "total": row.total}
+            for row in category_rows
+        ],
+        "expense_breakdown": [{"category": category, "total": total} for category, total in breakdown.items()],
+        "budgets": [{"id": row.id, "category": row.category, "budget_amount": row.budget_amount} for row in budget_rows],
+        "balance_sheet": {
+            "total_assets": total_assets,
+            "total_liabilities": total_liabilities,
+            "net_worth": total_assets - total_liabilities,
+            "assets": assets,
+            "debts": debts,
+        },
+        "savings": {
+            "current_savings": current["savings"] if current else 0,
+            "goal_amount": goal_amount or 0,
+        },
+    }
@@ -1,5 +1,7 @@
 
--- Updates income_expense_summary whenever called(during login, and when something is added/deleted)
+-- Rebuilds a user's rows in income_expense_summary from scratch.
+-- Day-to-day writes are applied as deltas by the triggers in triggers.sql, so this is only
+-- needed to backfill existing data (SELECT populate_income_expense_summary(id) FROM users;)
 CREATE OR REPLACE FUNCTION populate_income_expense_summary(uid INT) RETURNS INT AS $$
 DECLARE
     affected_rows INT;
@@ -75,26 +77,61 @@ $$ LANGUAGE plpgsql;
 
 
 
+-- Latest row of net_worth_snapshots (kept current by db/migrations/0006_net_worth_snapshots.sql),
+-- instead of summing assets and debts on every call
 CREATE OR REPLACE FUNCTION get_net_worth(p_user_id INT) 
 RETURNS NUMERIC AS $$
-DECLARE 
-    total_assets NUMERIC;
-    total_liabilities NUMERIC;
-    net_worth NUMERIC;
 BEGIN
-    -- Calculate total assets by summing up category-wise asset values
-    SELECT COALESCE(SUM(total_value), 0) INTO total_assets
-    FROM get_assets_by_category(p_user_id);
-
-    -- Get total liabilities
-    SELECT get_total_liabilities(p_user_id) INTO total_liabilities;
-    
-    -- Compute net worth
-    net_worth := total_assets - total_liabilities;
-    
-    RETURN net_worth;
+    RETURN COALESCE((
+        SELECT net_worth
+        FROM net_worth_snapshots
+        WHERE user_id = p_user_id
+        ORDER BY day DESC
+        LIMIT 1
+    ), 0);
 END;
 $$ LANGUAGE plpgsql;
 
 
--- psql -U your_username -d db_name -a -f backend/db/functions.sql
+-- One user's financial summary (GET /financial-summary/{user_id}).
+-- Starts from the users primary key and reads only that user's rows: the monthly totals in
+-- income_expense_summary (kept current by triggers.sql, so months rather than transactions)
+-- and this month's row in savings_goals (kept current by update_savings). A plain SQL
+-- function, so the planner inlines it and p_user_id reaches every index lookup.
+CREATE OR REPLACE FUNCTION get_user_financial_summary(p_user_id INT)
+RETURNS TABLE(
+    user_id INT,
+    username VARCHAR,
+    total_income NUMERIC,
+    total_expenses NUMERIC,
+    net_savings NUMERIC,
+    savings_goal NUMERIC,
+    current_savings NUMERIC,
+    savings_progress_percentage NUMERIC,
+    expense_to_income_ratio NUMERIC
+) AS $$
+    SELECT
+        u.id::INT,
+        u.username::VARCHAR,
+        t.total_income,
+        t.total_expenses,
+        t.total_income - t.total_expenses,
+        g.goal_amount::NUMERIC,
+        g.current_amount::NUMERIC,
+        ROUND(g.current_amount::NUMERIC / NULLIF(g.goal_amount, 0) * 100, 2),
+        ROUND(t.total_expenses / NULLIF(t.total_income, 0), 4)
+    FROM users u
+    CROSS JOIN LATERAL (
+        SELECT COALESCE(SUM(s.total_income), 0)::NUMERIC AS total_income,
+               COALESCE(SUM(s.total_expenses), 0)::NUMERIC AS total_expenses
+        FROM income_expense_summary s
+        WHERE s.user_id = u.id
+    ) t
+    LEFT JOIN savings_goals g
+        ON g.user_id = u.id AND g.month = date_trunc('month', CURRENT_DATE)
+    WHERE u.id = p_user_id;
+$$ LANGUAGE sql STABLE;
+
+
+-- Applied (and re-applied whenever this file changes) by the migration runner:
+-- python -m backend.migrate
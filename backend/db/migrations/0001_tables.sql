@@ -0,0 +1,47 @@
+-- Tables that are not created by the original schema.
+-- This was backend/db/tables.sql. Everything here is IF NOT EXISTS, so it also runs cleanly on
+-- databases that applied that file by hand.
+
+-- Recurring transactions (see backend/recurring.py)
+CREATE TABLE IF NOT EXISTS recurring_rules (
+    id SERIAL PRIMARY KEY,
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    kind VARCHAR(10) NOT NULL CHECK (kind IN ('expense', 'income')),
+    label VARCHAR NOT NULL,
+    amount DOUBLE PRECISION NOT NULL,
+    frequency VARCHAR(10) NOT NULL CHECK (frequency IN ('weekly', 'monthly', 'yearly')),
+    start_date DATE NOT NULL,
+    end_date DATE,
+    next_index INT NOT NULL DEFAULT 0,
+    next_due DATE NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS ix_recurring_rules_next_due ON recurring_rules (next_due);
+
+CREATE TABLE IF NOT EXISTS recurring_occurrences (
+    rule_id INT NOT NULL REFERENCES recurring_rules(id) ON DELETE CASCADE,
+    period DATE NOT NULL,
+    PRIMARY KEY (rule_id, period)
+);
+
+-- Import fingerprints (see backend/importer.py). Rows entered by hand have none, so only
+-- imported transactions are deduplicated.
+ALTER TABLE expenses ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(32);
+ALTER TABLE income ADD COLUMN IF NOT EXISTS fingerprint VARCHAR(32);
+
+CREATE UNIQUE INDEX IF NOT EXISTS ux_expenses_user_fingerprint
+    ON expenses (user_id, fingerprint) WHERE fingerprint IS NOT NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS ux_income_user_fingerprint
+    ON income (user_id, fingerprint) WHERE fingerprint IS NOT NULL;
+
+-- Merchant categorization rules (see backend/categorizer.py); user_id NULL is a global rule
+CREATE TABLE IF NOT EXISTS category_rules (
+    id SERIAL PRIMARY KEY,
+    user_id INT REFERENCES users(id) ON DELETE CASCADE,
+    pattern VARCHAR NOT NULL,
+    match_type VARCHAR(10) NOT NULL CHECK (match_type IN ('substring', 'prefix', 'regex')),
+    category VARCHAR NOT NULL,
+    priority INT NOT NULL DEFAULT 100
+);
+
+CREATE INDEX IF NOT EXISTS ix_category_rules_user_id ON category_rules (user_id);
@@ -0,0 +1,26 @@
+-- migrate: no-transaction
+-- Composite indexes for the per-user queries in crud.py, functions.sql, procedures.sql and
+-- frontend/app.py, which all filter on user_id plus a date and/or category.
+-- Built CONCURRENTLY so writes to these tables are not blocked while they build.
+--
+-- (user_id, date, id) also serves the keyset pagination order of the list endpoints.
+-- income_expense_summary already has a unique index on (user_id, year, month): the
+-- ON CONFLICT upserts in triggers.sql require it, so it is not repeated here.
+--
+-- explain: SELECT * FROM expenses WHERE user_id = :user_id ORDER BY date DESC, id DESC LIMIT 100
+-- explain: SELECT COALESCE(SUM(amount), 0) FROM expenses WHERE user_id = :user_id AND date >= date_trunc('month', CURRENT_DATE)
+-- explain: SELECT date, SUM(amount) FROM expenses WHERE user_id = :user_id AND category = :category GROUP BY date
+-- explain: SELECT COALESCE(SUM(amount), 0) FROM income WHERE user_id = :user_id AND date >= date_trunc('month', CURRENT_DATE)
+-- explain: SELECT * FROM debts WHERE user_id = :user_id ORDER BY date_incurred DESC, id DESC LIMIT 100
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_expenses_user_date ON expenses (user_id, date, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_expenses_user_category_date ON expenses (user_id, category, date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_income_user_date ON income (user_id, date, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_income_user_source_date ON income (user_id, source, date);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_budgets_user_category ON budgets (user_id, category);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_debts_user_date ON debts (user_id, date_incurred, id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_assets_user_date ON assets (user_id, date_added, id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_recurring_rules_user_id ON recurring_rules (user_id);
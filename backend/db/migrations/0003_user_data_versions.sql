@@ -0,0 +1,99 @@
+-- Per-user data version for conditional GETs (ETag / If-None-Match in backend/main.py).
+-- Any committed change to a user's expenses, income, budgets, assets or debts moves their
+-- version forward. Values come from one sequence, so a user's version only ever increases,
+-- even if their row is deleted and recreated.
+
+CREATE SEQUENCE IF NOT EXISTS user_data_version_seq;
+
+CREATE TABLE IF NOT EXISTS user_data_versions (
+    user_id INT PRIMARY KEY REFERENCES users(id) ON DELETE CASCADE,
+    version BIGINT NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- For derived data written outside the triggered tables (savings_goals via the summary refresher)
+CREATE OR REPLACE FUNCTION touch_user_data_version(p_user_id INT) RETURNS VOID AS $$
+    INSERT INTO user_data_versions (user_id, version)
+    VALUES (p_user_id, nextval('user_data_version_seq'))
+    ON CONFLICT (user_id) DO UPDATE SET version = EXCLUDED.version, updated_at = now();
+$$ LANGUAGE sql;
+
+-- Statement-level, so a 10k row bulk insert bumps each affected user once, not 10k times.
+-- Transition tables can only be declared for one event per trigger, hence three triggers per table.
+CREATE OR REPLACE FUNCTION bump_user_data_version() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO user_data_versions (user_id, version)
+        SELECT user_id, nextval('user_data_version_seq')
+        FROM (SELECT DISTINCT user_id FROM new_rows WHERE user_id IS NOT NULL) changed
+        ON CONFLICT (user_id) DO UPDATE SET version = EXCLUDED.version, updated_at = now();
+    ELSIF TG_OP = 'UPDATE' THEN
+        INSERT INTO user_data_versions (user_id, version)
+        SELECT user_id, nextval('user_data_version_seq')
+        FROM (
+            SELECT user_id FROM new_rows WHERE user_id IS NOT NULL
+            UNION
+            SELECT user_id FROM old_rows WHERE user_id IS NOT NULL
+        ) changed
+        ON CONFLICT (user_id) DO UPDATE SET version = EXCLUDED.version, updated_at = now();
+    ELSE
+        INSERT INTO user_data_versions (user_id, version)
+        SELECT user_id, nextval('user_data_version_seq')
+        FROM (SELECT DISTINCT user_id FROM old_rows WHERE user_id IS NOT NULL) changed
+        -- The user may be going away too (ON DELETE CASCADE from users)
+        WHERE EXISTS (SELECT 1 FROM users u WHERE u.id = changed.user_id)
+        ON CONFLICT (user_id) DO UPDATE SET version = EXCLUDED.version, updated_at = now();
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS expenses_version_insert ON expenses;
+CREATE TRIGGER expenses_version_insert AFTER INSERT ON expenses
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+DROP TRIGGER IF EXISTS expenses_version_update ON expenses;
+CREATE TRIGGER expenses_version_update AFTER UPDATE ON expenses
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+DROP TRIGGER IF EXISTS expenses_version_delete ON expenses;
+CREATE TRIGGER expenses_version_delete AFTER DELETE ON expenses
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+DROP TRIGGER IF EXISTS income_version_insert ON income;
+CREATE TRIGGER income_version_insert AFTER INSERT ON income
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+DROP TRIGGER IF EXISTS income_version_update ON income;
+CREATE TRIGGER income_version_update AFTER UPDATE ON income
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+DROP TRIGGER IF EXISTS income_version_delete ON income;
+CREATE TRIGGER income_version_delete AFTER DELETE ON income
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+DROP TRIGGER IF EXISTS budgets_version_insert ON budgets;
+CREATE TRIGGER budgets_version_insert AFTER INSERT ON budgets
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+DROP TRIGGER IF EXISTS budgets_version_update ON budgets;
+CREATE TRIGGER budgets_version_update AFTER UPDATE ON budgets
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+DROP TRIGGER IF EXISTS budgets_version_delete ON budgets;
+CREATE TRIGGER budgets_version_delete AFTER DELETE ON budgets
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+DROP TRIGGER IF EXISTS assets_version_insert ON assets;
+CREATE TRIGGER assets_version_insert AFTER INSERT ON assets
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+DROP TRIGGER IF EXISTS assets_version_update ON assets;
+CREATE TRIGGER assets_version_update AFTER UPDATE ON assets
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+DROP TRIGGER IF EXISTS assets_version_delete ON assets;
+CREATE TRIGGER assets_version_delete AFTER DELETE ON assets
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+
+DROP TRIGGER IF EXISTS debts_version_insert ON debts;
+CREATE TRIGGER debts_version_insert AFTER INSERT ON debts
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+DROP TRIGGER IF EXISTS debts_version_update ON debts;
+CREATE TRIGGER debts_version_update AFTER UPDATE ON debts
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
+DROP TRIGGER IF EXISTS debts_version_delete ON debts;
+CREATE TRIGGER debts_version_delete AFTER DELETE ON debts
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_user_data_version();
@@ -0,0 +1,105 @@
+-- Expense totals per (user_id, year, month, category), kept current by the triggers below.
+-- Serves GET /expense-heatmap/{user_id} and the per-category months of GET /dashboard/{user_id},
+-- so both cost months x categories instead of a GROUP BY over every expense.
+--
+-- Deltas are applied once per statement from the transition tables, like the DELETE triggers
+-- on income_expense_summary in triggers.sql. A cell whose expenses have all been deleted or
+-- moved keeps a row with expense_count = 0; readers skip those.
+
+-- Writes to expenses wait until the backfill below is committed together with the triggers
+LOCK TABLE expenses IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS expense_category_monthly (
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    year INT NOT NULL,
+    month INT NOT NULL,
+    category VARCHAR NOT NULL,  -- 'Uncategorized' for expenses without one
+    total NUMERIC NOT NULL DEFAULT 0,
+    expense_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, year, month, category)
+);
+
+CREATE OR REPLACE FUNCTION apply_expense_category_monthly_delta()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO expense_category_monthly AS m (user_id, year, month, category, total, expense_count)
+        SELECT user_id,
+               EXTRACT(YEAR FROM date)::INT,
+               EXTRACT(MONTH FROM date)::INT,
+               COALESCE(category, 'Uncategorized'),
+               SUM(COALESCE(amount, 0)::NUMERIC),
+               COUNT(*)
+        FROM new_rows
+        WHERE user_id IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (user_id, year, month, category)
+        DO UPDATE SET total = m.total + EXCLUDED.total,
+                      expense_count = m.expense_count + EXCLUDED.expense_count;
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- Old rows come out of their cells and new rows go into theirs; cells whose
+        -- amount and count net to zero (e.g. only the fingerprint changed) are left alone
+        INSERT INTO expense_category_monthly AS m (user_id, year, month, category, total, expense_count)
+        SELECT user_id, year, month, category, SUM(amount), SUM(n)
+        FROM (
+            SELECT user_id, EXTRACT(YEAR FROM date)::INT AS year, EXTRACT(MONTH FROM date)::INT AS month,
+                   COALESCE(category, 'Uncategorized') AS category, COALESCE(amount, 0)::NUMERIC AS amount, 1 AS n
+            FROM new_rows
+            UNION ALL
+            SELECT user_id, EXTRACT(YEAR FROM date)::INT, EXTRACT(MONTH FROM date)::INT,
+                   COALESCE(category, 'Uncategorized'), -COALESCE(amount, 0)::NUMERIC, -1
+            FROM old_rows
+        ) changes
+        WHERE user_id IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        HAVING SUM(amount) <> 0 OR SUM(n) <> 0
+        ON CONFLICT (user_id, year, month, category)
+        DO UPDATE SET total = m.total + EXCLUDED.total,
+                      expense_count = m.expense_count + EXCLUDED.expense_count;
+    ELSE
+        UPDATE expense_category_monthly m
+        SET total = m.total - d.total,
+            expense_count = m.expense_count - d.expense_count
+        FROM (
+            SELECT user_id,
+                   EXTRACT(YEAR FROM date)::INT AS year,
+                   EXTRACT(MONTH FROM date)::INT AS month,
+                   COALESCE(category, 'Uncategorized') AS category,
+                   SUM(COALESCE(amount, 0)::NUMERIC) AS total,
+                   COUNT(*) AS expense_count
+            FROM old_rows
+            GROUP BY 1, 2, 3, 4
+        ) d
+        WHERE m.user_id = d.user_id
+        AND m.year = d.year
+        AND m.month = d.month
+        AND m.category = d.category;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS expense_category_monthly_insert ON expenses;
+CREATE TRIGGER expense_category_monthly_insert AFTER INSERT ON expenses
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION apply_expense_category_monthly_delta();
+DROP TRIGGER IF EXISTS expense_category_monthly_update ON expenses;
+CREATE TRIGGER expense_category_monthly_update AFTER UPDATE ON expenses
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION apply_expense_category_monthly_delta();
+DROP TRIGGER IF EXISTS expense_category_monthly_delete ON expenses;
+CREATE TRIGGER expense_category_monthly_delete AFTER DELETE ON expenses
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION apply_expense_category_monthly_delta();
+
+-- Backfill existing expenses
+INSERT INTO expense_category_monthly (user_id, year, month, category, total, expense_count)
+SELECT user_id,
+       EXTRACT(YEAR FROM date)::INT,
+       EXTRACT(MONTH FROM date)::INT,
+       COALESCE(category, 'Uncategorized'),
+       SUM(COALESCE(amount, 0)::NUMERIC),
+       COUNT(*)
+FROM expenses
+WHERE user_id IS NOT NULL
+GROUP BY 1, 2, 3, 4
+ON CONFLICT (user_id, year, month, category)
+DO UPDATE SET total = EXCLUDED.total, expense_count = EXCLUDED.expense_count;
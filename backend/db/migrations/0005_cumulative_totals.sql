@@ -0,0 +1,166 @@
+-- Per-user running totals of income and expenses by day, for range totals in two lookups
+-- (GET /totals/{user_id}?from=&to=, /ytd, /ttm and /yoy in backend/main.py).
+--
+-- One series per (user_id, kind, label): label '' is every transaction of that kind, any
+-- other label one expense category or income source. A series has a row only for days with
+-- transactions, holding that day's total and the running total through that day, so
+--     total(from, to) = cumulative at the last row <= to - cumulative at the last row < from
+-- which is two backward primary key probes, however many transactions lie in between.
+--
+-- Writes add their delta to their own day and to every later row of the series. Adding a
+-- transaction today touches one row; backdating touches the series' rows after that day.
+
+-- Writes to income and expenses wait until the backfill below is committed with the triggers
+LOCK TABLE income, expenses IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS cumulative_totals (
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    kind VARCHAR(10) NOT NULL CHECK (kind IN ('income', 'expense')),
+    label VARCHAR NOT NULL,
+    day DATE NOT NULL,
+    day_total NUMERIC NOT NULL DEFAULT 0,
+    cumulative NUMERIC NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, kind, label, day)
+);
+
+DO $$
+BEGIN
+    CREATE TYPE cumulative_delta AS (user_id INT, kind VARCHAR, label VARCHAR, day DATE, amount NUMERIC);
+EXCEPTION WHEN duplicate_object THEN
+    NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION apply_cumulative_deltas(p_deltas cumulative_delta[]) RETURNS VOID AS $$
+BEGIN
+    -- A concurrent write to the same series could otherwise miss a row this one adds
+    PERFORM pg_advisory_xact_lock(727005, u.user_id)
+    FROM (SELECT DISTINCT user_id FROM unnest(p_deltas) ORDER BY user_id) u;
+
+    -- Every delta day gets a row, starting from the running total just before it
+    INSERT INTO cumulative_totals (user_id, kind, label, day, day_total, cumulative)
+    SELECT d.user_id, d.kind, d.label, d.day, 0,
+           COALESCE((
+               SELECT p.cumulative FROM cumulative_totals p
+               WHERE p.user_id = d.user_id AND p.kind = d.kind AND p.label = d.label AND p.day < d.day
+               ORDER BY p.day DESC
+               LIMIT 1
+           ), 0)
+    FROM (SELECT DISTINCT user_id, kind, label, day FROM unnest(p_deltas)) d
+    -- Not for a user who is being deleted (ON DELETE CASCADE from users)
+    WHERE EXISTS (SELECT 1 FROM users u WHERE u.id = d.user_id)
+    ON CONFLICT (user_id, kind, label, day) DO NOTHING;
+
+    -- Then each delta is added to its own day and to every later day of its series
+    UPDATE cumulative_totals c
+    SET day_total = c.day_total + s.on_day,
+        cumulative = c.cumulative + s.through_day
+    FROM (
+        SELECT r.user_id, r.kind, r.label, r.day,
+               COALESCE(SUM(d.amount) FILTER (WHERE d.day = r.day), 0) AS on_day,
+               SUM(d.amount) AS through_day
+        FROM unnest(p_deltas) d
+        JOIN cumulative_totals r
+            ON r.user_id = d.user_id AND r.kind = d.kind AND r.label = d.label AND r.day >= d.day
+        GROUP BY r.user_id, r.kind, r.label, r.day
+    ) s
+    WHERE c.user_id = s.user_id
+    AND c.kind = s.kind
+    AND c.label = s.label
+    AND c.day = s.day;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level: one call per INSERT/UPDATE/DELETE, with the rows summed per series and day
+CREATE OR REPLACE FUNCTION cumulative_totals_from_expenses() RETURNS TRIGGER AS $$
+DECLARE
+    deltas cumulative_delta[] := '{}';
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        deltas := deltas || ARRAY(
+            SELECT ROW(user_id, 'expense', l.label, date, SUM(COALESCE(amount, 0)::NUMERIC))::cumulative_delta
+            FROM new_rows
+            CROSS JOIN LATERAL (VALUES (''), (COALESCE(NULLIF(category, ''), 'Uncategorized'))) l(label)
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id, l.label, date
+        );
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        deltas := deltas || ARRAY(
+            SELECT ROW(user_id, 'expense', l.label, date, -SUM(COALESCE(amount, 0)::NUMERIC))::cumulative_delta
+            FROM old_rows
+            CROSS JOIN LATERAL (VALUES (''), (COALESCE(NULLIF(category, ''), 'Uncategorized'))) l(label)
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id, l.label, date
+        );
+    END IF;
+    PERFORM apply_cumulative_deltas(deltas);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION cumulative_totals_from_income() RETURNS TRIGGER AS $$
+DECLARE
+    deltas cumulative_delta[] := '{}';
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        deltas := deltas || ARRAY(
+            SELECT ROW(user_id, 'income', l.label, date, SUM(COALESCE(amount, 0)::NUMERIC))::cumulative_delta
+            FROM new_rows
+            CROSS JOIN LATERAL (VALUES (''), (COALESCE(NULLIF(source, ''), 'Uncategorized'))) l(label)
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id, l.label, date
+        );
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        deltas := deltas || ARRAY(
+            SELECT ROW(user_id, 'income', l.label, date, -SUM(COALESCE(amount, 0)::NUMERIC))::cumulative_delta
+            FROM old_rows
+            CROSS JOIN LATERAL (VALUES (''), (COALESCE(NULLIF(source, ''), 'Uncategorized'))) l(label)
+            WHERE user_id IS NOT NULL
+            GROUP BY user_id, l.label, date
+        );
+    END IF;
+    PERFORM apply_cumulative_deltas(deltas);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS cumulative_totals_insert ON expenses;
+CREATE TRIGGER cumulative_totals_insert AFTER INSERT ON expenses
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION cumulative_totals_from_expenses();
+DROP TRIGGER IF EXISTS cumulative_totals_update ON expenses;
+CREATE TRIGGER cumulative_totals_update AFTER UPDATE ON expenses
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION cumulative_totals_from_expenses();
+DROP TRIGGER IF EXISTS cumulative_totals_delete ON expenses;
+CREATE TRIGGER cumulative_totals_delete AFTER DELETE ON expenses
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION cumulative_totals_from_expenses();
+
+DROP TRIGGER IF EXISTS cumulative_totals_insert ON income;
+CREATE TRIGGER cumulative_totals_insert AFTER INSERT ON income
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION cumulative_totals_from_income();
+DROP TRIGGER IF EXISTS cumulative_totals_update ON income;
+CREATE TRIGGER cumulative_totals_update AFTER UPDATE ON income
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION cumulative_totals_from_income();
+DROP TRIGGER IF EXISTS cumulative_totals_delete ON income;
+CREATE TRIGGER cumulative_totals_delete AFTER DELETE ON income
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION cumulative_totals_from_income();
+
+-- Backfill existing transactions
+INSERT INTO cumulative_totals (user_id, kind, label, day, day_total, cumulative)
+SELECT user_id, kind, label, day, day_total,
+       SUM(day_total) OVER (PARTITION BY user_id, kind, label ORDER BY day)
+FROM (
+    SELECT user_id, 'expense' AS kind, l.label, date AS day, SUM(COALESCE(amount, 0)::NUMERIC) AS day_total
+    FROM expenses
+    CROSS JOIN LATERAL (VALUES (''), (COALESCE(NULLIF(category, ''), 'Uncategorized'))) l(label)
+    WHERE user_id IS NOT NULL
+    GROUP BY user_id, l.label, date
+    UNION ALL
+    SELECT user_id, 'income', l.label, date, SUM(COALESCE(amount, 0)::NUMERIC)
+    FROM income
+    CROSS JOIN LATERAL (VALUES (''), (COALESCE(NULLIF(source, ''), 'Uncategorized'))) l(label)
+    WHERE user_id IS NOT NULL
+    GROUP BY user_id, l.label, date
+) t
+ON CONFLICT (user_id, kind, label, day) DO NOTHING;
@@ -0,0 +1,122 @@
+-- Daily net worth per user, for GET /net-worth/{user_id} and get_net_worth() in functions.sql.
+--
+-- The triggers below move today's row by the change in assets and debts, so the current
+-- value is always the user's latest row. The first change of a day starts the row from the
+-- previous day's values. Days without changes get a row from the daily close in
+-- backend/networth.py, which carries the previous values forward. Rows of past days are
+-- not changed afterwards; they are the history charts read.
+
+-- Writes to assets and debts wait until the backfill below is committed with the triggers
+LOCK TABLE assets, debts IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE TABLE IF NOT EXISTS net_worth_snapshots (
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    total_assets NUMERIC NOT NULL DEFAULT 0,
+    total_liabilities NUMERIC NOT NULL DEFAULT 0,
+    net_worth NUMERIC GENERATED ALWAYS AS (total_assets - total_liabilities) STORED,
+    PRIMARY KEY (user_id, day)
+);
+
+CREATE OR REPLACE FUNCTION apply_net_worth_deltas(p_user_ids INT[], p_assets NUMERIC[], p_liabilities NUMERIC[])
+RETURNS VOID AS $$
+BEGIN
+    -- Today's row starts from the latest earlier one
+    INSERT INTO net_worth_snapshots (user_id, day, total_assets, total_liabilities)
+    SELECT d.user_id, CURRENT_DATE, COALESCE(last.total_assets, 0), COALESCE(last.total_liabilities, 0)
+    FROM (SELECT DISTINCT user_id FROM unnest(p_user_ids) AS ids(user_id) WHERE user_id IS NOT NULL) d
+    LEFT JOIN LATERAL (
+        SELECT s.total_assets, s.total_liabilities
+        FROM net_worth_snapshots s
+        WHERE s.user_id = d.user_id AND s.day < CURRENT_DATE
+        ORDER BY s.day DESC
+        LIMIT 1
+    ) last ON true
+    -- Not for a user who is being deleted (ON DELETE CASCADE from users)
+    WHERE EXISTS (SELECT 1 FROM users u WHERE u.id = d.user_id)
+    ON CONFLICT (user_id, day) DO NOTHING;
+
+    UPDATE net_worth_snapshots s
+    SET total_assets = s.total_assets + d.assets,
+        total_liabilities = s.total_liabilities + d.liabilities
+    FROM (
+        SELECT user_id, SUM(assets) AS assets, SUM(liabilities) AS liabilities
+        FROM unnest(p_user_ids, p_assets, p_liabilities) AS d(user_id, assets, liabilities)
+        GROUP BY user_id
+    ) d
+    WHERE s.user_id = d.user_id
+    AND s.day = CURRENT_DATE;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level: the rows of one INSERT/UPDATE/DELETE are summed per user first
+CREATE OR REPLACE FUNCTION net_worth_from_assets() RETURNS TRIGGER AS $$
+DECLARE
+    user_ids INT[] := '{}';
+    deltas NUMERIC[] := '{}';
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT user_ids || array_agg(user_id), deltas || array_agg(total)
+        INTO user_ids, deltas
+        FROM (SELECT user_id, SUM(value) AS total FROM new_rows GROUP BY user_id) n;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT user_ids || array_agg(user_id), deltas || array_agg(-total)
+        INTO user_ids, deltas
+        FROM (SELECT user_id, SUM(value) AS total FROM old_rows GROUP BY user_id) o;
+    END IF;
+    PERFORM apply_net_worth_deltas(user_ids, deltas, array_fill(0::NUMERIC, ARRAY[cardinality(user_ids)]));
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION net_worth_from_debts() RETURNS TRIGGER AS $$
+DECLARE
+    user_ids INT[] := '{}';
+    deltas NUMERIC[] := '{}';
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT user_ids || array_agg(user_id), deltas || array_agg(total)
+        INTO user_ids, deltas
+        FROM (SELECT user_id, SUM(amount) AS total FROM new_rows GROUP BY user_id) n;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT user_ids || array_agg(user_id), deltas || array_agg(-total)
+        INTO user_ids, deltas
+        FROM (SELECT user_id, SUM(amount) AS total FROM old_rows GROUP BY user_id) o;
+    END IF;
+    PERFORM apply_net_worth_deltas(user_ids, array_fill(0::NUMERIC, ARRAY[cardinality(user_ids)]), deltas);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS net_worth_insert ON assets;
+CREATE TRIGGER net_worth_insert AFTER INSERT ON assets
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION net_worth_from_assets();
+DROP TRIGGER IF EXISTS net_worth_update ON assets;
+CREATE TRIGGER net_worth_update AFTER UPDATE ON assets
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION net_worth_from_assets();
+DROP TRIGGER IF EXISTS net_worth_delete ON assets;
+CREATE TRIGGER net_worth_delete AFTER DELETE ON assets
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION net_worth_from_assets();
+
+DROP TRIGGER IF EXISTS net_worth_insert ON debts;
+CREATE TRIGGER net_worth_insert AFTER INSERT ON debts
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION net_worth_from_debts();
+DROP TRIGGER IF EXISTS net_worth_update ON debts;
+CREATE TRIGGER net_worth_update AFTER UPDATE ON debts
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION net_worth_from_debts();
+DROP TRIGGER IF EXISTS net_worth_delete ON debts;
+CREATE TRIGGER net_worth_delete AFTER DELETE ON debts
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION net_worth_from_debts();
+
+-- Backfill today's row from the current assets and debts
+INSERT INTO net_worth_snapshots (user_id, day, total_assets, total_liabilities)
+SELECT user_id, CURRENT_DATE, SUM(asset_total), SUM(debt_total)
+FROM (
+    SELECT user_id, value AS asset_total, 0 AS debt_total FROM assets
+    UNION ALL
+    SELECT user_id, 0, amount FROM debts
+) t
+GROUP BY user_id
+ON CONFLICT (user_id, day) DO NOTHING;
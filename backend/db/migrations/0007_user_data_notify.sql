@@ -0,0 +1,22 @@
+-- Tells every backend worker whose data changed, so each can drop that user's cached reads
+-- (backend/notifier.py). The notification rides on the user_data_versions change that every
+-- write to expenses, income, budgets, assets and debts already makes (0003), which also
+-- covers the summary refresher and the net worth close.
+--
+-- NOTIFY is delivered when the writing transaction commits, never for a rolled back one,
+-- and a user_id notified more than once in a transaction is delivered once.
+
+CREATE OR REPLACE FUNCTION notify_user_data_changed() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('user_data_changed', changed.user_id::TEXT)
+    FROM (SELECT DISTINCT user_id FROM new_rows) changed;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS user_data_versions_notify_insert ON user_data_versions;
+CREATE TRIGGER user_data_versions_notify_insert AFTER INSERT ON user_data_versions
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_user_data_changed();
+DROP TRIGGER IF EXISTS user_data_versions_notify_update ON user_data_versions;
+CREATE TRIGGER user_data_versions_notify_update AFTER UPDATE ON user_data_versions
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_user_data_changed();
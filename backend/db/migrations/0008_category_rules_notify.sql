@@ -0,0 +1,30 @@
+-- Tells every backend worker whose category rules changed, so each can drop its compiled
+-- categorizer for that user (backend/categorizer.py, via backend/notifier.py). The payload is
+-- the rule's user_id, or '' for a global rule, which affects every user.
+--
+-- Like user_data_changed (0007), notifications are sent on commit and deduplicated per
+-- transaction.
+
+CREATE OR REPLACE FUNCTION notify_category_rules_changed() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM pg_notify('category_rules_changed', COALESCE(changed.user_id::TEXT, ''))
+        FROM (SELECT DISTINCT user_id FROM new_rows) changed;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM pg_notify('category_rules_changed', COALESCE(changed.user_id::TEXT, ''))
+        FROM (SELECT DISTINCT user_id FROM old_rows) changed;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS category_rules_notify_insert ON category_rules;
+CREATE TRIGGER category_rules_notify_insert AFTER INSERT ON category_rules
+REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_category_rules_changed();
+DROP TRIGGER IF EXISTS category_rules_notify_update ON category_rules;
+CREATE TRIGGER category_rules_notify_update AFTER UPDATE ON category_rules
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_category_rules_changed();
+DROP TRIGGER IF EXISTS category_rules_notify_delete ON category_rules;
+CREATE TRIGGER category_rules_notify_delete AFTER DELETE ON category_rules
+REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION notify_category_rules_changed();
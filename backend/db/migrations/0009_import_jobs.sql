@@ -0,0 +1,13 @@
+-- Statement import job reports (backend/importer.py JobStore). The worker running an import
+-- writes its report here as it goes, so GET /import/jobs/{job_id} can be answered by any
+-- worker. Reports are deleted once they are older than IMPORT_JOB_TTL.
+
+CREATE TABLE IF NOT EXISTS import_jobs (
+    id VARCHAR(32) PRIMARY KEY,
+    user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    status VARCHAR(10) NOT NULL,
+    report JSONB NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_import_jobs_updated_at ON import_jobs (updated_at);
@@ -0,0 +1,77 @@
+-- Expenses with an empty category belong to the 'Uncategorized' cell of expense_category_monthly,
+-- as they already do in cumulative_totals (0005). 0004 only mapped NULL there, so '' had a cell
+-- of its own. This replaces the trigger function and merges the existing '' cells.
+
+-- Writes to expenses wait until the merge below is committed together with the new function
+LOCK TABLE expenses IN SHARE ROW EXCLUSIVE MODE;
+
+CREATE OR REPLACE FUNCTION apply_expense_category_monthly_delta()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO expense_category_monthly AS m (user_id, year, month, category, total, expense_count)
+        SELECT user_id,
+               EXTRACT(YEAR FROM date)::INT,
+               EXTRACT(MONTH FROM date)::INT,
+               COALESCE(NULLIF(category, ''), 'Uncategorized'),
+               SUM(COALESCE(amount, 0)::NUMERIC),
+               COUNT(*)
+        FROM new_rows
+        WHERE user_id IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        ON CONFLICT (user_id, year, month, category)
+        DO UPDATE SET total = m.total + EXCLUDED.total,
+                      expense_count = m.expense_count + EXCLUDED.expense_count;
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- Old rows come out of their cells and new rows go into theirs; cells whose
+        -- amount and count net to zero (e.g. only the fingerprint changed) are left alone
+        INSERT INTO expense_category_monthly AS m (user_id, year, month, category, total, expense_count)
+        SELECT user_id, year, month, category, SUM(amount), SUM(n)
+        FROM (
+            SELECT user_id, EXTRACT(YEAR FROM date)::INT AS year, EXTRACT(MONTH FROM date)::INT AS month,
+                   COALESCE(NULLIF(category, ''), 'Uncategorized') AS category, COALESCE(amount, 0)::NUMERIC AS amount, 1 AS n
+            FROM new_rows
+            UNION ALL
+            SELECT user_id, EXTRACT(YEAR FROM date)::INT, EXTRACT(MONTH FROM date)::INT,
+                   COALESCE(NULLIF(category, ''), 'Uncategorized'), -COALESCE(amount, 0)::NUMERIC, -1
+            FROM old_rows
+        ) changes
+        WHERE user_id IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+        HAVING SUM(amount) <> 0 OR SUM(n) <> 0
+        ON CONFLICT (user_id, year, month, category)
+        DO UPDATE SET total = m.total + EXCLUDED.total,
+                      expense_count = m.expense_count + EXCLUDED.expense_count;
+    ELSE
+        UPDATE expense_category_monthly m
+        SET total = m.total - d.total,
+            expense_count = m.expense_count - d.expense_count
+        FROM (
+            SELECT user_id,
+                   EXTRACT(YEAR FROM date)::INT AS year,
+                   EXTRACT(MONTH FROM date)::INT AS month,
+                   COALESCE(NULLIF(category, ''), 'Uncategorized') AS category,
+                   SUM(COALESCE(amount, 0)::NUMERIC) AS total,
+                   COUNT(*) AS expense_count
+            FROM old_rows
+            GROUP BY 1, 2, 3, 4
+        ) d
+        WHERE m.user_id = d.user_id
+        AND m.year = d.year
+        AND m.month = d.month
+        AND m.category = d.category;
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+INSERT INTO expense_category_monthly AS m (user_id, year, month, category, total, expense_count)
+SELECT user_id, year, month, 'Uncategorized', total, expense_count
+FROM expense_category_monthly
+WHERE category = ''
+ON CONFLICT (user_id, year, month, category)
+DO UPDATE SET total = m.total + EXCLUDED.total,
+              expense_count = m.expense_count + EXCLUDED.expense_count;
+
+DELETE FROM expense_category_monthly WHERE category = '';
@@ -90,5 +90,5 @@ $$;
 
 
 
--- Run in command line to apply to db
---psql -U your_username -d db_name -a -f backend/db/procedures.sql
\ No newline at end of file
+-- Applied (and re-applied whenever this file changes) by the migration runner:
+-- python -m backend.migrate
@@ -34,27 +34,28 @@
 
 
 
--- This trigger is fired when an income is deleted
--- The income in the income table is deleted, and the total_income in income_expense_summary table 
--- is reduced by <income> amount
+-- These triggers keep income_expense_summary in sync with the income and expenses tables.
+-- Every write applies an exact +/- delta to the affected (user_id, year, month) rows:
+--   INSERT : adds NEW.amount to NEW's month
+--   UPDATE : subtracts OLD.amount from OLD's month and adds NEW.amount to NEW's month,
+--            which also covers rows moved to another month or another user
+--   DELETE : runs once per statement and subtracts the deleted rows grouped by month,
+--            so deleting thousands of rows costs one UPDATE instead of one per row
+-- populate_income_expense_summary() is only needed once, to backfill existing data.
 
 CREATE OR REPLACE FUNCTION update_income_summary()
 RETURNS TRIGGER AS $$
 BEGIN
-    -- Adjust total income on INSERT or UPDATE
-    -- INSERT INTO income_expense_summary (user_id, year, month, total_income)
-    -- VALUES (
-    --     NEW.user_id,
-    --     EXTRACT(YEAR FROM NEW.date)::INT,
-    --     EXTRACT(MONTH FROM NEW.date)::INT,
-    --     NEW.amount
-    -- )
-    -- ON CONFLICT (user_id, year, month)
-    -- DO UPDATE SET total_income = income_expense_summary.total_income 
-    --                - COALESCE(OLD.amount, 0) + NEW.amount;
-
-    -- Adjust total income on DELETE
-    IF TG_OP = 'DELETE' THEN
+    -- Nothing the summary depends on has changed
+    IF TG_OP = 'UPDATE'
+       AND NEW.user_id IS NOT DISTINCT FROM OLD.user_id
+       AND NEW.date IS NOT DISTINCT FROM OLD.date
+       AND NEW.amount IS NOT DISTINCT FROM OLD.amount THEN
+        RETURN NULL;
+    END IF;
+
+    -- Take the old amount out of its month on UPDATE
+    IF TG_OP = 'UPDATE' THEN
         UPDATE income_expense_summary
         SET total_income = total_income - COALESCE(OLD.amount, 0)
         WHERE user_id = OLD.user_id 
@@ -62,36 +63,69 @@ BEGIN
         AND month = EXTRACT(MONTH FROM OLD.date)::INT;
     END IF;
 
-
-    RETURN NEW;
+    -- Put the new amount into its month
+    INSERT INTO income_expense_summary (user_id, year, month, total_income, total_expenses)
+    VALUES (
+        NEW.user_id,
+        EXTRACT(YEAR FROM NEW.date)::INT,
+        EXTRACT(MONTH FROM NEW.date)::INT,
+        COALESCE(NEW.amount, 0),
+        0
+    )
+    ON CONFLICT (user_id, year, month)
+    DO UPDATE SET total_income = income_expense_summary.total_income + EXCLUDED.total_income;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trigger_update_income_summary ON income;
 CREATE TRIGGER trigger_update_income_summary
-AFTER INSERT OR UPDATE OR DELETE ON income
+AFTER INSERT OR UPDATE ON income
 FOR EACH ROW EXECUTE FUNCTION update_income_summary();
 
 
--- This trigger is fired when an expense is deleted
--- The expense in the expense table is deleted, and the total_expense in income_expense_summary table 
--- is reduced by <expense> amount
+CREATE OR REPLACE FUNCTION subtract_deleted_income_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE income_expense_summary s
+    SET total_income = s.total_income - d.amount
+    FROM (
+        SELECT user_id,
+               EXTRACT(YEAR FROM date)::INT AS year,
+               EXTRACT(MONTH FROM date)::INT AS month,
+               SUM(COALESCE(amount, 0)) AS amount
+        FROM deleted_rows
+        GROUP BY 1, 2, 3
+    ) d
+    WHERE s.user_id = d.user_id
+    AND s.year = d.year
+    AND s.month = d.month;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_subtract_deleted_income_summary ON income;
+CREATE TRIGGER trigger_subtract_deleted_income_summary
+AFTER DELETE ON income
+REFERENCING OLD TABLE AS deleted_rows
+FOR EACH STATEMENT EXECUTE FUNCTION subtract_deleted_income_summary();
+
+
 CREATE OR REPLACE FUNCTION update_expense_summary()
 RETURNS TRIGGER AS $$
 BEGIN
-    -- Adjust total expenses on INSERT or UPDATE
-    -- INSERT INTO income_expense_summary (user_id, year, month, total_expenses)
-    -- VALUES (
-    --     NEW.user_id,
-    --     EXTRACT(YEAR FROM NEW.date)::INT,
-    --     EXTRACT(MONTH FROM NEW.date)::INT,
-    --     NEW.amount
-    -- )
-    -- ON CONFLICT (user_id, year, month)
-    -- DO UPDATE SET total_expenses = income_expense_summary.total_expenses 
-    --                - COALESCE(OLD.amount, 0) + NEW.amount;
-
-    -- Adjust total expenses on DELETE
-    IF TG_OP = 'DELETE' THEN
+    -- Nothing the summary depends on has changed
+    IF TG_OP = 'UPDATE'
+       AND NEW.user_id IS NOT DISTINCT FROM OLD.user_id
+       AND NEW.date IS NOT DISTINCT FROM OLD.date
+       AND NEW.amount IS NOT DISTINCT FROM OLD.amount THEN
+        RETURN NULL;
+    END IF;
+
+    -- Take the old amount out of its month on UPDATE
+    IF TG_OP = 'UPDATE' THEN
         UPDATE income_expense_summary
         SET total_expenses = total_expenses - COALESCE(OLD.amount, 0)
         WHERE user_id = OLD.user_id 
@@ -99,15 +133,56 @@ BEGIN
         AND month = EXTRACT(MONTH FROM OLD.date)::INT;
     END IF;
 
-    RETURN NEW;
+    -- Put the new amount into its month
+    INSERT INTO income_expense_summary (user_id, year, month, total_income, total_expenses)
+    VALUES (
+        NEW.user_id,
+        EXTRACT(YEAR FROM NEW.date)::INT,
+        EXTRACT(MONTH FROM NEW.date)::INT,
+        0,
+        COALESCE(NEW.amount, 0)
+    )
+    ON CONFLICT (user_id, year, month)
+    DO UPDATE SET total_expenses = income_expense_summary.total_expenses + EXCLUDED.total_expenses;
+
+    RETURN NULL;
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS trigger_update_expense_summary ON expenses;
 CREATE TRIGGER trigger_update_expense_summary
-AFTER INSERT OR UPDATE OR DELETE ON expenses
+AFTER INSERT OR UPDATE ON expenses
 FOR EACH ROW EXECUTE FUNCTION update_expense_summary();
 
 
+CREATE OR REPLACE FUNCTION subtract_deleted_expense_summary()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE income_expense_summary s
+    SET total_expenses = s.total_expenses - d.amount
+    FROM (
+        SELECT user_id,
+               EXTRACT(YEAR FROM date)::INT AS year,
+               EXTRACT(MONTH FROM date)::INT AS month,
+               SUM(COALESCE(amount, 0)) AS amount
+        FROM deleted_rows
+        GROUP BY 1, 2, 3
+    ) d
+    WHERE s.user_id = d.user_id
+    AND s.year = d.year
+    AND s.month = d.month;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_subtract_deleted_expense_summary ON expenses;
+CREATE TRIGGER trigger_subtract_deleted_expense_summary
+AFTER DELETE ON expenses
+REFERENCING OLD TABLE AS deleted_rows
+FOR EACH STATEMENT EXECUTE FUNCTION subtract_deleted_expense_summary();
+
+
 
 CREATE OR REPLACE FUNCTION prevent_negative_assets()
 RETURNS TRIGGER AS $$
@@ -119,11 +194,12 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+DROP TRIGGER IF EXISTS check_negative_assets ON assets;
 CREATE TRIGGER check_negative_assets
 BEFORE INSERT OR UPDATE ON assets
 FOR EACH ROW EXECUTE FUNCTION prevent_negative_assets();
 
 
 
--- run the following in the command line to apply triggers.sql to the db
--- psql -U your_username -d db_name -a -f backend/db/triggers.sql
+-- Applied (and re-applied whenever this file changes) by the migration runner:
+-- python -m backend.migrate
@@ -1,27 +1,28 @@
-
+-- All users' summaries. Each user's totals are LATERAL subqueries correlated on u.id, so
+-- "WHERE user_id = ..." filters users first and then reads just that user's rows through
+-- the (user_id, date, id) indexes, instead of grouping every user's income and expenses.
+-- The API reads get_user_financial_summary() in functions.sql, which also has the savings fields.
 CREATE OR REPLACE VIEW financial_summary AS
 SELECT 
     u.id AS user_id,
     u.username,
-    COALESCE(i.total_income, 0) AS total_income,
-    COALESCE(e.total_expenses, 0) AS total_expenses,
-    COALESCE(i.total_income, 0) - COALESCE(e.total_expenses, 0) AS net_savings
+    i.total_income,
+    e.total_expenses,
+    i.total_income - e.total_expenses AS net_savings
 FROM users u
-LEFT JOIN (
-    -- Compute total income per user
-    SELECT user_id, SUM(amount) AS total_income 
-    FROM income 
-    GROUP BY user_id
-) i ON u.id = i.user_id
-LEFT JOIN (
-    -- Compute total expenses per user
-    SELECT user_id, SUM(amount) AS total_expenses 
-    FROM expenses 
-    GROUP BY user_id
-) e ON u.id = e.user_id;
+CROSS JOIN LATERAL (
+    SELECT COALESCE(SUM(amount), 0) AS total_income
+    FROM income
+    WHERE income.user_id = u.id
+) i
+CROSS JOIN LATERAL (
+    SELECT COALESCE(SUM(amount), 0) AS total_expenses
+    FROM expenses
+    WHERE expenses.user_id = u.id
+) e;
 
 
 
 
--- run the following to apply this view to the database
--- psql -U <your_username> -d <name_of_db> -a -f backend/db/views.sql
+-- Applied (and re-applied whenever this file changes) by the migration runner:
+-- python -m backend.migrate
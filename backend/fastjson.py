@@ -0,0 +1,24 @@
+from decimal import Decimal
+
+import orjson
+from starlette.responses import JSONResponse
+
+# orjson handles str/int/float/bool/None, dicts, lists, dates and datetimes natively;
+# NUMERIC columns come back as Decimal, which the app has always sent as a JSON number.
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson. Bytes are taken as already rendered JSON."""
+
+    def render(self, content) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -0,0 +1,451 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Number of parsed rows sent to PostgreSQL per COPY
+CHUNK_SIZE = 5000
+# Only the first rejected (or duplicate) lines are kept on the job; the counts cover all of them
+MAX_REJECTED_REPORTED = 1000
+# Seconds a job report is kept after its last update
+DEFAULT_JOB_TTL = float(os.getenv("IMPORT_JOB_TTL", str(7 * 24 * 3600)))
+
+# CSV header names mapped onto the fields we need. "amount" is signed:
+# negative amounts are expenses and positive amounts are income.
+DEFAULT_CSV_COLUMNS = {
+    "date": "Date",
+    "amount": "Amount",
+    "description": "Description",
+    "category": "Category",
+}
+
+DEFAULT_DATE_FORMAT = "%Y-%m-%d"
+
+
+# --------------------------
+# Import jobs
+# --------------------------
+
+class ImportJob:
+    def __init__(self, user_id: int, filename: str):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.filename = filename
+        self.status = "pending"
+        self.error = None
+        self.rows_read = 0
+        self.rows_staged = 0
+        self.rows_rejected = 0
+        self.rows_categorized = 0
+        self.rows_duplicate = 0
+        self.expenses_inserted = 0
+        self.income_inserted = 0
+        self.rejected = []
+        self.duplicates = []
+        self.started_at = None
+        self.finished_at = None
+
+    def reject(self, line: int, error: str):
+        self.rows_rejected += 1
+        if len(self.rejected) < MAX_REJECTED_REPORTED:
+            self.rejected.append({"line": line, "error": error})
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def to_dict(self, include_rejected: bool = True):
+        elapsed = self.elapsed()
+        result = {
+            "job_id": self.id,
+            "user_id": self.user_id,
+            "filename": self.filename,
+            "status": self.status,
+            "error": self.error,
+            "rows_read": self.rows_read,
+            "rows_staged": self.rows_staged,
+            "rows_rejected": self.rows_rejected,
+            "rows_categorized": self.rows_categorized,
+            "rows_duplicate": self.rows_duplicate,
+            "expenses_inserted": self.expenses_inserted,
+            "income_inserted": self.income_inserted,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_sec": round(self.rows_read / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        if include_rejected:
+            result["rejected"] = list(self.rejected)
+            result["duplicates"] = list(self.duplicates)
+        return result
+
+
+class JobStore:
+    """Job reports in the import_jobs table (db/migrations/0009_import_jobs.sql).
+
+    A job is only held in memory by the worker running it; everyone else, including the other
+    workers, reads its last saved report. Reports older than ttl seconds are deleted whenever
+    a new job is created.
+    """
+
+    def __init__(self, engine, ttl: float = DEFAULT_JOB_TTL):
+        self.engine = engine
+        self.ttl = ttl
+
+    def create(self, user_id: int, filename: str):
+        job = ImportJob(user_id, filename)
+        with self.engine.begin() as connection:
+            connection.execute(text("DELETE FROM import_jobs WHERE updated_at < now() - make_interval(secs => :ttl)"),
+                               {"ttl": self.ttl})
+            connection.execute(text("""
+                INSERT INTO import_jobs (id, user_id, status, report)
+                VALUES (:id, :user_id, :status, CAST(:report AS JSONB))
+            """), {"id": job.id, "user_id": user_id, "status": job.status, "report": self._dump(job)})
+        return job
+
+    def save(self, job: ImportJob):
+        # Progress reporting must not fail the import itself
+        try:
+            with self.engine.begin() as connection:
+                connection.execute(text("""
+                    UPDATE import_jobs SET status = :status, report = CAST(:report AS JSONB), updated_at = now()
+                    WHERE id = :id
+                """), {"id": job.id, "status": job.status, "report": self._dump(job)})
+        except Exception as e:
+            logger.error(f"Saving import job {job.id} failed: {str(e)}")
+
+    def get(self, job_id: str):
+        with self.engine.connect() as connection:
+            return connection.execute(text("SELECT report FROM import_jobs WHERE id = :id"), {"id": job_id}).scalar()
+
+    @staticmethod
+    def _dump(job: ImportJob):
+        return json.dumps(job.to_dict(), default=str)
+
+
+# --------------------------
+# Parsers
+# --------------------------
+# Both parsers are generators over an open text stream, so only the current line (CSV)
+# or the current read buffer (OFX) is held in memory. They yield
+# (line, record, error) where record is (date, amount, description, category).
+
+def parse_amount(value: str):
+    cleaned = value.strip().replace(",", "").replace("$", "")
+    # Accounting style negatives: (12.34)
+    if cleaned.startswith("(") and cleaned.endswith(")"):
+        cleaned = "-" + cleaned[1:-1]
+    return Decimal(cleaned)
+
+
+def parse_csv(stream, columns: dict = None, date_format: str = DEFAULT_DATE_FORMAT):
+    columns = {**DEFAULT_CSV_COLUMNS, **(columns or {})}
+    reader = csv.DictReader(stream)
+
+    missing = [columns[field] for field in ("date", "amount", "description")
+               if columns[field] not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV is missing required columns: {', '.join(missing)}")
+
+    for row in reader:
+        line = reader.line_num
+        try:
+            txn_date = datetime.strptime(row[columns["date"]].strip(), date_format).date()
+            amount = parse_amount(row[columns["amount"]])
+            description = (row[columns["description"]] or "").strip()
+            category = (row.get(columns["category"]) or "").strip() or None
+        except (ValueError, InvalidOperation, AttributeError) as e:
+            yield line, None, f"{type(e).__name__}: {e}"
+            continue
+        yield line, (txn_date, amount, description, category), None
+
+
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<]*)")
+
+def parse_ofx(stream, read_size: int = 64 * 1024):
+    # OFX 1.x is SGML (leaf tags are often left unclosed), so instead of an XML parser this
+    # tokenizes <TAG>value pairs from a rolling buffer and collects one <STMTTRN> at a time.
+    buffer = ""
+    current = None
+    index = 0
+
+    while True:
+        chunk = stream.read(read_size)
+        buffer += chunk
+        # Keep a possibly incomplete trailing tag for the next read
+        cut = len(buffer) if not chunk else buffer.rfind("<")
+        if cut == -1:
+            # No tag has started yet (e.g. the OFXHEADER block)
+            buffer = ""
+            continue
+        if cut == 0 and chunk:
+            continue
+
+        for match in OFX_TAG.finditer(buffer, 0, cut):
+            closing, tag, value = match.group(1), match.group(2).upper(), match.group(3).strip()
+            if tag == "STMTTRN":
+                if not closing:
+                    index += 1
+                    current = {}
+                elif current is not None:
+                    yield (index,) + _ofx_record(current)
+                    current = None
+            elif current is not None and not closing and value:
+                current[tag] = value
+
+        buffer = buffer[cut:]
+        if not chunk:
+            break
+
+
+def _ofx_record(fields: dict):
+    try:
+        # DTPOSTED looks like 20240131, 20240131120000 or 20240131120000.000[-5:EST]
+        txn_date = datetime.strptime(fields["DTPOSTED"][:8], "%Y%m%d").date()
+        amount = parse_amount(fields["TRNAMT"])
+    except (KeyError, ValueError, InvalidOperation) as e:
+        return None, f"{type(e).__name__}: {e}"
+    description = fields.get("NAME") or fields.get("MEMO") or ""
+    return (txn_date, amount, description, None), None
+
+
+# --------------------------
+# Duplicate detection
+# --------------------------
+
+NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+def normalize_description(description: str):
+    # Case, punctuation and spacing differ between exports of the same statement
+    return NON_ALNUM.sub(" ", (description or "").lower()).strip()
+
+
+def fingerprint(txn_date, amount, description: str, ordinal: int = 0):
+    """Stable id for an imported transaction; stored per user under a unique index.
+
+    ordinal numbers identical (date, amount, description) rows within one file, so two real
+    coffees on the same day stay two rows while importing the same file again adds nothing.
+    """
+    key = f"{txn_date.isoformat()}|{amount:.2f}|{normalize_description(description)}|{ordinal}"
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+
+# --------------------------
+# Loading
+# --------------------------
+
+STAGING_DDL = """
+    CREATE TEMP TABLE import_staging (
+        line_no INT NOT NULL,
+        kind TEXT NOT NULL,
+        label TEXT,
+        amount NUMERIC NOT NULL,
+        date DATE NOT NULL,
+        fingerprint TEXT NOT NULL
+    ) ON COMMIT DROP
+"""
+
+# One set-based statement moves every staged row into expenses and income. Rows whose
+# fingerprint the user already has are dropped by the unique index (one probe per row);
+# those lines come back as the skipped duplicates.
+MERGE_SQL = """
+    WITH inserted_expenses AS (
+        INSERT INTO expenses (user_id, category, amount, date, fingerprint)
+        SELECT %(user_id)s, label, amount, date, fingerprint
+        FROM import_staging
+        WHERE kind = 'expense'
+        ON CONFLICT (user_id, fingerprint) WHERE fingerprint IS NOT NULL DO NOTHING
+        RETURNING fingerprint
+    ),
+    inserted_income AS (
+        INSERT INTO income (user_id, source, amount, date, fingerprint)
+        SELECT %(user_id)s, label, amount, date, fingerprint
+        FROM import_staging
+        WHERE kind = 'income'
+        ON CONFLICT (user_id, fingerprint) WHERE fingerprint IS NOT NULL DO NOTHING
+        RETURNING fingerprint
+    ),
+    skipped AS (
+        SELECT s.line_no, s.kind, s.label, s.amount, s.date
+        FROM import_staging s
+        WHERE NOT EXISTS (SELECT 1 FROM inserted_expenses i WHERE i.fingerprint = s.fingerprint)
+        AND NOT EXISTS (SELECT 1 FROM inserted_income i WHERE i.fingerprint = s.fingerprint)
+    )
+    SELECT
+        (SELECT COUNT(*) FROM inserted_expenses),
+        (SELECT COUNT(*) FROM inserted_income),
+        (SELECT COUNT(*) FROM skipped),
+        (SELECT json_agg(reported ORDER BY line_no)
+         FROM (SELECT * FROM skipped ORDER BY line_no LIMIT %(max_reported)s) reported)
+"""
+
+
+def _copy_chunk(cursor, rows):
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    buf.seek(0)
+    cursor.copy_expert("COPY import_staging (line_no, kind, label, amount, date, fingerprint) "
+                       "FROM STDIN WITH (FORMAT csv)", buf)
+
+
+def run_import(engine, job: ImportJob, records, categorizer=None, on_progress=None):
+    """Stream parsed records into a staging table with COPY and merge them in one transaction.
+
+    Expenses without a category in the file are labelled by categorizer (a
+    categorizer.Categorizer) when one is given, falling back to the raw description.
+    on_progress(job) is called after every chunk and status change, e.g. JobStore.save.
+    """
+    def progress():
+        if on_progress:
+            on_progress(job)
+
+    job.status = "running"
+    job.started_at = time.monotonic()
+    progress()
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(STAGING_DDL)
+
+        chunk = []
+        # (date, amount, description) -> occurrences so far in this file, for the fingerprint ordinal
+        seen = {}
+        for line, record, error in records:
+            job.rows_read += 1
+            if error:
+                job.reject(line, error)
+                continue
+
+            txn_date, amount, description, category = record
+            if amount == 0:
+                job.reject(line, "Zero amount")
+                continue
+
+            key = (txn_date, amount, normalize_description(description))
+            ordinal = seen.get(key, 0)
+            seen[key] = ordinal + 1
+            row_fingerprint = fingerprint(txn_date, amount, description, ordinal)
+
+            if amount < 0:
+                if not category and categorizer:
+                    category = categorizer.classify_category(description)
+                    if category:
+                        job.rows_categorized += 1
+                chunk.append((line, "expense", category or description, -amount, txn_date, row_fingerprint))
+            else:
+                chunk.append((line, "income", description, amount, txn_date, row_fingerprint))
+
+            if len(chunk) >= CHUNK_SIZE:
+                _copy_chunk(cursor, chunk)
+                job.rows_staged += len(chunk)
+                chunk = []
+                progress()
+
+        if chunk:
+            _copy_chunk(cursor, chunk)
+            job.rows_staged += len(chunk)
+
+        job.status = "merging"
+        progress()
+        cursor.execute(MERGE_SQL, {"user_id": job.user_id, "max_reported": MAX_REJECTED_REPORTED})
+        job.expenses_inserted, job.income_inserted, job.rows_duplicate, duplicates = cursor.fetchone()
+        job.duplicates = [
+            {"line": row["line_no"], "kind": row["kind"], "label": row["label"],
+             "amount": row["amount"], "date": row["date"]}
+            for row in duplicates or []
+        ]
+        connection.commit()
+        job.status = "completed"
+    except Exception as e:
+        connection.rollback()
+        job.status = "failed"
+        job.error = str(e)
+        logger.error(f"Import {job.id} failed: {str(e)}")
+    finally:
+        job.finished_at = time.monotonic()
+        connection.close()
+        progress()
+    return job
+
+
+def detect_format(filename: str):
+    return "ofx" if filename.lower().endswith((".ofx", ".qfx")) else "csv"
+
+
+def import_file(engine, job: ImportJob, path: str, file_format: str = None,
+                columns: dict = None, date_format: str = DEFAULT_DATE_FORMAT, categorizer=None, on_progress=None):
+    file_format = file_format or detect_format(path)
+    with open(path, encoding="utf-8-sig", errors="replace", newline="") as stream:
+        if file_format == "ofx":
+            records = parse_ofx(stream)
+        else:
+            records = parse_csv(stream, columns=columns, date_format=date_format)
+        return run_import(engine, job, records, categorizer=categorizer, on_progress=on_progress)
+
+
+# --------------------------
+# CLI
+# --------------------------
+# python -m backend.importer statement.csv --user-id 1
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a CSV or OFX bank statement into expenses/income")
+    parser.add_argument("path")
+    parser.add_argument("--user-id", type=int, required=True)
+    parser.add_argument("--format", choices=["csv", "ofx"], default=None)
+    parser.add_argument("--date-format", default=DEFAULT_DATE_FORMAT)
+    for field, header in DEFAULT_CSV_COLUMNS.items():
+        parser.add_argument(f"--{field}-column", default=header)
+    args = parser.parse_args()
+
+    from backend.database import engine, SessionLocal
+    from backend.categorizer import get_categorizer
+
+    db = SessionLocal()
+    try:
+        categorizer = get_categorizer(db, args.user_id)
+    finally:
+        db.close()
+
+    columns = {field: getattr(args, f"{field}_column") for field in DEFAULT_CSV_COLUMNS}
+    job = ImportJob(args.user_id, args.path)
+
+    worker = threading.Thread(
+        target=import_file,
+        args=(engine, job, args.path, args.format, columns, args.date_format, categorizer),
+    )
+    worker.start()
+    while worker.is_alive():
+        worker.join(timeout=1.0)
+        print(f"\r{job.status}: {job.rows_read} rows read, {job.rows_rejected} rejected, "
+              f"{job.to_dict(include_rejected=False)['rows_per_sec']} rows/sec", end="", flush=True)
+    print()
+
+    report = job.to_dict()
+    for rejected in report["rejected"]:
+        print(f"  line {rejected['line']}: {rejected['error']}")
+    for duplicate in report["duplicates"]:
+        print(f"  line {duplicate['line']}: duplicate {duplicate['kind']} {duplicate['date']} "
+              f"{duplicate['amount']} {duplicate['label']}")
+    print(f"{report['status']}: {report['expenses_inserted']} expenses, {report['income_inserted']} income, "
+          f"{report['rows_rejected']} rejected, {report['rows_duplicate']} duplicates skipped, "
+          f"{report['rows_categorized']} auto-categorized "
+          f"in {report['elapsed_seconds']}s")
+    if report["error"]:
+        print(f"error: {report['error']}")
+
+
+if __name__ == "__main__":
+    main()
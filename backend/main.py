@@ -1,16 +1,31 @@
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Body, Query, UploadFile, File, BackgroundTasks, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func,text
 from backend.models import Income,Expense
-from pydantic import BaseModel
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel, ValidationError, validator
 from psycopg2.errors import RaiseException
 from sqlalchemy.exc import IntegrityError
 # from passlib.context import CryptContext
 # from typing import Optional
 import crud
-from database import SessionLocal, engine
+import importer
+from refresher import SummaryRefresher
+from cache import ReadCache
+import recurring
+import networth
+import categorizer
+import notifier
+import fastjson
+from database import SessionLocal, engine, replica_router
+from async_db import AsyncDB, get_async_db
+from poolstats import pool_stats
 from datetime import date
+from typing import Any, Dict, List, Optional
 import logging
+import os
+import shutil
+import tempfile
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,6 +42,139 @@ def get_db():
     finally:
         db.close()
 
+# The per-user GET routes are async and use get_async_db (backend/async_db.py) instead, so a
+# slow query does not hold one of the threadpool's workers
+
+# Derived per-user summaries are refreshed in the background, once per dirty user per window
+summary_refresher = SummaryRefresher(SessionLocal)
+
+# Seconds a read-your-writes request (?wait=true) waits for the deferred refresh
+REFRESH_WAIT_TIMEOUT = 10.0
+
+# Per-user read endpoints are served from memory until the user writes or the entry expires
+read_cache = ReadCache()
+
+async def cached_read(endpoint: str, user_id: int, version: int, loader, *params):
+    """Return the JSON-ready result of awaiting loader(), cached under (endpoint, user_id, version, *params).
+
+    Keying on the data version means an entry can never outlive a write, including writes
+    made through another process that this one's invalidate_user() calls never saw.
+    """
+    async def load():
+        return jsonable_encoder(await loader())
+    return await read_cache.get_or_load_async((endpoint, user_id, version) + params, user_id, load)
+
+async def cached_json(request: Request, endpoint: str, user_id: int, version: int, loader, *params):
+    """Like cached_read, but the entry is the rendered JSON body, sent as-is on every hit."""
+    async def load():
+        return fastjson.dumps(await loader())
+    body = await read_cache.get_or_load_async((endpoint, user_id, version) + params, user_id, load)
+    return json_response(request, body)
+
+def json_response(request: Request, content):
+    """Serialize with orjson instead of jsonable_encoder + json.dumps.
+
+    FastAPI only copies headers set on an injected Response into responses it builds itself,
+    so the ETag headers data_version left on request.state are passed on here.
+    """
+    return fastjson.FastJSONResponse(content, headers=getattr(request.state, "etag_headers", None))
+
+def record_write(user_id: int):
+    """Call once a write for the user has committed: drops their cached reads and keeps their
+    next reads on the primary until the replicas have caught up (backend/replicas.py)."""
+    read_cache.invalidate_user(user_id)
+    replica_router.record_write(user_id)
+
+def etag_matches(if_none_match: Optional[str], etag: str):
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Proxies may weaken our tags (W/"...")
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+class NotModified(Exception):
+    """Raised by data_version when the client's copy is current; answered by not_modified()."""
+
+    def __init__(self, headers: dict):
+        self.headers = headers
+
+@app.exception_handler(NotModified)
+async def not_modified(request: Request, exc: NotModified):
+    # HTTPException would send its {"detail": ...} JSON body, and a 304 must not have one
+    return Response(status_code=304, headers=exc.headers)
+
+async def data_version(user_id: int, request: Request, response: Response, db: AsyncDB = Depends(get_async_db)):
+    """Dependency for per-user reads: the user's data version, also sent as the ETag.
+
+    One primary key lookup. When If-None-Match already holds the current tag the request is
+    answered 304 here, before the endpoint runs its query. The version is read before the
+    data, so a write landing in between can only leave the body newer than its tag, which
+    costs the client one extra full response on its next poll, never a stale one.
+    """
+    version = await db.run(crud.get_user_data_version, user_id)
+    # The endpoint shares this session (FastAPI caches dependencies per request). Ending the
+    # lookup's transaction lets it start its own, e.g. the dashboard's REPEATABLE READ snapshot.
+    await db.rollback()
+    etag = f'"{user_id}-{version}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise NotModified(headers)
+    response.headers.update(headers)
+    request.state.etag_headers = headers
+    return version
+
+# Materializes due recurring income/expenses for all users on an interval. A run can touch
+# any number of users, so it drops the whole read cache.
+recurring_scheduler = recurring.RecurringScheduler(SessionLocal, on_materialized=lambda report: read_cache.clear())
+
+# Carries every user's net worth forward into the current day (see backend/networth.py)
+net_worth_closer = networth.NetWorthCloser(SessionLocal)
+
+# Hears about every committed write, whichever worker or process made it (see backend/notifier.py),
+# so this worker drops the user's cached reads and sends their next reads to the primary, and
+# about category rule changes, so it recompiles that user's categorizer. After the connection
+# is re-established both caches go, since notifications may have been missed.
+def clear_caches():
+    read_cache.clear()
+    categorizer.invalidate()
+
+change_listener = notifier.ChangeListener(engine, on_change=record_write, on_reconnect=clear_caches,
+                                          on_rules_change=categorizer.invalidate)
+
+@app.on_event("startup")
+def start_background_workers():
+    summary_refresher.start()
+    replica_router.start()
+    if os.getenv("RECURRING_SCHEDULER", "1") == "1":
+        recurring_scheduler.start()
+    if os.getenv("NET_WORTH_CLOSER", "1") == "1":
+        net_worth_closer.start()
+    if os.getenv("CHANGE_LISTENER", "1") == "1":
+        change_listener.start()
+
+@app.on_event("shutdown")
+def stop_background_workers():
+    change_listener.stop()
+    replica_router.stop()
+    net_worth_closer.stop()
+    recurring_scheduler.stop()
+    summary_refresher.stop()
+
+@app.on_event("shutdown")
+async def close_async_engines():
+    for target in [replica_router.primary] + replica_router.replicas:
+        if target.async_engine is not None:
+            await target.async_engine.dispose()
+
+def schedule_refresh(user_id: int, wait: bool = False):
+    """Mark the user's summaries dirty. With wait=True, block until the refresh has run and
+    return whether it succeeded (False on failure or time-out)."""
+    pending = summary_refresher.mark_dirty(user_id)
+    if wait:
+        return pending.wait(REFRESH_WAIT_TIMEOUT)
+    return False
+
 # # Password hashing setup
 # pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # SECRET_KEY = "your-secret-key-here"  # Replace with a secure key
@@ -46,6 +194,41 @@ class IncomeCreate(BaseModel):
     amount: float
     date : date
 
+class TransactionDelete(BaseModel):
+    # Delete by explicit ids and/or by range; at least one filter is required
+    ids: Optional[List[int]] = None
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None  # inclusive
+    category: Optional[str] = None  # matched against source for income
+
+    def has_filter(self):
+        return bool(self.ids) or any(v is not None for v in (self.start_date, self.end_date, self.category))
+
+class RecurringRuleCreate(BaseModel):
+    kind: str  # 'expense' or 'income'
+    label: str  # category for expenses, source for income
+    amount: float
+    frequency: str  # 'weekly', 'monthly' or 'yearly'
+    start_date: date
+    end_date: Optional[date] = None  # inclusive
+
+    @validator("end_date")
+    def end_not_before_start(cls, end_date, values):
+        if end_date is not None and "start_date" in values and end_date < values["start_date"]:
+            raise ValueError("end_date must not be before start_date")
+        return end_date
+
+class CategoryRuleCreate(BaseModel):
+    user_id: Optional[int] = None  # None creates a global rule
+    pattern: str
+    match_type: str  # 'substring', 'prefix' or 'regex'
+    category: str
+    priority: int = 100  # lower wins
+
+class CategorizeRequest(BaseModel):
+    user_id: Optional[int] = None  # None uses only the global rules
+    descriptions: List[str]
+
 class BudgetCreate(BaseModel):
     category: str
     budget_amount: float
@@ -64,6 +247,55 @@ class AssetCreate(BaseModel):
     date_added: date
 
 
+# Upper bound on rows accepted by one bulk request
+MAX_BULK_ROWS = 10000
+
+def validate_bulk_rows(rows: List[Dict[str, Any]], model):
+    """Validate every row in one pass. Returns (valid_rows, errors) so bad rows don't abort the batch."""
+    valid_rows = []
+    errors = []
+    for index, row in enumerate(rows):
+        try:
+            valid_rows.append(model.parse_obj(row).dict())
+        except ValidationError as e:
+            errors.append({"index": index, "errors": e.errors()})
+    return valid_rows, errors
+
+def fill_categories(db: Session, user_id: int, rows: List[Dict[str, Any]]):
+    """Categorize rows that have a description but no category, using the user's rules."""
+    rule_set = categorizer.get_categorizer(db, user_id)
+    for row in rows:
+        if isinstance(row, dict) and not row.get("category") and row.get("description"):
+            row["category"] = rule_set.classify_category(row["description"], default=row["description"])
+
+
+# List endpoints return one page at a time: {"items": [...], "next_cursor": "..."}.
+# Pass next_cursor back as ?cursor= to get the following page; it is null on the last page.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+class PageParams:
+    def __init__(self, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE), cursor: Optional[str] = None,
+                 start_date: Optional[date] = None, end_date: Optional[date] = None,
+                 min_amount: Optional[float] = None, max_amount: Optional[float] = None):
+        self.limit = limit
+        self.cursor = cursor
+        self.start_date = start_date
+        self.end_date = end_date  # inclusive
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+
+    def filters(self):
+        return dict(vars(self))
+
+def page_response(page):
+    items, next_cursor = page
+    return {"items": items, "next_cursor": next_cursor}
+
+async def load_page(db: AsyncDB, page_fn, **kwargs):
+    return page_response(await db.run(page_fn, **kwargs))
+
+
 # Pydantic model for login requests
 class LoginRequest(BaseModel):
     username: str
@@ -96,68 +328,181 @@ def login(request: LoginRequest, db: Session = Depends(get_db)):
 # --------------------------
 
 @app.post("/add-expense/{user_id}", status_code=201)
-def add_expense(user_id: int, expense: ExpenseCreate, db: Session = Depends(get_db)):
+def add_expense(user_id: int, expense: ExpenseCreate, wait: bool = False, db: Session = Depends(get_db)):
     try:
-        new_expense = crud.add_expense_db(db=db, user_id=user_id, category=expense.category, amount=expense.amount, date=expense.date)
-        
-        # Call the function to update the summary
-        db.execute(text("SELECT populate_income_expense_summary(:user_id)"), {"user_id": user_id})
+        new_expense = crud.add_expense_db(db=db, user_id=user_id, category=expense.category, amount=expense.amount, date=expense.date, commit=False)
+        aggregates = crud.get_transaction_aggregates(db, user_id, [expense.date], categories=[expense.category])
         db.commit()
+        record_write(user_id)
+        refreshed = schedule_refresh(user_id, wait)
 
-        return {"message": "Expense added successfully", "expense_id": new_expense.id}
+        return {"message": "Expense added successfully", "expense_id": new_expense.id, "summary_refreshed": refreshed,
+                "aggregates": aggregates}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 
+@app.post("/expenses/bulk/{user_id}", status_code=201)
+def add_expenses_bulk(user_id: int, rows: List[Dict[str, Any]] = Body(...), wait: bool = False,
+                      categorize: bool = False, db: Session = Depends(get_db)):
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ROWS} rows are accepted per request")
+
+    # With ?categorize=true, rows may carry a raw merchant "description" instead of a category
+    if categorize:
+        try:
+            fill_categories(db, user_id, rows)
+        except Exception as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    valid_rows, errors = validate_bulk_rows(rows, ExpenseCreate)
+    try:
+        inserted = crud.add_expenses_bulk_db(db=db, user_id=user_id, rows=valid_rows)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if inserted:
+        record_write(user_id)
+    refreshed = schedule_refresh(user_id, wait) if inserted else False
+
+    return {"message": f"{inserted} expenses added", "inserted": inserted, "rejected": len(errors), "errors": errors,
+            "summary_refreshed": refreshed}
+
+
 @app.get("/totals/{user_id}")
-def get_totals(user_id: int, db: Session = Depends(get_db)):
-    total_income = db.query(func.sum(Income.amount)).filter(Income.user_id == user_id).scalar() or 0
-    total_expenses = db.query(func.sum(Expense.amount)).filter(Expense.user_id == user_id).scalar() or 0
-    net_savings = total_income - total_expenses
+async def get_totals(user_id: int, start_date: Optional[date] = Query(None, alias="from"),
+                     end_date: Optional[date] = Query(None, alias="to"), category: Optional[str] = None,
+                     source: Optional[str] = None, version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
+    """Income and expenses for any date range (both ends inclusive, all-time by default).
+
+    category narrows expenses and source narrows income. Answered from the cumulative_totals
+    prefix sums, so the cost does not grow with the number of transactions in the range.
+    """
+    try:
+        return await cached_read("totals", user_id, version,
+                                 lambda: db.run(crud.get_range_totals_db, user_id, start_date, end_date, category, source),
+                                 start_date, end_date, category, source)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return {
-        "total_income": total_income,
-        "total_expenses": total_expenses,
-        "net_savings": net_savings
-    }
+@app.get("/totals/{user_id}/ytd")
+async def get_ytd_totals(user_id: int, as_of: Optional[date] = None, category: Optional[str] = None,
+                         source: Optional[str] = None, version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
+    as_of = as_of or date.today()
+    try:
+        return await cached_read("totals-ytd", user_id, version,
+                                 lambda: db.run(crud.get_ytd_totals_db, user_id, as_of, category, source), as_of, category, source)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/totals/{user_id}/ttm")
+async def get_ttm_totals(user_id: int, as_of: Optional[date] = None, category: Optional[str] = None,
+                         source: Optional[str] = None, version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
+    as_of = as_of or date.today()
+    try:
+        return await cached_read("totals-ttm", user_id, version,
+                                 lambda: db.run(crud.get_ttm_totals_db, user_id, as_of, category, source), as_of, category, source)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/totals/{user_id}/yoy")
+async def get_yoy_totals(user_id: int, as_of: Optional[date] = None, category: Optional[str] = None,
+                         source: Optional[str] = None, version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
+    as_of = as_of or date.today()
+    try:
+        return await cached_read("totals-yoy", user_id, version,
+                                 lambda: db.run(crud.get_yoy_totals_db, user_id, as_of, category, source), as_of, category, source)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 
 
-@app.get("/expenses/{user_id}")
-def get_expenses(user_id: int, db: Session = Depends(get_db)):
+@app.get("/expenses/{user_id}", dependencies=[Depends(data_version)])
+async def get_expenses(user_id: int, request: Request, category: Optional[str] = None, page: PageParams = Depends(),
+                       db: AsyncDB = Depends(get_async_db)):
     try:
-        expenses = crud.get_expenses_by_user(db=db, user_id=user_id)
-        return expenses
+        return json_response(request, await load_page(db, crud.get_expenses_page, user_id=user_id, category=category, **page.filters()))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/expenses/{user_id}")
+def delete_expenses(user_id: int, criteria: TransactionDelete, db: Session = Depends(get_db)):
+    if not criteria.has_filter():
+        raise HTTPException(status_code=400, detail="Provide ids or a date/category range to delete")
+    try:
+        deleted = crud.delete_expenses_db(db=db, user_id=user_id, ids=criteria.ids, start_date=criteria.start_date,
+                                          end_date=criteria.end_date, category=criteria.category, commit=False)
+        aggregates = crud.get_transaction_aggregates(db, user_id, [row.date for row in deleted],
+                                                     categories=[row.category for row in deleted])
+        db.commit()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if deleted:
+        record_write(user_id)
+        schedule_refresh(user_id)
+    return {"message": f"{len(deleted)} expenses deleted", "deleted": len(deleted), "aggregates": aggregates}
 
 # --------------------------
 # Income Management Endpoints
 # --------------------------
 
 @app.post("/add-income/{user_id}", status_code=201)
-def add_income(user_id: int, income: IncomeCreate, db: Session = Depends(get_db)):
+def add_income(user_id: int, income: IncomeCreate, wait: bool = False, db: Session = Depends(get_db)):
     try:
-        new_income = crud.add_income_db(db=db, user_id=user_id, source=income.source, amount=income.amount, date=income.date)
-        
-        # Call the function to update the summary
-        db.execute(text("SELECT populate_income_expense_summary(:user_id)"), {"user_id": user_id})
+        new_income = crud.add_income_db(db=db, user_id=user_id, source=income.source, amount=income.amount, date=income.date, commit=False)
+        aggregates = crud.get_transaction_aggregates(db, user_id, [income.date], sources=[income.source])
         db.commit()
+        record_write(user_id)
+        refreshed = schedule_refresh(user_id, wait)
 
-        return {"message": "Income added successfully", "income_id": new_income.id}
+        return {"message": "Income added successfully", "income_id": new_income.id, "summary_refreshed": refreshed,
+                "aggregates": aggregates}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.get("/income/{user_id}")
-def get_income(user_id: int, db: Session = Depends(get_db)):
+@app.post("/income/bulk/{user_id}", status_code=201)
+def add_incomes_bulk(user_id: int, rows: List[Dict[str, Any]] = Body(...), wait: bool = False, db: Session = Depends(get_db)):
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ROWS} rows are accepted per request")
+
+    valid_rows, errors = validate_bulk_rows(rows, IncomeCreate)
+    try:
+        inserted = crud.add_incomes_bulk_db(db=db, user_id=user_id, rows=valid_rows)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if inserted:
+        record_write(user_id)
+    refreshed = schedule_refresh(user_id, wait) if inserted else False
+
+    return {"message": f"{inserted} income entries added", "inserted": inserted, "rejected": len(errors), "errors": errors,
+            "summary_refreshed": refreshed}
+
+
+@app.get("/income/{user_id}", dependencies=[Depends(data_version)])
+async def get_income(user_id: int, request: Request, source: Optional[str] = None, page: PageParams = Depends(),
+                     db: AsyncDB = Depends(get_async_db)):
+    try:
+        return json_response(request, await load_page(db, crud.get_incomes_page, user_id=user_id, source=source, **page.filters()))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.delete("/income/{user_id}")
+def delete_incomes(user_id: int, criteria: TransactionDelete, db: Session = Depends(get_db)):
+    if not criteria.has_filter():
+        raise HTTPException(status_code=400, detail="Provide ids or a date/source range to delete")
     try:
-        incomes = crud.get_incomes_by_user(db=db, user_id=user_id)
-        return incomes
+        deleted = crud.delete_incomes_db(db=db, user_id=user_id, ids=criteria.ids, start_date=criteria.start_date,
+                                         end_date=criteria.end_date, source=criteria.category, commit=False)
+        aggregates = crud.get_transaction_aggregates(db, user_id, [row.date for row in deleted],
+                                                     sources=[row.source for row in deleted])
+        db.commit()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+    if deleted:
+        record_write(user_id)
+        schedule_refresh(user_id)
+    return {"message": f"{len(deleted)} income entries deleted", "deleted": len(deleted), "aggregates": aggregates}
 
 # --------------------------
 # Budget Management Endpoints
@@ -166,8 +511,11 @@ def get_income(user_id: int, db: Session = Depends(get_db)):
 @app.post("/budgets/{user_id}", status_code=201)
 def create_budget(user_id: int, budget: BudgetCreate, db: Session = Depends(get_db)):
     try:
-        new_budget = crud.create_budget_db(db=db, user_id=user_id, category=budget.category, budget_amount=budget.budget_amount)
-        return {"message": "Budget created successfully", "budget_id": new_budget.id}
+        new_budget = crud.create_budget_db(db=db, user_id=user_id, category=budget.category, budget_amount=budget.budget_amount, commit=False)
+        aggregates = crud.get_budget_aggregates(db, user_id, budget.category)
+        db.commit()
+        record_write(user_id)
+        return {"message": "Budget created successfully", "budget_id": new_budget.id, "aggregates": aggregates}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -175,8 +523,11 @@ def create_budget(user_id: int, budget: BudgetCreate, db: Session = Depends(get_
 @app.put("/budgets/{budget_id}")
 def update_budget(budget_id: int, budget_update: BudgetUpdate, db: Session = Depends(get_db)):
     try:
-        updated_budget = crud.update_budget_db(db=db, budget_id=budget_id, new_amount=budget_update.new_amount)
-        return {"message": "Budget updated successfully", "budget_id": updated_budget.id}
+        updated_budget = crud.update_budget_db(db=db, budget_id=budget_id, new_amount=budget_update.new_amount, commit=False)
+        aggregates = crud.get_budget_aggregates(db, updated_budget.user_id, updated_budget.category)
+        db.commit()
+        record_write(updated_budget.user_id)
+        return {"message": "Budget updated successfully", "budget_id": budget_id, "aggregates": aggregates}
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
@@ -187,8 +538,11 @@ def update_budget(budget_id: int, budget_update: BudgetUpdate, db: Session = Dep
 @app.delete("/budgets/{budget_id}")
 def delete_budget(budget_id: int, db: Session = Depends(get_db)):
     try:
-        crud.delete_budget_db(db=db, budget_id=budget_id)
-        return {"message": "Budget deleted successfully"}
+        deleted_budget = crud.delete_budget_db(db=db, budget_id=budget_id, commit=False)
+        aggregates = crud.get_budget_aggregates(db, deleted_budget.user_id, deleted_budget.category)
+        db.commit()
+        record_write(deleted_budget.user_id)
+        return {"message": "Budget deleted successfully", "aggregates": aggregates}
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
     
@@ -203,10 +557,23 @@ def delete_budget(budget_id: int, db: Session = Depends(get_db)):
 
 
 @app.get("/budgets/{user_id}")
-def get_budgets(user_id: int, db: Session = Depends(get_db)):
+async def get_budgets(user_id: int, version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
     try:
-        budgets = crud.get_budgets_by_user(db=db, user_id=user_id)
-        return budgets
+        return await cached_read("budgets", user_id, version, lambda: db.run(crud.get_budgets_by_user, user_id=user_id))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.get("/budget-vs-actual/{user_id}")
+async def get_budget_vs_actual(user_id: int, months: int = Query(12, ge=1, le=120), as_of: Optional[date] = None,
+                               version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
+    """Budgeted vs spent per category for the N calendar months ending with as_of's month.
+
+    spent[i][j] is categories[i] in months[j] (oldest first); budgeted[i] applies to every month.
+    """
+    as_of = as_of or date.today()
+    try:
+        return await cached_read("budget-vs-actual", user_id, version,
+                                 lambda: db.run(crud.get_budget_vs_actual_db, user_id, months, as_of), months, as_of)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -215,9 +582,9 @@ def get_budgets(user_id: int, db: Session = Depends(get_db)):
 # --------------------------
 
 @app.get("/financial-summary/{user_id}")
-def get_financial_summary(user_id: int, db: Session = Depends(get_db)):
+async def get_financial_summary(user_id: int, version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
     try:
-        summary = crud.get_financial_summary_db(db=db, user_id=user_id)
+        summary = await cached_read("financial-summary", user_id, version, lambda: db.run(crud.get_financial_summary_db, user_id=user_id))
         if not summary:
             raise HTTPException(status_code=404, detail=f"No financial summary found for user ID {user_id}")
         return summary
@@ -226,9 +593,9 @@ def get_financial_summary(user_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 @app.get("/expense-breakdown/{user_id}")
-def get_expense_breakdown(user_id: int, db: Session = Depends(get_db)):
+async def get_expense_breakdown(user_id: int, version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
     try:
-        expense_breakdown = crud.get_expense_breakdown(db=db, user_id=user_id)
+        expense_breakdown = await cached_read("expense-breakdown", user_id, version, lambda: db.run(crud.get_expense_breakdown, user_id=user_id))
         if not expense_breakdown:
             raise HTTPException(status_code=404, detail=f"No expense breakdown found for user ID {user_id}")
         return {"categories": expense_breakdown}
@@ -236,6 +603,25 @@ def get_expense_breakdown(user_id: int, db: Session = Depends(get_db)):
         logger.error(f"Error fetching expense breakdown: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
+@app.get("/expense-heatmap/{user_id}")
+async def get_expense_heatmap(user_id: int, version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
+    """Expenses by category (rows) and month (columns, oldest first), ready for a heatmap."""
+    try:
+        return await cached_read("expense-heatmap", user_id, version, lambda: db.run(crud.get_expense_heatmap_db, user_id=user_id))
+    except Exception as e:
+        logger.error(f"Error fetching expense heatmap: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
+@app.get("/dashboard/{user_id}")
+async def get_dashboard(user_id: int, version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
+    """Data for every dashboard widget from one consistent snapshot."""
+    try:
+        return await cached_read("dashboard", user_id, version, lambda: db.run(crud.get_dashboard_db, user_id=user_id))
+    except Exception as e:
+        logger.error(f"Error fetching dashboard: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
 # --------------------------
 # Debts and Assets
 # --------------------------
@@ -244,8 +630,11 @@ def get_expense_breakdown(user_id: int, db: Session = Depends(get_db)):
 @app.post("/debts/{user_id}", status_code=201)
 def add_debt(user_id: int, debt: DebtCreate, db: Session = Depends(get_db)):
     try:
-        new_debt = crud.add_debt_db(db=db, user_id=user_id, category=debt.category, amount=debt.amount, date_incurred=debt.date_incurred)
-        return {"message": "Debt added successfully", "debt_id": new_debt.id}
+        new_debt = crud.add_debt_db(db=db, user_id=user_id, category=debt.category, amount=debt.amount, date_incurred=debt.date_incurred, commit=False)
+        aggregates = crud.get_balance_sheet_db(db, user_id, debt_categories=[debt.category])
+        db.commit()
+        record_write(user_id)
+        return {"message": "Debt added successfully", "debt_id": new_debt.id, "aggregates": aggregates}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -254,18 +643,24 @@ def add_debt(user_id: int, debt: DebtCreate, db: Session = Depends(get_db)):
 @app.delete("/debts/{debt_id}")
 def delete_debt(debt_id: int, db: Session = Depends(get_db)):
     try:
-        crud.delete_debt_db(db=db, debt_id=debt_id)
-        return {"message": "Debt deleted successfully"}
+        deleted_debt = crud.delete_debt_db(db=db, debt_id=debt_id, commit=False)
+        aggregates = crud.get_balance_sheet_db(db, deleted_debt.user_id, debt_categories=[deleted_debt.category])
+        db.commit()
+        record_write(deleted_debt.user_id)
+        return {"message": "Debt deleted successfully", "aggregates": aggregates}
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 
 @app.get("/debts/{user_id}")
-def get_debts(user_id: int, db: Session = Depends(get_db)):
+async def get_debts(user_id: int, request: Request, category: Optional[str] = None, page: PageParams = Depends(),
+                    version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
     try:
-        debts = crud.get_debts_by_user(db=db, user_id=user_id)
-        return debts
+        filters = page.filters()
+        return await cached_json(request, "debts", user_id, version,
+                                 lambda: load_page(db, crud.get_debts_page, user_id=user_id, category=category, **filters),
+                                 category, *sorted(filters.items()))
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -277,8 +672,11 @@ def get_debts(user_id: int, db: Session = Depends(get_db)):
 @app.post("/assets/{user_id}", status_code=201)
 def add_asset(user_id: int, asset: AssetCreate, db: Session = Depends(get_db)):
     try:
-        new_asset = crud.add_asset_db(db=db, user_id=user_id, category=asset.category, value=asset.value, date_added=asset.date_added)
-        return {"message": "Asset added successfully", "asset_id": new_asset.id}
+        new_asset = crud.add_asset_db(db=db, user_id=user_id, category=asset.category, value=asset.value, date_added=asset.date_added, commit=False)
+        aggregates = crud.get_balance_sheet_db(db, user_id, asset_categories=[asset.category])
+        db.commit()
+        record_write(user_id)
+        return {"message": "Asset added successfully", "asset_id": new_asset.id, "aggregates": aggregates}
     except Exception as e:
         error_message = str(e)  # Extract the error message
         # print("Error Message : ",error_message)
@@ -294,17 +692,415 @@ def add_asset(user_id: int, asset: AssetCreate, db: Session = Depends(get_db)):
 @app.delete("/assets/{asset_id}")
 def delete_asset(asset_id: int, db: Session = Depends(get_db)):
     try:
-        crud.delete_asset_db(db=db, asset_id=asset_id)
-        return {"message": "Asset deleted successfully"}
+        deleted_asset = crud.delete_asset_db(db=db, asset_id=asset_id, commit=False)
+        aggregates = crud.get_balance_sheet_db(db, deleted_asset.user_id, asset_categories=[deleted_asset.category])
+        db.commit()
+        record_write(deleted_asset.user_id)
+        return {"message": "Asset deleted successfully", "aggregates": aggregates}
     except Exception as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 
 @app.get("/assets/{user_id}")
-def get_assets(user_id: int, db: Session = Depends(get_db)):
+async def get_assets(user_id: int, request: Request, category: Optional[str] = None, page: PageParams = Depends(),
+                     version: int = Depends(data_version), db: AsyncDB = Depends(get_async_db)):
+    try:
+        filters = page.filters()
+        return await cached_json(request, "assets", user_id, version,
+                                 lambda: load_page(db, crud.get_assets_page, user_id=user_id, category=category, **filters),
+                                 category, *sorted(filters.items()))
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+
+@app.get("/net-worth/{user_id}")
+async def get_net_worth(user_id: int, start_date: Optional[date] = Query(None, alias="from"),
+                        end_date: Optional[date] = Query(None, alias="to"), version: int = Depends(data_version),
+                        db: AsyncDB = Depends(get_async_db)):
+    """The latest net worth up to `to` plus one row per day between `from` and `to` (both optional)."""
+    try:
+        return await cached_read("net-worth", user_id, version,
+                                 lambda: db.run(crud.get_net_worth_db, user_id, start_date, end_date), start_date, end_date)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+
+# --------------------------
+# Recurring Transactions
+# --------------------------
+
+@app.post("/recurring-rules/{user_id}", status_code=201)
+def create_recurring_rule(user_id: int, rule: RecurringRuleCreate, db: Session = Depends(get_db)):
+    if rule.kind not in recurring.KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(recurring.KINDS)}")
+    if rule.frequency not in recurring.FREQUENCIES:
+        raise HTTPException(status_code=400, detail=f"frequency must be one of {', '.join(recurring.FREQUENCIES)}")
+    try:
+        new_rule = crud.create_recurring_rule_db(db=db, user_id=user_id, kind=rule.kind, label=rule.label,
+                                                 amount=rule.amount, frequency=rule.frequency,
+                                                 start_date=rule.start_date, end_date=rule.end_date)
+        return {"message": "Recurring rule created successfully", "rule_id": new_rule.id}
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/recurring-rules/{user_id}")
+def get_recurring_rules(user_id: int, db: Session = Depends(get_db)):
+    try:
+        return crud.get_recurring_rules_by_user(db=db, user_id=user_id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.delete("/recurring-rules/{rule_id}")
+def delete_recurring_rule(rule_id: int, db: Session = Depends(get_db)):
+    try:
+        crud.delete_recurring_rule_db(db=db, rule_id=rule_id)
+        return {"message": "Recurring rule deleted successfully"}
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.post("/internal/recurring/run")
+def run_recurring(today: Optional[date] = None):
+    try:
+        return recurring_scheduler.run_once(today=today)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/internal/recurring")
+def get_recurring_status():
+    return {
+        "interval_seconds": recurring_scheduler.interval,
+        "last_report": recurring_scheduler.last_report,
+        "last_error": recurring_scheduler.last_error,
+    }
+
+
+@app.post("/internal/net-worth/close")
+def run_net_worth_close(today: Optional[date] = None):
+    try:
+        return net_worth_closer.run_once(today=today)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/internal/net-worth")
+def get_net_worth_close_status():
+    return {
+        "interval_seconds": net_worth_closer.interval,
+        "last_reports": net_worth_closer.last_reports,
+        "last_error": net_worth_closer.last_error,
+    }
+
+# --------------------------
+# Batch Operations
+# --------------------------
+# POST /batch runs an ordered list of operations on one session (one connection) and commits
+# once. With atomic=True (the default) the first failure rolls the whole batch back; with
+# atomic=False every operation runs in its own savepoint and failures are reported per op.
+# Summary refreshes and aggregates are done once per affected user after the last op.
+
+MAX_BATCH_OPERATIONS = 1000
+
+class BatchOperation(BaseModel):
+    op: str
+    args: Dict[str, Any] = {}
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+    atomic: bool = True
+
+class BatchExpenseArgs(ExpenseCreate):
+    user_id: int
+
+class BatchIncomeArgs(IncomeCreate):
+    user_id: int
+
+class BatchTransactionDeleteArgs(TransactionDelete):
+    user_id: int
+
+class BatchBudgetArgs(BudgetCreate):
+    user_id: int
+
+class BatchBudgetUpdateArgs(BudgetUpdate):
+    budget_id: int
+
+class BatchBudgetDeleteArgs(BaseModel):
+    budget_id: int
+
+class BatchDebtArgs(DebtCreate):
+    user_id: int
+
+class BatchDebtDeleteArgs(BaseModel):
+    debt_id: int
+
+class BatchAssetArgs(AssetCreate):
+    user_id: int
+
+class BatchAssetDeleteArgs(BaseModel):
+    asset_id: int
+
+
+# Each runner maps validated args onto a crud function with commit=False and
+# returns (result, user_id of the affected user, whether the income/expense summary changed)
+def _batch_add_expense(db, a):
+    row = crud.add_expense_db(db=db, user_id=a.user_id, category=a.category, amount=a.amount, date=a.date, commit=False)
+    return {"expense_id": row.id}, a.user_id, True
+
+def _batch_add_income(db, a):
+    row = crud.add_income_db(db=db, user_id=a.user_id, source=a.source, amount=a.amount, date=a.date, commit=False)
+    return {"income_id": row.id}, a.user_id, True
+
+def _batch_delete_expenses(db, a):
+    if not a.has_filter():
+        raise Exception("Provide ids or a date/category range to delete")
+    deleted = crud.delete_expenses_db(db=db, user_id=a.user_id, ids=a.ids, start_date=a.start_date,
+                                      end_date=a.end_date, category=a.category, commit=False)
+    return {"deleted": len(deleted)}, a.user_id, bool(deleted)
+
+def _batch_delete_incomes(db, a):
+    if not a.has_filter():
+        raise Exception("Provide ids or a date/source range to delete")
+    deleted = crud.delete_incomes_db(db=db, user_id=a.user_id, ids=a.ids, start_date=a.start_date,
+                                     end_date=a.end_date, source=a.category, commit=False)
+    return {"deleted": len(deleted)}, a.user_id, bool(deleted)
+
+def _batch_create_budget(db, a):
+    row = crud.create_budget_db(db=db, user_id=a.user_id, category=a.category, budget_amount=a.budget_amount, commit=False)
+    return {"budget_id": row.id}, a.user_id, False
+
+def _batch_update_budget(db, a):
+    row = crud.update_budget_db(db=db, budget_id=a.budget_id, new_amount=a.new_amount, commit=False)
+    return {"budget_id": row.id}, row.user_id, False
+
+def _batch_delete_budget(db, a):
+    row = crud.delete_budget_db(db=db, budget_id=a.budget_id, commit=False)
+    return {"budget_id": a.budget_id}, row.user_id, False
+
+def _batch_add_debt(db, a):
+    row = crud.add_debt_db(db=db, user_id=a.user_id, category=a.category, amount=a.amount, date_incurred=a.date_incurred, commit=False)
+    return {"debt_id": row.id}, a.user_id, False
+
+def _batch_delete_debt(db, a):
+    row = crud.delete_debt_db(db=db, debt_id=a.debt_id, commit=False)
+    return {"debt_id": a.debt_id}, row.user_id, False
+
+def _batch_add_asset(db, a):
+    row = crud.add_asset_db(db=db, user_id=a.user_id, category=a.category, value=a.value, date_added=a.date_added, commit=False)
+    return {"asset_id": row.id}, a.user_id, False
+
+def _batch_delete_asset(db, a):
+    row = crud.delete_asset_db(db=db, asset_id=a.asset_id, commit=False)
+    return {"asset_id": a.asset_id}, row.user_id, False
+
+BATCH_OPERATIONS = {
+    "add_expense": (BatchExpenseArgs, _batch_add_expense),
+    "add_income": (BatchIncomeArgs, _batch_add_income),
+    "delete_expenses": (BatchTransactionDeleteArgs, _batch_delete_expenses),
+    "delete_income": (BatchTransactionDeleteArgs, _batch_delete_incomes),
+    "create_budget": (BatchBudgetArgs, _batch_create_budget),
+    "update_budget": (BatchBudgetUpdateArgs, _batch_update_budget),
+    "delete_budget": (BatchBudgetDeleteArgs, _batch_delete_budget),
+    "add_debt": (BatchDebtArgs, _batch_add_debt),
+    "delete_debt": (BatchDebtDeleteArgs, _batch_delete_debt),
+    "add_asset": (BatchAssetArgs, _batch_add_asset),
+    "delete_asset": (BatchAssetDeleteArgs, _batch_delete_asset),
+}
+
+def run_batch_operation(db: Session, operation: BatchOperation):
+    if operation.op not in BATCH_OPERATIONS:
+        raise Exception(f"Unknown operation '{operation.op}'")
+    args_model, runner = BATCH_OPERATIONS[operation.op]
+    return runner(db, args_model.parse_obj(operation.args))
+
+
+@app.post("/batch")
+def run_batch(batch: BatchRequest, db: Session = Depends(get_db)):
+    if len(batch.operations) > MAX_BATCH_OPERATIONS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_OPERATIONS} operations are accepted per batch")
+
+    results = []
+    affected_users = set()
+    summary_users = set()
+
+    for index, operation in enumerate(batch.operations):
+        savepoint = None if batch.atomic else db.begin_nested()
+        try:
+            result, user_id, summary_changed = run_batch_operation(db, operation)
+        except Exception as e:
+            if batch.atomic:
+                db.rollback()
+                raise HTTPException(status_code=400, detail={
+                    "message": "Batch rolled back", "index": index, "op": operation.op, "error": str(e)
+                })
+            savepoint.rollback()
+            results.append({"index": index, "op": operation.op, "status": "error", "error": str(e)})
+            continue
+
+        if savepoint is not None:
+            savepoint.commit()
+        affected_users.add(user_id)
+        if summary_changed:
+            summary_users.add(user_id)
+        results.append({"index": index, "op": operation.op, "status": "ok", "result": result})
+
+    # One pass over the affected users instead of one per operation
+    totals = {uid: crud.get_totals_db(db, uid) for uid in summary_users}
+    db.commit()
+    for uid in affected_users:
+        record_write(uid)
+    for uid in summary_users:
+        schedule_refresh(uid)
+
+    return {
+        "committed": True,
+        "succeeded": sum(1 for r in results if r["status"] == "ok"),
+        "failed": sum(1 for r in results if r["status"] == "error"),
+        "results": results,
+        "affected_users": sorted(affected_users),
+        "totals": totals,
+    }
+
+
+# --------------------------
+# Merchant Categorization
+# --------------------------
+
+@app.post("/category-rules", status_code=201)
+def create_category_rule(rule: CategoryRuleCreate, db: Session = Depends(get_db)):
+    try:
+        categorizer.validate_pattern(rule.pattern, rule.match_type)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        new_rule = crud.create_category_rule_db(db=db, user_id=rule.user_id, pattern=rule.pattern,
+                                                match_type=rule.match_type, category=rule.category,
+                                                priority=rule.priority)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    categorizer.invalidate(rule.user_id)
+    return {"message": "Category rule created successfully", "rule_id": new_rule.id}
+
+
+@app.get("/category-rules/{user_id}")
+def get_category_rules(user_id: int, db: Session = Depends(get_db)):
     try:
-        assets = crud.get_assets_by_user(db=db, user_id=user_id)
-        return assets
+        return crud.get_category_rules_for_user(db=db, user_id=user_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.delete("/category-rules/{rule_id}")
+def delete_category_rule(rule_id: int, db: Session = Depends(get_db)):
+    try:
+        rule = crud.delete_category_rule_db(db=db, rule_id=rule_id)
+    except Exception as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    categorizer.invalidate(rule.user_id)
+    return {"message": "Category rule deleted successfully"}
+
+
+@app.post("/categorize")
+def categorize(request: CategorizeRequest, db: Session = Depends(get_db)):
+    if len(request.descriptions) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BULK_ROWS} descriptions are accepted per request")
+    try:
+        rule_set = categorizer.get_categorizer(db, request.user_id)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"categories": rule_set.classify_many(request.descriptions)}
+
+
+# --------------------------
+# Bank Statement Import
+# --------------------------
+
+# Job reports live in the database, so GET /import/jobs/{job_id} works on any worker
+import_jobs = importer.JobStore(engine)
+
+def run_import_job(job: importer.ImportJob, path: str, file_format: str, date_format: str):
+    try:
+        db = SessionLocal()
+        try:
+            rule_set = categorizer.get_categorizer(db, job.user_id)
+        except Exception as e:
+            # Import anyway; uncategorized expenses keep their description as the category
+            logger.error(f"Loading category rules for import {job.id} failed: {str(e)}")
+            rule_set = None
+        finally:
+            db.close()
+        importer.import_file(engine, job, path, file_format=file_format, date_format=date_format,
+                             categorizer=rule_set, on_progress=import_jobs.save)
+        if job.status == "completed":
+            record_write(job.user_id)
+            schedule_refresh(job.user_id)
+    finally:
+        os.remove(path)
+
+
+@app.post("/import/{user_id}", status_code=202)
+def import_statement(user_id: int, background_tasks: BackgroundTasks, file: UploadFile = File(...),
+                     format: Optional[str] = None, date_format: str = importer.DEFAULT_DATE_FORMAT):
+    file_format = format or importer.detect_format(file.filename or "")
+    if file_format not in ("csv", "ofx"):
+        raise HTTPException(status_code=400, detail="Format must be 'csv' or 'ofx'")
+
+    try:
+        job = import_jobs.create(user_id, file.filename)
+    except IntegrityError:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Spool the upload to disk in chunks; the import then streams it back from there
+    suffix = f".{file_format}"
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
+        shutil.copyfileobj(file.file, tmp, length=1024 * 1024)
+
+    background_tasks.add_task(run_import_job, job, tmp.name, file_format, date_format)
+    return job.to_dict(include_rejected=False)
+
+
+@app.get("/import/jobs/{job_id}")
+def get_import_job(job_id: str):
+    report = import_jobs.get(job_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return report
+
+
+# --------------------------
+# Internal
+# --------------------------
+
+@app.get("/internal/refresher")
+def get_refresher_stats():
+    return summary_refresher.stats()
+
+
+@app.get("/internal/cache")
+def get_cache_stats():
+    return read_cache.stats()
+
+
+@app.get("/internal/listener")
+def get_listener_stats():
+    return change_listener.stats()
+
+
+@app.get("/internal/pool")
+def get_pool_stats():
+    """Connection pool occupancy and checkout times of this worker's engines, per database."""
+    pools = {}
+    for target in [replica_router.primary] + replica_router.replicas:
+        pools[target.name] = {"sync": pool_stats(target.engine)}
+        if target.async_engine is not None:
+            pools[target.name]["async"] = pool_stats(target.async_engine.sync_engine)
+    return pools
+
+
+@app.get("/internal/replicas")
+def get_replica_stats():
+    return replica_router.stats()
@@ -0,0 +1,387 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+DB_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "db")
+MIGRATIONS_DIR = os.path.join(DB_DIR, "migrations")
+
+# The original CREATE OR REPLACE scripts. They are re-applied, in this order, after the
+# versioned migrations whenever their contents change.
+REPEATABLE_SCRIPTS = ["views.sql", "functions.sql", "procedures.sql", "triggers.sql"]
+
+VERSIONED_FILE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+# Migrations starting with this line run statement by statement outside a transaction, which
+# CREATE INDEX CONCURRENTLY requires. Their statements must be safe to re-run (IF NOT EXISTS).
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+# "-- explain: <query>" lines name the queries a migration is meant to speed up. They are
+# EXPLAIN ANALYZEd before and after it is applied and the timings are kept in schema_migrations.
+EXPLAIN_PREFIX = "-- explain:"
+
+# Serializes concurrent runs (e.g. two app instances deploying at once)
+ADVISORY_LOCK_ID = 727001
+
+SCHEMA_MIGRATIONS_DDL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR PRIMARY KEY,  -- '0002' for versioned migrations, the file name for repeatable scripts
+        name VARCHAR NOT NULL,
+        kind VARCHAR(10) NOT NULL,
+        checksum VARCHAR(64) NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        duration_ms DOUBLE PRECISION,
+        explain JSONB
+    )
+"""
+
+RECORD_SQL = """
+    INSERT INTO schema_migrations (version, name, kind, checksum, duration_ms, explain)
+    VALUES (%(version)s, %(name)s, %(kind)s, %(checksum)s, %(duration_ms)s, %(explain)s)
+    ON CONFLICT (version) DO UPDATE
+    SET checksum = EXCLUDED.checksum, applied_at = now(),
+        duration_ms = EXCLUDED.duration_ms, explain = EXCLUDED.explain
+"""
+
+# Probe parameters: the user with the most expenses and their most used category
+SAMPLE_SQL = """
+    SELECT user_id, category
+    FROM expenses
+    WHERE user_id = (SELECT user_id FROM expenses GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1)
+    GROUP BY user_id, category
+    ORDER BY COUNT(*) DESC
+    LIMIT 1
+"""
+
+CONCURRENT_INDEX = re.compile(r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)", re.IGNORECASE)
+
+INVALID_INDEX_SQL = """
+    SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    WHERE c.relname = %s AND NOT i.indisvalid
+"""
+
+BIND_PARAM = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+class Migration:
+    def __init__(self, version: str, name: str, kind: str, path: str):
+        self.version = version
+        self.name = name
+        self.kind = kind  # 'versioned' or 'repeatable'
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            self.sql = f.read()
+        self.checksum = hashlib.sha256(self.sql.encode()).hexdigest()
+        self.no_transaction = self.sql.lstrip().startswith(NO_TRANSACTION_MARKER)
+        self.explain_queries = [line.strip()[len(EXPLAIN_PREFIX):].strip()
+                                for line in self.sql.splitlines() if line.strip().startswith(EXPLAIN_PREFIX)]
+
+
+def discover(migrations_dir: str = MIGRATIONS_DIR, db_dir: str = DB_DIR):
+    versioned = []
+    for filename in sorted(os.listdir(migrations_dir)):
+        match = VERSIONED_FILE.match(filename)
+        if match:
+            versioned.append(Migration(match.group(1), match.group(2), "versioned", os.path.join(migrations_dir, filename)))
+    repeatable = [Migration(filename, filename[:-4], "repeatable", os.path.join(db_dir, filename))
+                  for filename in REPEATABLE_SCRIPTS]
+    return versioned, repeatable
+
+
+def split_statements(sql: str):
+    """Split a script on top-level semicolons, skipping quotes, dollar quotes and comments."""
+    statements, current = [], []
+    i, length = 0, len(sql)
+    while i < length:
+        char = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = length if end == -1 else end + 1
+            continue
+        if sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = length if end == -1 else end + 2
+            continue
+        if char == "'":
+            end = i + 1
+            while end < length:
+                if sql[end] == "'" and not sql.startswith("''", end):
+                    break
+                end += 2 if sql.startswith("''", end) else 1
+            current.append(sql[i:end + 1])
+            i = end + 1
+            continue
+        dollar = re.match(r"\$\w*\$", sql[i:])
+        if dollar:
+            tag = dollar.group(0)
+            end = sql.find(tag, i + len(tag))
+            end = length if end == -1 else end + len(tag)
+            current.append(sql[i:end])
+            i = end
+            continue
+        if char == ";":
+            statement = "".join(current).strip()
+            if statement:
+                statements.append(statement)
+            current = []
+        else:
+            current.append(char)
+        i += 1
+    statement = "".join(current).strip()
+    if statement:
+        statements.append(statement)
+    return statements
+
+
+# --------------------------
+# EXPLAIN probes
+# --------------------------
+
+def _scans(plan: dict):
+    # Every scan node in the plan, e.g. "Index Scan using ix_expenses_user_date on expenses"
+    found = []
+    node_type = plan.get("Node Type", "")
+    if "Scan" in node_type:
+        description = node_type
+        if plan.get("Index Name"):
+            description += f" using {plan['Index Name']}"
+        if plan.get("Relation Name"):
+            description += f" on {plan['Relation Name']}"
+        found.append(description)
+    for child in plan.get("Plans", []):
+        found.extend(_scans(child))
+    return found
+
+
+def explain(connection, queries, params: dict):
+    """EXPLAIN ANALYZE each query in its own rolled back transaction."""
+    results = []
+    cursor = connection.cursor()
+    for query in queries:
+        statement = "EXPLAIN (ANALYZE, FORMAT JSON) " + BIND_PARAM.sub(r"%(\1)s", query.replace("%", "%%"))
+        try:
+            cursor.execute(statement, params)
+            plan = cursor.fetchone()[0][0]
+            results.append({
+                "query": query,
+                "execution_ms": plan["Execution Time"],
+                "planning_ms": plan["Planning Time"],
+                "scans": _scans(plan["Plan"]),
+            })
+        except Exception as e:
+            results.append({"query": query, "error": str(e).strip()})
+        finally:
+            connection.rollback()
+    return results
+
+
+def sample_params(connection):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(SAMPLE_SQL)
+        row = cursor.fetchone()
+    except Exception:
+        row = None  # e.g. expenses does not exist yet
+    finally:
+        connection.rollback()
+    return {"user_id": row[0], "category": row[1]} if row else None
+
+
+# --------------------------
+# Runner
+# --------------------------
+
+def _drop_invalid_index(cursor, statement: str):
+    # A failed CONCURRENTLY build leaves an INVALID index behind, which IF NOT EXISTS would then skip
+    match = CONCURRENT_INDEX.search(statement)
+    if not match:
+        return
+    cursor.execute(INVALID_INDEX_SQL, (match.group(1),))
+    if cursor.fetchone():
+        logger.warning(f"Dropping invalid index {match.group(1)} left by an earlier failed build")
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {match.group(1)}")
+
+
+def _record(cursor, migration: Migration, duration_ms=None):
+    cursor.execute(RECORD_SQL, {
+        "version": migration.version,
+        "name": migration.name,
+        "kind": migration.kind,
+        "checksum": migration.checksum,
+        "duration_ms": duration_ms,
+        "explain": None,
+    })
+
+
+def apply_migration(connection, migration: Migration, params: dict = None):
+    probe = bool(params and migration.explain_queries)
+    before = explain(connection, migration.explain_queries, params) if probe else None
+
+    cursor = connection.cursor()
+    started = time.monotonic()
+    try:
+        if migration.no_transaction:
+            # On the psycopg2 connection itself; the pool's wrapper would just take the attribute
+            connection.dbapi_connection.autocommit = True
+            try:
+                for statement in split_statements(migration.sql):
+                    _drop_invalid_index(cursor, statement)
+                    cursor.execute(statement)
+            finally:
+                connection.dbapi_connection.autocommit = False
+        else:
+            cursor.execute(migration.sql)
+        duration_ms = round((time.monotonic() - started) * 1000, 3)
+        _record(cursor, migration, duration_ms)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
+    after = None
+    if probe:
+        after = explain(connection, migration.explain_queries, params)
+        cursor.execute("UPDATE schema_migrations SET explain = %s WHERE version = %s",
+                       (json.dumps({"before": before, "after": after}), migration.version))
+        connection.commit()
+    return {"version": migration.version, "name": migration.name, "duration_ms": duration_ms,
+            "before": before, "after": after}
+
+
+def _applied(connection):
+    cursor = connection.cursor()
+    cursor.execute(SCHEMA_MIGRATIONS_DDL)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    applied = dict(cursor.fetchall())
+    connection.commit()
+    return applied
+
+
+def pending_migrations(versioned, repeatable, applied: dict):
+    pending = []
+    for migration in versioned:
+        if migration.version not in applied:
+            pending.append(migration)
+        elif applied[migration.version] != migration.checksum:
+            # Versioned migrations are never re-run; a new file is needed to change the schema again
+            logger.warning(f"Migration {migration.version}_{migration.name} was edited after it was applied")
+    pending.extend(m for m in repeatable if applied.get(m.version) != m.checksum)
+    return pending
+
+
+def migrate(engine, baseline: str = None, probe: bool = True, dry_run: bool = False):
+    """Apply pending migrations. Returns a report per applied migration.
+
+    baseline marks versioned migrations up to that version as applied without running them,
+    for a database whose schema already has them (e.g. restored from a dump that lacks
+    schema_migrations). Repeatable scripts are never baselined: they are idempotent and are
+    applied whenever the database does not have their current version.
+    """
+    versioned, repeatable = discover()
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT pg_advisory_lock(%s)", (ADVISORY_LOCK_ID,))
+        connection.commit()
+        try:
+            applied = _applied(connection)
+
+            if baseline is not None:
+                for migration in [m for m in versioned if m.version <= baseline]:
+                    if migration.version not in applied:
+                        _record(cursor, migration)
+                        applied[migration.version] = migration.checksum
+                        logger.info(f"Baselined {migration.version} {migration.name}")
+                connection.commit()
+
+            pending = pending_migrations(versioned, repeatable, applied)
+            if dry_run:
+                return [{"version": m.version, "name": m.name, "pending": True} for m in pending]
+
+            params = sample_params(connection) if probe else None
+            reports = []
+            for migration in pending:
+                logger.info(f"Applying {migration.kind} migration {migration.version} {migration.name}")
+                reports.append(apply_migration(connection, migration, params))
+            return reports
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (ADVISORY_LOCK_ID,))
+            connection.commit()
+    finally:
+        connection.close()
+
+
+def status(engine):
+    versioned, repeatable = discover()
+    connection = engine.raw_connection()
+    try:
+        applied = _applied(connection)
+    finally:
+        connection.close()
+
+    rows = []
+    for migration in versioned + repeatable:
+        if migration.version not in applied:
+            state = "pending"
+        elif applied[migration.version] != migration.checksum:
+            state = "changed" if migration.kind == "repeatable" else "edited after apply"
+        else:
+            state = "applied"
+        rows.append((migration.version, migration.name, migration.kind, state))
+    return rows
+
+
+# --------------------------
+# CLI
+# --------------------------
+# python -m backend.migrate            apply everything pending
+# python -m backend.migrate --status
+# python -m backend.migrate --baseline 0003   (schema already at 0003, but no schema_migrations)
+
+def _print_timings(report):
+    print(f"{report['version']} {report['name']}: {report['duration_ms']} ms")
+    if not report["before"]:
+        return
+    for before, after in zip(report["before"], report["after"]):
+        print(f"  {before['query']}")
+        for label, result in (("before", before), ("after", after)):
+            if "error" in result:
+                print(f"    {label}: {result['error']}")
+            else:
+                print(f"    {label}: {result['execution_ms']:.3f} ms  {', '.join(result['scans'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database migrations")
+    parser.add_argument("--status", action="store_true", help="list migrations and whether they are applied")
+    parser.add_argument("--dry-run", action="store_true", help="list pending migrations without applying them")
+    parser.add_argument("--baseline", metavar="VERSION", default=None,
+                        help="mark versioned migrations up to VERSION as applied without running them")
+    parser.add_argument("--no-explain", action="store_true", help="skip the before/after EXPLAIN probes")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    from backend.database import engine
+
+    if args.status:
+        for version, name, kind, state in status(engine):
+            print(f"{version:<16} {name:<24} {kind:<10} {state}")
+        return
+
+    reports = migrate(engine, baseline=args.baseline, probe=not args.no_explain, dry_run=args.dry_run)
+    if not reports:
+        print("Database is up to date")
+    for report in reports:
+        if args.dry_run:
+            print(f"pending: {report['version']} {report['name']}")
+        else:
+            _print_timings(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey,Date, Numeric, text
+from sqlalchemy import Column, Integer, String, Float, ForeignKey,Date, Numeric, Index, text, BigInteger, DateTime, func
 from sqlalchemy.orm import relationship
 from backend.database import Base
 
@@ -16,28 +16,44 @@ class User(Base):
     budgets = relationship("Budget", back_populates="user", cascade="all, delete-orphan")
     assets = relationship("Asset", back_populates="user", cascade="all, delete-orphan")
     debts = relationship("Debt", back_populates="user", cascade="all, delete-orphan")
+    recurring_rules = relationship("RecurringRule", back_populates="user", cascade="all, delete-orphan")
+    category_rules = relationship("CategoryRule", back_populates="user", cascade="all, delete-orphan")
+
+# Composite indexes are created by backend/db/migrations/0002_composite_indexes.sql;
+# they are declared on the models as well so metadata matches the database.
 
 # Expense model
 class Expense(Base):
     __tablename__ = "expenses"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index("ix_expenses_user_date", "user_id", "date", "id"),
+        Index("ix_expenses_user_category_date", "user_id", "category", "date"),
+        {'extend_existing': True},
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     category = Column(String)
     amount = Column(Float)
     date = Column(Date, nullable=False)  # Ensure date is required
+    # Set by statement imports (see importer.fingerprint); unique per user so re-imports are skipped
+    fingerprint = Column(String(32))
 
     user = relationship("User", back_populates="expenses")
 
 # Income model
 class Income(Base):
     __tablename__ = "income"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index("ix_income_user_date", "user_id", "date", "id"),
+        Index("ix_income_user_source_date", "user_id", "source", "date"),
+        {'extend_existing': True},
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     source = Column(String)
     amount = Column(Float)
     date = Column(Date, nullable=False) 
+    fingerprint = Column(String(32))
 
     # Relationship back to User
     user = relationship("User", back_populates="incomes")
@@ -45,7 +61,10 @@ class Income(Base):
 # Budget model
 class Budget(Base):
     __tablename__ = "budgets"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        Index("ix_budgets_user_category", "user_id", "category"),
+        {'extend_existing': True},
+    )
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     category = Column(String)
@@ -57,6 +76,7 @@ class Budget(Base):
 
 class Asset(Base):
     __tablename__ = "assets"
+    __table_args__ = (Index("ix_assets_user_date", "user_id", "date_added", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -68,6 +88,7 @@ class Asset(Base):
 
 class Debt(Base):
     __tablename__ = "debts"
+    __table_args__ = (Index("ix_debts_user_date", "user_id", "date_incurred", "id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
@@ -75,4 +96,53 @@ class Debt(Base):
     amount = Column(Numeric, nullable=False)
     date_incurred = Column(Date, default=text("CURRENT_DATE"))
 
-    user = relationship("User", back_populates="debts")
\ No newline at end of file
+    user = relationship("User", back_populates="debts")
+
+
+# Recurring income/expense rule, materialized into income/expenses by backend/recurring.py
+class RecurringRule(Base):
+    __tablename__ = "recurring_rules"
+    __table_args__ = (Index("ix_recurring_rules_user_id", "user_id"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    kind = Column(String(10), nullable=False)  # 'expense' or 'income'
+    label = Column(String, nullable=False)  # category for expenses, source for income
+    amount = Column(Float, nullable=False)
+    frequency = Column(String(10), nullable=False)  # 'weekly', 'monthly' or 'yearly'
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date)
+    # Occurrence n falls on start_date + n * frequency; next_index/next_due is the first one not yet materialized
+    next_index = Column(Integer, nullable=False, default=0)
+    next_due = Column(Date, nullable=False, index=True)
+
+    user = relationship("User", back_populates="recurring_rules")
+
+# One row per materialized occurrence, so a (rule, period) is never inserted twice
+class RecurringOccurrence(Base):
+    __tablename__ = "recurring_occurrences"
+
+    rule_id = Column(Integer, ForeignKey("recurring_rules.id", ondelete="CASCADE"), primary_key=True)
+    period = Column(Date, primary_key=True)
+
+# Merchant categorization rule (see backend/categorizer.py). user_id NULL makes it a global rule.
+class CategoryRule(Base):
+    __tablename__ = "category_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    pattern = Column(String, nullable=False)
+    match_type = Column(String(10), nullable=False)  # 'substring', 'prefix' or 'regex'
+    category = Column(String, nullable=False)
+    priority = Column(Integer, nullable=False, default=100)  # lower wins
+
+    user = relationship("User", back_populates="category_rules")
+
+# Bumped by triggers on every write to a user's expenses, income, budgets, assets or debts
+# (db/migrations/0003_user_data_versions.sql); read endpoints turn it into an ETag.
+class UserDataVersion(Base):
+    __tablename__ = "user_data_versions"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    version = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,168 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Users closed per statement; each batch is its own transaction
+DEFAULT_BATCH_SIZE = 5000
+# Seconds between scheduled closes. Closing is idempotent, so running it more than once a day is harmless.
+DEFAULT_INTERVAL = float(os.getenv("NET_WORTH_CLOSE_INTERVAL", "3600"))
+
+# Gives every user with a net worth history a row for :day. Changes to assets and debts
+# already keep today's row current (db/migrations/0006_net_worth_snapshots.sql), so this
+# only fills days without changes by carrying the user's latest earlier row forward.
+# Users are walked in id order, one batch per statement.
+CLOSE_SQL = """
+    WITH batch AS (
+        SELECT id FROM users
+        WHERE id > :after_id
+        ORDER BY id
+        LIMIT :batch_size
+    ),
+    closed AS (
+        INSERT INTO net_worth_snapshots (user_id, day, total_assets, total_liabilities)
+        SELECT b.id, :day, last.total_assets, last.total_liabilities
+        FROM batch b
+        CROSS JOIN LATERAL (
+            SELECT s.total_assets, s.total_liabilities
+            FROM net_worth_snapshots s
+            WHERE s.user_id = b.id AND s.day < :day
+            ORDER BY s.day DESC
+            LIMIT 1
+        ) last
+        ON CONFLICT (user_id, day) DO NOTHING
+        RETURNING user_id
+    ),
+    -- New rows change what GET /net-worth returns, so their users get new ETags
+    touched AS (
+        INSERT INTO user_data_versions (user_id, version)
+        SELECT user_id, nextval('user_data_version_seq') FROM closed
+        ON CONFLICT (user_id) DO UPDATE SET version = EXCLUDED.version, updated_at = now()
+    )
+    SELECT
+        (SELECT COUNT(*) FROM batch) AS users,
+        (SELECT MAX(id) FROM batch) AS last_user_id,
+        (SELECT COUNT(*) FROM closed) AS closed
+"""
+
+
+def database_today(session_factory) -> date:
+    """The database's CURRENT_DATE, the day the triggers keep current; the app server's clock may differ."""
+    db = session_factory()
+    try:
+        return db.execute(text("SELECT CURRENT_DATE")).scalar()
+    finally:
+        db.close()
+
+
+def close_day(session_factory, day: date = None, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Close one day (default the database's today) for every user. Returns a report."""
+    day = day or database_today(session_factory)
+    report = {"day": day.isoformat(), "batches": 0, "users": 0, "closed": 0}
+    started = time.monotonic()
+    after_id = 0
+
+    while True:
+        db = session_factory()
+        try:
+            row = db.execute(text(CLOSE_SQL), {"day": day, "after_id": after_id, "batch_size": batch_size}).fetchone()
+            db.commit()
+        finally:
+            db.close()
+
+        if not row.users:
+            break
+        report["batches"] += 1
+        report["users"] += row.users
+        report["closed"] += row.closed
+        after_id = row.last_user_id
+
+    report["elapsed_seconds"] = round(time.monotonic() - started, 3)
+    logger.info(f"Net worth close: {report}")
+    return report
+
+
+def close_days(session_factory, start: date, end: date, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Close start..end in order, e.g. to catch up after downtime."""
+    reports = []
+    day = start
+    while day <= end:
+        reports.append(close_day(session_factory, day, batch_size))
+        day += timedelta(days=1)
+    return reports
+
+
+class NetWorthCloser:
+    """Runs close_day for yesterday and today every interval seconds on a background thread.
+
+    Yesterday is included so a day the process was down over midnight still gets closed.
+    """
+
+    def __init__(self, session_factory, interval: float = DEFAULT_INTERVAL, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        self.last_reports = None
+        self.last_error = None
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="net-worth-closer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self, today: date = None):
+        today = today or database_today(self.session_factory)
+        with self._run_lock:
+            try:
+                self.last_reports = close_days(self.session_factory, today - timedelta(days=1), today, self.batch_size)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Net worth close failed: {str(e)}")
+                raise
+            return self.last_reports
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+
+# python -m backend.networth                      (e.g. daily from cron instead of the in-process closer)
+# python -m backend.networth --from 2025-01-01    (catch up every day since then)
+def main():
+    parser = argparse.ArgumentParser(description="Close the day's net worth snapshots")
+    parser.add_argument("--day", type=date.fromisoformat, default=None, help="last day to close (default the database's today)")
+    parser.add_argument("--from", dest="start", type=date.fromisoformat, default=None, help="first day to close")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from backend.database import SessionLocal
+
+    end = args.day or database_today(SessionLocal)
+    for report in close_days(SessionLocal, args.start or end, end, args.batch_size):
+        print(", ".join(f"{key}: {value}" for key, value in report.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import logging
+import os
+import select
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Sent by db/migrations/0007_user_data_notify.sql with the user_id as payload
+CHANNEL = "user_data_changed"
+# Sent by db/migrations/0008_category_rules_notify.sql with the user_id, or '' for a global rule
+RULES_CHANNEL = "category_rules_changed"
+# Seconds between reconnect attempts after the listening connection is lost
+DEFAULT_RECONNECT_DELAY = float(os.getenv("CHANGE_LISTENER_RECONNECT_DELAY", "2"))
+
+
+class ChangeListener:
+    """LISTENs for user_data_changed on a dedicated connection and calls on_change(user_id).
+
+    Changed category rules are passed to on_rules_change(user_id), with None for a global
+    rule. This is how a worker hears about writes another worker (or the scheduler, the
+    importer CLI, psql...) committed. The connection is opened through the engine's dialect
+    but kept out of its pool. Notifications sent while it is down are lost, so on_reconnect is
+    called once listening resumes, for the caller to drop whatever it may have missed.
+    """
+
+    def __init__(self, engine, on_change, on_reconnect=None, on_rules_change=None,
+                 reconnect_delay: float = DEFAULT_RECONNECT_DELAY):
+        self.engine = engine
+        self.on_change = on_change
+        self.on_reconnect = on_reconnect
+        self.on_rules_change = on_rules_change
+        self.reconnect_delay = reconnect_delay
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.listening = False
+        self.notifications = 0
+        self.reconnects = 0
+        self.last_error = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="change-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _connect(self):
+        cargs, cparams = self.engine.dialect.create_connect_args(self.engine.url)
+        connection = self.engine.dialect.connect(*cargs, **cparams)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {CHANNEL}")
+            if self.on_rules_change:
+                cursor.execute(f"LISTEN {RULES_CHANNEL}")
+        return connection
+
+    def _run(self):
+        connected_before = False
+        while not self._stop.is_set():
+            connection = None
+            try:
+                connection = self._connect()
+                self.listening = True
+                self.last_error = None
+                if connected_before:
+                    self.reconnects += 1
+                    if self.on_reconnect:
+                        self.on_reconnect()
+                connected_before = True
+                self._listen(connection)
+            except Exception as e:
+                # Logged once per outage, not on every reconnect attempt
+                if self.last_error is None:
+                    logger.error(f"Change listener lost its connection: {str(e)}")
+                self.last_error = str(e)
+            finally:
+                self.listening = False
+                if connection is not None:
+                    try:
+                        connection.close()
+                    except Exception:
+                        pass
+            self._stop.wait(self.reconnect_delay)
+
+    def _listen(self, connection):
+        while not self._stop.is_set():
+            # The timeout only bounds how long stop() waits; notifications wake select at once
+            if select.select([connection], [], [], 1.0) == ([], [], []):
+                continue
+            connection.poll()
+            while connection.notifies:
+                notify = connection.notifies.pop(0)
+                rules = notify.channel == RULES_CHANNEL
+                try:
+                    # An empty payload on the rules channel is a global rule
+                    user_id = None if rules and not notify.payload else int(notify.payload)
+                except ValueError:
+                    logger.warning(f"Ignoring {notify.channel} notification with payload {notify.payload!r}")
+                    continue
+                self.notifications += 1
+                (self.on_rules_change if rules else self.on_change)(user_id)
+
+    def stats(self):
+        return {
+            "channels": [CHANNEL, RULES_CHANNEL] if self.on_rules_change else [CHANNEL],
+            "listening": self.listening,
+            "notifications": self.notifications,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,93 @@
+import bisect
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Upper bounds (ms) of the checkout time histogram; slower checkouts fall in the last bucket
+CHECKOUT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    """Checkout counts and times for one engine's pool, kept across pool recreation."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(CHECKOUT_BUCKETS_MS) + 1)
+
+    def record(self, elapsed_ms: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_ms += elapsed_ms
+            self.max_ms = max(self.max_ms, elapsed_ms)
+            self.buckets[bisect.bisect_left(CHECKOUT_BUCKETS_MS, elapsed_ms)] += 1
+
+    def stats(self):
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            labels = [f"<={bound}ms" for bound in CHECKOUT_BUCKETS_MS] + [f">{CHECKOUT_BUCKETS_MS[-1]}ms"]
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "mean_checkout_ms": round(self.total_ms / attempts, 3) if attempts else 0.0,
+                "max_checkout_ms": round(self.max_ms, 3),
+                "checkout_ms_histogram": dict(zip(labels, self.buckets)),
+            }
+
+
+class _TimedPool:
+    """Times Pool.connect(): waiting for a free connection, plus opening or pre-pinging one when needed."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record((time.perf_counter() - started) * 1000, timed_out=True)
+            raise
+        self.metrics.record((time.perf_counter() - started) * 1000)
+        return connection
+
+    def recreate(self):
+        # dispose() and invalidation replace the pool; the counts carry over
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class TimedQueuePool(_TimedPool, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(engine):
+    """Current pool occupancy plus the pool's PoolMetrics, for GET /internal/pool."""
+    pool = engine.pool
+    stats = {
+        "pool_size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # Negative while fewer than pool_size connections have been opened
+        "overflow": pool.overflow(),
+        "max_overflow": pool._max_overflow,
+        "timeout_seconds": pool.timeout(),
+    }
+    metrics = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.stats())
+    return stats
@@ -0,0 +1,207 @@
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import date
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Rules claimed per statement; each batch is its own transaction
+DEFAULT_BATCH_SIZE = 5000
+# Seconds between scheduled runs
+DEFAULT_INTERVAL = float(os.getenv("RECURRING_INTERVAL", "3600"))
+
+FREQUENCIES = ("weekly", "monthly", "yearly")
+KINDS = ("expense", "income")
+
+# Materializes every due occurrence for one batch of rules in a single statement:
+#   due_rules    claims up to :batch_size due rules (SKIP LOCKED, so concurrent runs split the work)
+#   occurrences  expands each rule into all of its due dates up to today or its end_date.
+#                Occurrence n is start_date + n * step, anchored on start_date so monthly
+#                rules on the 31st don't drift after a short month
+#   claimed      records (rule, period); ON CONFLICT makes reruns and overlapping runs no-ops
+#   new_*        inserts the newly claimed occurrences into expenses / income
+#   advanced     moves each rule's next_index/next_due past what was materialized
+# Catching up after downtime is the same statement with more rows from generate_series.
+MATERIALIZE_SQL = """
+    WITH due_rules AS (
+        SELECT id, user_id, kind, label, amount, start_date, next_index, next_due,
+               LEAST(:today, COALESCE(end_date, :today)) AS until,
+               CASE frequency
+                   WHEN 'weekly' THEN INTERVAL '1 week'
+                   WHEN 'monthly' THEN INTERVAL '1 month'
+                   ELSE INTERVAL '1 year'
+               END AS step,
+               CASE frequency WHEN 'weekly' THEN 7 WHEN 'monthly' THEN 28 ELSE 365 END AS min_step_days
+        FROM recurring_rules
+        WHERE next_due <= :today
+        AND (end_date IS NULL OR next_due <= end_date)
+        AND id > :after_id
+        ORDER BY id
+        LIMIT :batch_size
+        FOR UPDATE SKIP LOCKED
+    ),
+    occurrences AS (
+        SELECT r.id AS rule_id, r.user_id, r.kind, r.label, r.amount, g.n,
+               (r.start_date + g.n * r.step)::DATE AS period
+        FROM due_rules r
+        CROSS JOIN LATERAL generate_series(
+            r.next_index, r.next_index + (r.until - r.next_due) / r.min_step_days
+        ) AS g(n)
+        WHERE (r.start_date + g.n * r.step)::DATE <= r.until
+    ),
+    claimed AS (
+        INSERT INTO recurring_occurrences (rule_id, period)
+        SELECT rule_id, period FROM occurrences
+        ON CONFLICT DO NOTHING
+        RETURNING rule_id, period
+    ),
+    new_expenses AS (
+        INSERT INTO expenses (user_id, category, amount, date)
+        SELECT o.user_id, o.label, o.amount, o.period
+        FROM occurrences o
+        JOIN claimed c ON c.rule_id = o.rule_id AND c.period = o.period
+        WHERE o.kind = 'expense'
+        RETURNING 1
+    ),
+    new_income AS (
+        INSERT INTO income (user_id, source, amount, date)
+        SELECT o.user_id, o.label, o.amount, o.period
+        FROM occurrences o
+        JOIN claimed c ON c.rule_id = o.rule_id AND c.period = o.period
+        WHERE o.kind = 'income'
+        RETURNING 1
+    ),
+    advanced AS (
+        UPDATE recurring_rules rr
+        SET next_index = last.n + 1,
+            next_due = (rr.start_date + (last.n + 1) * d.step)::DATE
+        FROM (SELECT rule_id, MAX(n) AS n FROM occurrences GROUP BY rule_id) last
+        JOIN due_rules d ON d.id = last.rule_id
+        WHERE rr.id = last.rule_id
+        RETURNING 1
+    )
+    SELECT
+        (SELECT COUNT(*) FROM due_rules) AS rules,
+        (SELECT MAX(id) FROM due_rules) AS last_rule_id,
+        (SELECT COUNT(*) FROM occurrences) AS occurrences,
+        (SELECT COUNT(*) FROM claimed) AS claimed,
+        (SELECT COUNT(*) FROM new_expenses) AS expenses,
+        (SELECT COUNT(*) FROM new_income) AS income,
+        (SELECT COUNT(*) FROM advanced) AS advanced
+"""
+
+
+def materialize_due(session_factory, today: date = None, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Materialize every due occurrence of every rule. Returns a throughput report."""
+    today = today or date.today()
+    report = {
+        "today": today.isoformat(),
+        "batches": 0,
+        "rules": 0,
+        "occurrences": 0,
+        "skipped_existing": 0,
+        "expenses_inserted": 0,
+        "income_inserted": 0,
+    }
+    started = time.monotonic()
+    after_id = 0
+
+    while True:
+        db = session_factory()
+        try:
+            row = db.execute(text(MATERIALIZE_SQL), {
+                "today": today, "after_id": after_id, "batch_size": batch_size
+            }).fetchone()
+            db.commit()
+        finally:
+            db.close()
+
+        if not row.rules:
+            break
+        report["batches"] += 1
+        report["rules"] += row.rules
+        report["occurrences"] += row.claimed
+        report["skipped_existing"] += row.occurrences - row.claimed
+        report["expenses_inserted"] += row.expenses
+        report["income_inserted"] += row.income
+        after_id = row.last_rule_id
+
+    elapsed = time.monotonic() - started
+    report["elapsed_seconds"] = round(elapsed, 3)
+    report["rules_per_sec"] = round(report["rules"] / elapsed, 1) if elapsed > 0 else 0.0
+    report["occurrences_per_sec"] = round(report["occurrences"] / elapsed, 1) if elapsed > 0 else 0.0
+    logger.info(f"Recurring run: {report}")
+    return report
+
+
+class RecurringScheduler:
+    """Runs materialize_due every interval seconds on a background thread."""
+
+    def __init__(self, session_factory, interval: float = DEFAULT_INTERVAL, batch_size: int = DEFAULT_BATCH_SIZE,
+                 on_materialized=None):
+        self.session_factory = session_factory
+        self.interval = interval
+        self.batch_size = batch_size
+        # Called with the report after a run that inserted rows
+        self.on_materialized = on_materialized
+        self.last_report = None
+        self.last_error = None
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="recurring-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self, today: date = None):
+        with self._run_lock:
+            try:
+                self.last_report = materialize_due(self.session_factory, today=today, batch_size=self.batch_size)
+                self.last_error = None
+                if self.on_materialized and (self.last_report["expenses_inserted"] or self.last_report["income_inserted"]):
+                    self.on_materialized(self.last_report)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Recurring run failed: {str(e)}")
+                raise
+            return self.last_report
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+
+# python -m backend.recurring  (e.g. from cron instead of the in-process scheduler)
+def main():
+    parser = argparse.ArgumentParser(description="Materialize due recurring income and expenses")
+    parser.add_argument("--today", type=date.fromisoformat, default=None)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    from backend.database import SessionLocal
+
+    report = materialize_due(SessionLocal, today=args.today, batch_size=args.batch_size)
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
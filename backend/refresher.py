@@ -0,0 +1,137 @@
+import logging
+import os
+import threading
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+# Seconds writes are collected before the dirty users are refreshed
+DEFAULT_WINDOW = float(os.getenv("SUMMARY_REFRESH_WINDOW", "1.0"))
+
+# Per-user derived data that is recomputed rather than maintained by triggers.
+# income_expense_summary is kept current by the delta triggers, so what is left is the
+# current month's savings in savings_goals (see db/procedures.sql). The refresh changes what
+# the dashboard shows, so it also moves the user's data version (and with it their ETags).
+REFRESH_STATEMENTS = [
+    "CALL update_savings(:user_id)",
+    "SELECT touch_user_data_version(:user_id)",
+]
+
+
+class PendingRefresh:
+    """A user's scheduled refresh, as returned by SummaryRefresher.mark_dirty."""
+
+    def __init__(self):
+        self.succeeded = False
+        self._done = threading.Event()
+
+    def finish(self, succeeded: bool):
+        self.succeeded = succeeded
+        self._done.set()
+
+    def wait(self, timeout: float = None):
+        """True once the refresh has run successfully; False if it failed or timeout passed first."""
+        return self._done.wait(timeout) and self.succeeded
+
+
+class SummaryRefresher:
+    """Background worker that coalesces per-user summary refreshes.
+
+    Writes call mark_dirty(user_id) and return straight away. The worker waits one window
+    after the first mark, then refreshes every dirty user once, however many writes they made
+    in that window. The PendingRefresh returned by mark_dirty lets a caller wait for that
+    refresh, i.e. opt into read-your-writes.
+    """
+
+    def __init__(self, session_factory, window: float = DEFAULT_WINDOW, statements=None):
+        self.session_factory = session_factory
+        self.window = window
+        self.statements = statements or REFRESH_STATEMENTS
+
+        self._dirty = {}  # user_id -> PendingRefresh for that user's next refresh
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.marks = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.failures = 0
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="summary-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def mark_dirty(self, user_id: int):
+        with self._lock:
+            pending = self._dirty.get(user_id)
+            if pending is None:
+                pending = PendingRefresh()
+                self._dirty[user_id] = pending
+            else:
+                self.coalesced += 1
+            self.marks += 1
+        self._wakeup.set()
+        return pending
+
+    def pending(self):
+        with self._lock:
+            return len(self._dirty)
+
+    def stats(self):
+        return {
+            "window_seconds": self.window,
+            "pending_users": self.pending(),
+            "marks": self.marks,
+            "refreshes": self.refreshes,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+        }
+
+    def refresh_user(self, user_id: int):
+        db = self.session_factory()
+        try:
+            for statement in self.statements:
+                db.execute(text(statement), {"user_id": user_id})
+            db.commit()
+        finally:
+            db.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait()
+            self._wakeup.clear()
+            # Debounce: let further writes for the same users pile up for one window
+            self._stop.wait(self.window)
+            self._flush()
+        # Don't leave anyone waiting on shutdown
+        self._flush()
+
+    def _flush(self):
+        with self._lock:
+            batch, self._dirty = self._dirty, {}
+
+        for user_id, pending in batch.items():
+            succeeded = False
+            try:
+                self.refresh_user(user_id)
+                self.refreshes += 1
+                succeeded = True
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Summary refresh failed for user {user_id}: {str(e)}")
+            finally:
+                # Always finish, so no caller keeps waiting on a failed refresh
+                pending.finish(succeeded)
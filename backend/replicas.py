@@ -0,0 +1,158 @@
+import itertools
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+SELECTION_POLICIES = ("round_robin", "least_connections")
+# Seconds a replica may be behind the primary and still serve reads
+DEFAULT_MAX_LAG = float(os.getenv("REPLICA_MAX_LAG", "5"))
+# Seconds between lag checks of every replica
+DEFAULT_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "2"))
+# Seconds after a write during which that user's reads stay on the primary
+DEFAULT_READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", "10"))
+
+# A replica that has replayed everything it received is current. Without the LSN comparison
+# an idle primary would make every replica look further behind by the second.
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END AS lag_seconds
+"""
+
+
+class DatabaseTarget:
+    """One database server: its engine and session factory, plus the asyncpg ones when DB_ASYNC=1."""
+
+    def __init__(self, name: str, engine, session_factory, async_engine=None, async_session_factory=None):
+        self.name = name
+        self.engine = engine
+        self.SessionLocal = session_factory
+        self.async_engine = async_engine
+        self.AsyncSessionLocal = async_session_factory
+        # Set by ReplicaRouter.check_lag(); a replica serves nothing until its first check passes
+        self.lag = None
+        self.healthy = False
+        self.last_error = None
+        self.reads = 0
+
+    def checked_out(self):
+        engine = self.async_engine.sync_engine if self.async_engine is not None else self.engine
+        return engine.pool.checkedout()
+
+
+class ReplicaRouter:
+    """Picks the database for a read: a current replica, or the primary.
+
+    A user's reads stay on the primary for a window after their last write, so they see it
+    even before it has replayed on the replicas. Replicas behind by more than max_lag, or
+    that failed their last check, are skipped; with none left, reads go to the primary.
+    """
+
+    def __init__(self, primary: DatabaseTarget, replicas, selection: str = "round_robin",
+                 max_lag: float = DEFAULT_MAX_LAG, read_your_writes_window: float = DEFAULT_READ_YOUR_WRITES_WINDOW,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL):
+        if selection not in SELECTION_POLICIES:
+            raise ValueError(f"Unknown replica selection {selection!r}, expected one of {SELECTION_POLICIES}")
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.selection = selection
+        self.max_lag = max_lag
+        self.read_your_writes_window = read_your_writes_window
+        self.check_interval = check_interval
+
+        self._recent_writes = {}  # user_id -> time.monotonic() of their last write
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.read_your_writes = 0
+        self.fallbacks = 0
+
+    def record_write(self, user_id: int):
+        with self._lock:
+            self._recent_writes[user_id] = time.monotonic()
+
+    def wrote_recently(self, user_id: int):
+        with self._lock:
+            written_at = self._recent_writes.get(user_id)
+        return written_at is not None and time.monotonic() - written_at < self.read_your_writes_window
+
+    def read_target(self, user_id: int = None):
+        if not self.replicas:
+            return self._use(self.primary)
+        if user_id is not None and self.wrote_recently(user_id):
+            self.read_your_writes += 1
+            return self._use(self.primary)
+
+        candidates = [r for r in self.replicas if r.healthy and r.lag is not None and r.lag <= self.max_lag]
+        if not candidates:
+            self.fallbacks += 1
+            return self._use(self.primary)
+        if self.selection == "least_connections":
+            return self._use(min(candidates, key=lambda r: r.checked_out()))
+        return self._use(candidates[next(self._turn) % len(candidates)])
+
+    def _use(self, target: DatabaseTarget):
+        target.reads += 1
+        return target
+
+    def check_lag(self):
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as connection:
+                    replica.lag = float(connection.execute(text(LAG_SQL)).scalar())
+                replica.healthy = True
+                replica.last_error = None
+            except Exception as e:
+                if replica.healthy:
+                    logger.warning(f"Replica {replica.name} is unavailable: {str(e)}")
+                replica.healthy = False
+                replica.last_error = str(e)
+
+        # Forget writes whose window has passed
+        cutoff = time.monotonic() - self.read_your_writes_window
+        with self._lock:
+            self._recent_writes = {user_id: t for user_id, t in self._recent_writes.items() if t >= cutoff}
+
+    def start(self):
+        if not self.replicas or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="replica-lag-check", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.check_lag()
+            self._stop.wait(self.check_interval)
+
+    def stats(self):
+        with self._lock:
+            recent_writers = len(self._recent_writes)
+        return {
+            "selection": self.selection,
+            "max_lag_seconds": self.max_lag,
+            "read_your_writes_window_seconds": self.read_your_writes_window,
+            "recent_writers": recent_writers,
+            "read_your_writes": self.read_your_writes,
+            "fallbacks": self.fallbacks,
+            "targets": [
+                {"name": t.name, "reads": t.reads, "healthy": t.healthy, "lag_seconds": t.lag,
+                 "checked_out": t.checked_out(), "last_error": t.last_error}
+                for t in self.replicas
+            ] + [{"name": self.primary.name, "reads": self.primary.reads, "checked_out": self.primary.checked_out()}],
+        }
@@ -5,23 +5,66 @@ import plotly.graph_objects as go
 import pandas as pd
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from backend.database import SessionLocal, engine
+from backend.database import SessionLocal, ReadSessionLocal, engine, replica_router
 from backend import crud
 from datetime import datetime,timedelta
 st.set_page_config(layout="wide")
+# Lag-checks the replicas so ReadSessionLocal can use them; a no-op without replicas or once running
+replica_router.start()
 # Initialize session states for user authentication
 
 def update_savings_on_login(user_id):
-    db = SessionLocal()
-    try:
+    with SessionLocal() as db:
         db.execute(text("CALL update_savings(:user_id_param)"), {"user_id_param": user_id})
         db.commit()
-    finally:
-        db.close()
 
 if 'user_id' not in st.session_state:
     st.session_state.user_id = None
 
+def conditional_get(url, params=None):
+    """GET that revalidates with the ETag of the last response for the same url and params.
+
+    An unchanged resource comes back as an empty 304 and the body kept in session_state is
+    reused. Returns (payload, response); payload is None when the request failed.
+    """
+    cache = st.session_state.setdefault("etag_cache", {})
+    key = (url, tuple(sorted((params or {}).items())))
+    cached = cache.get(key)
+    headers = {"If-None-Match": cached[0]} if cached else {}
+    response = requests.get(url, params=params, headers=headers)
+    if response.status_code == 304 and cached:
+        return cached[1], response
+    if response.status_code != 200:
+        return None, response
+    payload = response.json()
+    if "ETag" in response.headers:
+        cache[key] = (response.headers["ETag"], payload)
+    return payload, response
+
+def send_write(method, url, user_id, **kwargs):
+    """Send a write to the API and, when it succeeds, keep this user's ReadSessionLocal reads on
+    the primary for a while, so they are not served by a replica that has not replayed it yet.
+
+    The API records the write in its own process only; this records it in the frontend's.
+    """
+    response = requests.request(method, url, **kwargs)
+    if response.ok:
+        replica_router.record_write(user_id)
+    return response
+
+def fetch_all_pages(url, params=None):
+    """Follow next_cursor through a paginated list endpoint. Returns (items, response)."""
+    params = dict(params or {}, limit=1000)
+    items = []
+    while True:
+        page, response = conditional_get(url, params)
+        if page is None:
+            return items, response
+        items.extend(page["items"])
+        if not page["next_cursor"]:
+            return items, response
+        params["cursor"] = page["next_cursor"]
+
 # User Registration and Login
 def authenticate_user():
     st.title("User Authentication")
@@ -51,20 +94,15 @@ def authenticate_user():
                 st.error("Registration failed. Please try again.")
 
 
-#  Function to fetch user data
-def fetch_user_data(user_id):
-    db: Session = SessionLocal()
-    
-    # Fetch income, expenses, and savings data
-    income_query = "SELECT SUM(amount) AS total_income FROM income WHERE user_id = :user_id"
-    expenses_query = "SELECT SUM(amount) AS total_expenses FROM expenses WHERE user_id = :user_id"
-    # savings_query = "SELECT amount FROM savings WHERE user_id = :user_id"  # Assuming you have a savings table
-
-    total_income = db.execute(text(income_query), {"user_id": user_id}).scalar() or 0
-    total_expenses = db.execute(text(expenses_query), {"user_id": user_id}).scalar() or 0
-    # savings_amount = db.execute(text(savings_query), {"user_id": user_id}).scalars().all()
-    
-    return total_income, total_expenses
+#  Function to fetch the dashboard data
+def fetch_dashboard(user_id):
+    # Every widget below renders from this one payload (one consistent snapshot, one round trip)
+    # Revalidated with If-None-Match, so an unchanged dashboard costs the backend one lookup
+    dashboard, response = conditional_get(f"http://localhost:8000/dashboard/{user_id}")
+    if dashboard is not None:
+        return dashboard
+    st.error(f"Failed to load dashboard. Server response: {response.text}")
+    st.stop()
 
 
 
@@ -91,47 +129,16 @@ if "add_debt_clicked" not in st.session_state:
 
 
 
-def fetch_totals():
-    user_id=st.session_state.user_id
-    response = requests.get(f"http://localhost:8000/totals/{user_id}")
-    if response.status_code == 200:
-        return response.json()
-    return {"total_income": 0, "total_expenses": 0, "net_savings": 0}
-
-#  Fetch fresh totals on every run
-totals = fetch_totals()
-
-def populate_income_expense_summary(user_id):
-    """
-    Calls the SQL function populate_income_expense_summary to update the summary table.
-    """
-    with engine.connect() as connection:
-        connection.execute(text("SELECT populate_income_expense_summary(:user_id);"), 
-                           {"user_id": user_id})
-
-def display_income_vs_expenses_chart(user_id):
-    db: Session = SessionLocal()  # Create a new database session
-
-    # **Ensure data is updated before displaying the chart**
-    populate_income_expense_summary(user_id)
-
-    # Check if sufficient data exists
-    message = crud.check_user_data(db, user_id)
-    if message != "Data available":
-        st.warning(message)
-        return
-
-    # Fetch actual data from the database
-    data = crud.fetch_income_expense_summary(db, user_id)
-
+def display_income_vs_expenses_chart(data):
+    # income_expense_summary is kept up to date by the triggers in backend/db/triggers.sql
     if not data:
-        st.warning("No data available to display.")
+        st.warning("No income or expense data available for this user.")
         return
 
     # Prepare lists for months, income, and expenses
-    months = [f"{row.month}/{row.year}" for row in data]
-    income_data = [row.total_income for row in data]
-    expenses_data = [row.total_expenses for row in data]
+    months = [f"{row['month']}/{row['year']}" for row in data]
+    income_data = [row["total_income"] for row in data]
+    expenses_data = [row["total_expenses"] for row in data]
 
     # Create a line chart using Plotly
     fig_line = go.Figure()
@@ -163,64 +170,21 @@ def display_income_vs_expenses_chart(user_id):
 
 
 
-def display_expense_heatmap(user_id):
-    db: Session = SessionLocal()  # Create a new database session
-
-    # Fetch expense breakdown by category and month
-    query = """
-        SELECT 
-            EXTRACT(YEAR FROM e.date) AS year,
-            EXTRACT(MONTH FROM e.date) AS month,
-            e.category,
-            SUM(e.amount) AS total_expense
-        FROM 
-            expenses e
-        WHERE 
-            e.user_id = :user_id
-        GROUP BY 
-            year, month, e.category
-        ORDER BY 
-            year, month;
-    """
-    
-    result = db.execute(text(query), {"user_id": user_id}).fetchall()
-
-    if not result:
+def display_expense_heatmap(heatmap):
+    # heatmap: {"categories": [...], "months": [...], "values": [[per month] per category]}
+    if not heatmap["values"]:
         st.warning("No expense data available to display.")
         return
 
-    # Prepare data for heatmap
-    months = []
-    categories = set()
-    
-    for row in result:
-        year_month = f"{int(row.month)}/{int(row.year)}"
-        months.append(year_month)
-        categories.add(row.category)
-
-    expense_matrix = pd.DataFrame(0, index=list(categories), columns=list(set(months)))
-
-    for row in result:
-        year_month = f"{int(row.month)}/{int(row.year)}"
-        expense_matrix.at[row.category, year_month] += row.total_expense
-
-    # Reset index to use it as a column in heatmap visualization
-    expense_matrix.reset_index(inplace=True)
-    
-    # Melt the DataFrame for heatmap plotting
-    heatmap_data = pd.melt(expense_matrix, id_vars='index', value_vars=expense_matrix.columns[1:], 
-                            var_name='Month', value_name='Expense')
-    
-    heatmap_data.rename(columns={'index': 'Category'}, inplace=True)
-
-    # Create heatmap using Plotly Express
     fig_heatmap = px.imshow(
-        heatmap_data.pivot(index="Category", columns="Month", values="Expense"),
+        heatmap["values"],
+        x=heatmap["months"],
+        y=heatmap["categories"],
         labels=dict(x="Month", y="Category", color="Expense"),
         title="Expenses Heatmap by Category and Month",
         color_continuous_scale='Viridis'
     )
-    
+
     st.plotly_chart(fig_heatmap)
 
 
@@ -249,53 +213,26 @@ def display_financial_health_check(total_income, total_expenses):
 
 
 
-def display_budget_allocation(user_id):
+def display_budget_allocation(budget_vs_actual):
     # st.header("Budget Allocation")
-    
-    db: Session = SessionLocal()
-    
-    # Allow user to select a month
-    selected_month = st.selectbox("Select Month:", [
-        (datetime.today().replace(day=1) - timedelta(days=30*i)).strftime('%Y-%m')
-        for i in range(12)
-    ])
-    
-    # Query budgets (allocated amounts)
-    budget_query = """
-        SELECT category, budget_amount
-        FROM budgets
-        WHERE user_id = :user_id;
-    """
-    budget_results = db.execute(text(budget_query), {"user_id": user_id}).fetchall()
-    
-    # Query expenses for the selected month
-    expense_query = """
-        SELECT category, SUM(amount) AS total_expense
-        FROM expenses
-        WHERE user_id = :user_id
-        AND date_trunc('month', date) = date_trunc('month', TO_TIMESTAMP(:selected_month, 'YYYY-MM'))
-        GROUP BY category;
+    # budget_vs_actual holds every month at once, so switching months needs no request
+    months = budget_vs_actual["months"]
 
-    """
-    expense_results = db.execute(text(expense_query), {"user_id": user_id, "selected_month": selected_month}).fetchall()
-    
-    db.close()  # Close DB connection
-    
-    # Process budget data
-    budget_dict = {row.category: row.budget_amount for row in budget_results}
+    # Allow user to select a month
+    selected_month = st.selectbox("Select Month:", list(reversed(months)))
+    column = months.index(selected_month)
     
-    # Process expense data
+    # Categories with a budget or with spending that month
     categories = []
     budgeted = []
     spent = []
     
-    for row in expense_results:
-        category = row.category
-        actual_expense = row.total_expense
-        budgeted_amount = budget_dict.get(category, 0)  # Default to 0 if no budget set
-        
+    for category, budgeted_amount, spent_by_month in zip(budget_vs_actual["categories"], budget_vs_actual["budgeted"],
+                                                         budget_vs_actual["spent"]):
+        if not budgeted_amount and not spent_by_month[column]:
+            continue
         categories.append(category)
-        spent.append(actual_expense)
+        spent.append(spent_by_month[column])
         budgeted.append(budgeted_amount)
     
     # Create bar chart: Budget vs. Expenses
@@ -315,25 +252,16 @@ def display_budget_allocation(user_id):
 
 
 # Function to display net worth tracker
-def display_net_worth_tracker(user_id):
+def display_net_worth_tracker(net_worth):
     # st.header("Net Worth Tracker")
-    
-    query_assets = """
-        SELECT get_net_worth(:user_id)
-    """
-    
-    
-    
-    db: Session = SessionLocal()
-    
-    total_assets = db.execute(text(query_assets), {"user_id": user_id}).scalar() or 0
-    # total_liabilities = db.execute(text(query_liabilities), {"user_id": user_id}).scalar() or 0
-    total_liabilities=calculate_liabilities(user_id)
-    net_worth = total_assets - total_liabilities
+    # net_worth: {"current": {...} or None, "history": [{"day", "net_worth", ...}, ...]}
+    current = net_worth["current"]["net_worth"] if net_worth["current"] else 0
+    history = net_worth["history"]
     
     fig_net_worth = go.Figure(go.Indicator(
-        mode="number",
-        value=net_worth,
+        mode="number+delta" if history else "number",
+        value=current,
+        delta={"reference": history[0]["net_worth"]} if history else None,
         title={"text": "Net Worth"},
         number={"prefix": "$"},
         domain={'x': [0, 1], 'y': [0, 1]}
@@ -341,84 +269,22 @@ def display_net_worth_tracker(user_id):
     
     st.plotly_chart(fig_net_worth)
 
-
-
-
-# Function to calculate savings based on income and expenses
-def calculate_savings(user_id):
-    db: Session = SessionLocal()
-    
-    savings_query = """
-        SELECT 
-            year,
-            month,
-            (total_income - total_expenses) AS savings
-        FROM income_expense_summary
-        WHERE user_id = :user_id;
-    """
-    
-    results = db.execute(text(savings_query), {"user_id": user_id}).fetchall()
-    
-    return pd.DataFrame(results)
-
-
-
-
-
-def calculate_liabilities(user_id):
-    db: Session = SessionLocal()
-    
-    sql_function_call = "SELECT get_total_liabilities(:user_id) AS total_liabilities;"
-    
-    return db.execute(text(sql_function_call), {"user_id": user_id}).scalar() or 0
+    if len(history) > 1:
+        fig_history = px.line(pd.DataFrame(history), x="day", y="net_worth",
+                              labels={"day": "Date", "net_worth": "Net Worth"}, title="Net Worth (last 12 months)")
+        st.plotly_chart(fig_history)
 
 
 
 
 # Function to display savings recommendations
 
-def display_savings_recommendations(user_id):
+def display_savings_recommendations(savings):
     st.header("Savings Recommendations")
 
-    db = SessionLocal()
-
-    # Call the stored procedure to update savings before fetching data
-    db.execute(text("CALL update_savings(:user_id)"), {"user_id": user_id})
-    db.commit()  # Ensure changes are saved
-
-    # Fetch updated savings data for the current month from income_expense_summary
-    # query = """
-    #     SELECT COALESCE(SUM(total_income - total_expenses), 0) AS current_savings
-    #     FROM income_expense_summary 
-    #     WHERE user_id = :user_id 
-    #     AND year = EXTRACT(YEAR FROM CURRENT_DATE)
-    #     AND month = EXTRACT(MONTH FROM CURRENT_DATE)
-    # """
-    # current_savings_result = db.execute(text(query), {"user_id": user_id}).fetchone()
-
-    query = """
-        SELECT COALESCE(current_amount, 0) AS current_savings
-        FROM savings_goals
-        WHERE user_id = :user_id 
-        AND month = date_trunc('month', CURRENT_DATE)
-    """
-    current_savings_result = db.execute(text(query), {"user_id": user_id}).fetchone()
-
-
-
-    # Fetch goal amount from savings_goals
-    query_goal = """
-        SELECT goal_amount FROM savings_goals 
-        WHERE user_id = :user_id 
-        AND month = date_trunc('month', CURRENT_DATE)
-    """
-    goal_result = db.execute(text(query_goal), {"user_id": user_id}).fetchone()
-
-    db.close()
-
-    # Get values
-    current_savings = current_savings_result[0] if current_savings_result else 0
-    goal_amount = goal_result[0] if goal_result else 0
+    # savings_goals is refreshed by the backend after every write (CALL update_savings)
+    current_savings = savings["current_savings"]
+    goal_amount = savings["goal_amount"]
 
     recommended_savings = 0.2 * float(current_savings + goal_amount)  # Example 20% rule
 
@@ -489,10 +355,10 @@ def display_savings_recommendations(user_id):
 
 
 # Function to display total liabilities as an indicator
-def display_liabilities(user_id):
+def display_liabilities(balance_sheet):
     # st.header("Total Liabilities")
     
-    total_liabilities = calculate_liabilities(user_id)
+    total_liabilities = balance_sheet["total_liabilities"]
     
     fig_liabilities = go.Figure(go.Indicator(
         mode="number",
@@ -506,16 +372,11 @@ def display_liabilities(user_id):
 
 
 # Function to display net financial position
-def display_net_financial_position(user_id):
+def display_net_financial_position(months, balance_sheet):
     st.header("Net Financial Position (Current Savings - Total Liabilities)")
     
-    # total_income, total_expenses = fetch_user_data(user_id)
-    
-    # Calculate savings
-    savings_df = calculate_savings(user_id)
-    
-    # Calculate liabilities
-    total_liabilities = calculate_liabilities(user_id)
+    savings_df = pd.DataFrame(months, columns=["year", "month", "total_income", "total_expenses", "savings"])
+    total_liabilities = balance_sheet["total_liabilities"]
     
     # Calculate net financial position for each month
     net_financial_positions = []
@@ -543,21 +404,11 @@ def display_net_financial_position(user_id):
     st.plotly_chart(fig_net_position)
 
 # Function to display debt management insights
-def display_debt_management(user_id):
+def display_debt_management(balance_sheet):
     st.header("Debt Management Insights")
     
-    query_debt = """
-        SELECT category, SUM(amount) AS total_debt 
-        FROM debts 
-        WHERE user_id = :user_id 
-        GROUP BY category;
-    """
-    
-    db: Session = SessionLocal()
-    results_debt = db.execute(text(query_debt), {"user_id": user_id}).fetchall()
-    
-    debt_categories = [row.category for row in results_debt]
-    debts = [row.total_debt for row in results_debt]
+    debt_categories = [row["category"] for row in balance_sheet["debts"]]
+    debts = [row["total"] for row in balance_sheet["debts"]]
     total_debt = sum(debts)  # Calculate total debt value
     
     fig_debt_pie = go.Figure(data=[go.Pie(labels=debt_categories, values=debts)])
@@ -580,19 +431,11 @@ def display_debt_management(user_id):
 
 
 # Function to display asset management insights
-def display_asset_management(user_id):
+def display_asset_management(balance_sheet):
     st.header("Asset Management Insights")
 
-    # query to fetch category-wise asset values
-    query_assets = "SELECT * FROM get_assets_by_category(:user_id);"
-
-
-    db: Session = SessionLocal()
-    results_assets = db.execute(text(query_assets), {"user_id": user_id}).fetchall()
-
-    # Correctly extracting values from tuples
-    asset_categories = [row[0] for row in results_assets]  # row[0] is 'category'
-    asset_values = [row[1] for row in results_assets]  # row[1] is 'total_value'
+    asset_categories = [row["category"] for row in balance_sheet["assets"]]
+    asset_values = [row["total"] for row in balance_sheet["assets"]]
     total_assets = sum(asset_values)  # Calculate total asset value
     
     fig_assets_pie = go.Figure(data=[go.Pie(labels=asset_categories, values=asset_values)])
@@ -613,11 +456,10 @@ def display_asset_management(user_id):
 
 
 def delete_income(user_id):
-    db = SessionLocal()
-    income_entries = db.execute("""
-        SELECT id, source, amount, date FROM income WHERE user_id = :user_id
-    """, {"user_id": user_id}).fetchall()
-    db.close()
+    with ReadSessionLocal(user_id) as db:
+        income_entries = db.execute(text("""
+            SELECT id, source, amount, date FROM income WHERE user_id = :user_id
+        """), {"user_id": user_id}).fetchall()
     
     if not income_entries:
         st.warning("No income entries found.")
@@ -627,21 +469,20 @@ def delete_income(user_id):
                                    [f"{entry.id}: {entry.source} - ${entry.amount} ({entry.date})" for entry in income_entries])
     
     if st.button("Delete Income"):
-        db = SessionLocal()
         income_id = int(selected_income.split(':')[0])
-        db.execute("DELETE FROM income WHERE id = :income_id", {"income_id": income_id})
-        db.commit()
-        db.close()
-        st.success("Income deleted successfully!")
-        st.rerun()
+        response = send_write("delete", f"http://localhost:8000/income/{user_id}", user_id, json={"ids": [income_id]})
+        if response.status_code == 200:
+            st.success("Income deleted successfully!")
+            st.rerun()
+        else:
+            st.error(f"Failed to delete income. Server response: {response.text}")
 
 
 def delete_expense(user_id):
-    db = SessionLocal()
-    expense_entries = db.execute("""
-        SELECT id, category, amount, date FROM expenses WHERE user_id = :user_id
-    """, {"user_id": user_id}).fetchall()
-    db.close()
+    with ReadSessionLocal(user_id) as db:
+        expense_entries = db.execute(text("""
+            SELECT id, category, amount, date FROM expenses WHERE user_id = :user_id
+        """), {"user_id": user_id}).fetchall()
     
     if not expense_entries:
         st.warning("No expense entries found.")
@@ -651,13 +492,13 @@ def delete_expense(user_id):
                                     [f"{entry.id}: {entry.category} - ${entry.amount} ({entry.date})" for entry in expense_entries])
     
     if st.button("Delete Expense"):
-        db = SessionLocal()
         expense_id = int(selected_expense.split(':')[0])
-        db.execute("DELETE FROM expenses WHERE id = :expense_id", {"expense_id": expense_id})
-        db.commit()
-        db.close()
-        st.success("Expense deleted successfully!")
-        st.rerun()
+        response = send_write("delete", f"http://localhost:8000/expenses/{user_id}", user_id, json={"ids": [expense_id]})
+        if response.status_code == 200:
+            st.success("Expense deleted successfully!")
+            st.rerun()
+        else:
+            st.error(f"Failed to delete expense. Server response: {response.text}")
 
 
 
@@ -667,13 +508,9 @@ if not st.session_state.user_id:
 else:
     user_id = st.session_state.user_id
 
-    # Fetch financial summary data
-    response_summary = requests.get(f"http://localhost:8000/financial-summary/{user_id}")
-    financial_summary = response_summary.json() if response_summary.status_code == 200 else {}
-
-    # Fetch expense breakdown data
-    response_expenses = requests.get(f"http://localhost:8000/expense-breakdown/{user_id}")
-    expense_data = response_expenses.json()["categories"] if response_expenses.status_code == 200 else []
+    dashboard = fetch_dashboard(user_id)
+    financial_summary = dashboard["totals"]
+    expense_data = dashboard["expense_breakdown"]
 
     
 
@@ -723,14 +560,12 @@ else:
     # ------------------------------
     
     # Display Income vs Expenses Chart
-    # populate_income_expense_summary(st.session_state.user_id)
-
     col_left, col_middle, col_right = st.columns([1, 1, 1])
 
     # Left Column: Income vs. Expenses Over Time
     with col_left:
         # st.subheader("Income vs. Expenses Over Time")
-        display_income_vs_expenses_chart(st.session_state.user_id)  # Call the function that plots this chart
+        display_income_vs_expenses_chart(dashboard["months"])  # Call the function that plots this chart
         
         # -------------------- Add Expense Button--------------------
         if st.button("Add Expense"):
@@ -745,7 +580,7 @@ else:
             if st.button("Submit Expense"):
                 payload = {"category": category, "amount": amount,"date":str(date)}
 
-                response = requests.post(f"http://localhost:8000/add-expense/{user_id}", json=payload)
+                response = send_write("post", f"http://localhost:8000/add-expense/{user_id}", user_id, json=payload)
                 
                 if response.status_code == 201:
                     st.success("Expense added successfully!")
@@ -758,7 +593,11 @@ else:
     # Middle Column: Expenses Heatmap
     with col_middle:
         # st.subheader("Expenses Heatmap")
-        display_expense_heatmap(st.session_state.user_id)  # Call the function that plots this chart
+        heatmap, response = conditional_get(f"http://localhost:8000/expense-heatmap/{user_id}")
+        if heatmap is not None:
+            display_expense_heatmap(heatmap)  # Call the function that plots this chart
+        else:
+            st.error(f"Failed to load expense heatmap. Server response: {response.text}")
         
         # -------------------- Add Income Button--------------------
         if st.button("Add Income"):
@@ -771,7 +610,7 @@ else:
             date = st.date_input("Date", value=datetime.today()) 
 
             if st.button("Submit Income"):
-                response = requests.post(f"http://localhost:8000/add-income/{user_id}", json={"source": source, "amount": amount_income,"date":str(date)})
+                response = send_write("post", f"http://localhost:8000/add-income/{user_id}", user_id, json={"source": source, "amount": amount_income,"date":str(date)})
                 if response.status_code ==201:
                     st.success("Income added successfully!")
                     st.rerun()
@@ -800,16 +639,17 @@ else:
 
 
     
-    total_income, total_expenses = fetch_user_data(user_id)
+    total_income = financial_summary["total_income"]
+    total_expenses = financial_summary["total_expenses"]
     col_left1, col_middle1, col_right1 = st.columns([1, 1, 1])
 
     # Display all sections
     with col_left1:
-        display_savings_recommendations(user_id)
+        display_savings_recommendations(dashboard["savings"])
     with col_middle1:
-        display_liabilities(user_id)
+        display_liabilities(dashboard["balance_sheet"])
     with col_right1:
-        display_net_financial_position(user_id)
+        display_net_financial_position(dashboard["months"], dashboard["balance_sheet"])
 
 
 
@@ -828,7 +668,7 @@ else:
             budget_amount = st.number_input("Budget Amount", min_value=0.01, key="budget_amount")
 
             if st.button("Submit Budget"):
-                response = requests.post(f"http://localhost:8000/budgets/{user_id}", json={"category": budget_category, "budget_amount": budget_amount})
+                response = send_write("post", f"http://localhost:8000/budgets/{user_id}", user_id, json={"category": budget_category, "budget_amount": budget_amount})
                 if response.status_code == 201:
                     st.success("Budget created successfully!")
                 else:
@@ -836,7 +676,11 @@ else:
 
 
     with col_middle2:
-        display_budget_allocation(user_id)
+        budget_vs_actual, response = conditional_get(f"http://localhost:8000/budget-vs-actual/{user_id}", {"months": 12})
+        if budget_vs_actual is not None:
+            display_budget_allocation(budget_vs_actual)
+        else:
+            st.error(f"Failed to load budget vs actual. Server response: {response.text}")
 
         # -------------------- Update Budget --------------------
         if st.button("Update Budget"):
@@ -863,8 +707,8 @@ else:
 
             if st.button("Submit Update") and budget_id_to_update is not None:
                 payload = {"new_amount": new_budget_amount}  # Matches the Pydantic model
-                response = requests.put(
-                    f"http://localhost:8000/budgets/{budget_id_to_update}", json=payload
+                response = send_write(
+                    "put", f"http://localhost:8000/budgets/{budget_id_to_update}", user_id, json=payload
                 )
                 if response.status_code == 200:
                     st.success("Budget updated successfully!")
@@ -874,7 +718,12 @@ else:
 
 
     with col_right2:
-        display_net_worth_tracker(user_id)
+        net_worth, response = conditional_get(f"http://localhost:8000/net-worth/{user_id}",
+                                              {"from": (datetime.today() - timedelta(days=365)).date().isoformat()})
+        if net_worth is not None:
+            display_net_worth_tracker(net_worth)
+        else:
+            st.error(f"Failed to load net worth. Server response: {response.text}")
         # -------------------- Delete Budget --------------------
 
         # if st.button("Delete Budget"):
@@ -927,7 +776,7 @@ else:
                 budget_id_to_delete = category_options[selected_category]
 
                 if st.button("Confirm Deletion"):
-                    response = requests.delete(f"http://localhost:8000/budgets/{budget_id_to_delete}")
+                    response = send_write("delete", f"http://localhost:8000/budgets/{budget_id_to_delete}", user_id)
                     if response.status_code == 200:
                         st.success("Budget deleted successfully!")
                         st.rerun()
@@ -936,7 +785,7 @@ else:
 
     col_left3,col_right3=st.columns([1,1])
     with col_left3:
-        display_asset_management(user_id)
+        display_asset_management(dashboard["balance_sheet"])
 
         # Add asset
         if st.button("Add Asset"):
@@ -948,7 +797,7 @@ else:
             asset_value = st.number_input("Asset Value", key="asset_value")
             date_asset_added=st.date_input("Date Incurred", datetime.today(), key="date_asset_added")
             if st.button("Submit Asset"):
-                response = requests.post(f"http://localhost:8000/assets/{user_id}", json={"category": asset_category, "value": asset_value,"date_added":str(date_asset_added)})
+                response = send_write("post", f"http://localhost:8000/assets/{user_id}", user_id, json={"category": asset_category, "value": asset_value,"date_added":str(date_asset_added)})
                 if response.status_code == 201:
                     st.success("Asset added successfully!")
                     st.rerun()
@@ -961,9 +810,9 @@ else:
             st.session_state.delete_asset_clicked = not st.session_state.get("delete_asset_clicked", False)
 
         if st.session_state.get("delete_asset_clicked", False):
-            response = requests.get(f"http://localhost:8000/assets/{user_id}")
-            if response.status_code == 200:
-                assets = response.json()  # Expecting [{"id": 1, "category": "Savings"}, ...]
+            assets, response = fetch_all_pages(f"http://localhost:8000/assets/{user_id}")
+            if response.ok:
+                # Expecting [{"id": 1, "category": "Savings"}, ...]
                 asset_options = {a["category"]: a["id"] for a in assets}  # Map category to ID
             else:
                 st.error("Failed to fetch assets.")
@@ -973,7 +822,7 @@ else:
 
             if st.button("Confirm Deletion"):
                 asset_id_to_delete = asset_options[selected_asset]
-                response = requests.delete(f"http://localhost:8000/assets/{asset_id_to_delete}")
+                response = send_write("delete", f"http://localhost:8000/assets/{asset_id_to_delete}", user_id)
                 if response.status_code == 200:
                     st.success("Asset deleted successfully!")
                     st.rerun()
@@ -982,7 +831,7 @@ else:
                 
     
     with col_right3:
-        display_debt_management(user_id)
+        display_debt_management(dashboard["balance_sheet"])
         # Add Debt
         if st.button("Add Debt"):
             st.session_state.add_debt_clicked = not st.session_state.get("add_debt_clicked", False)
@@ -994,7 +843,7 @@ else:
 
 
             if st.button("Submit Debt"):
-                response = requests.post(f"http://localhost:8000/debts/{user_id}", json={"category": debt_category, "amount": debt_amount, "date_incurred":str(date_incurred)})
+                response = send_write("post", f"http://localhost:8000/debts/{user_id}", user_id, json={"category": debt_category, "amount": debt_amount, "date_incurred":str(date_incurred)})
                 if response.status_code == 201:
                     st.success("Debt added successfully!")
                     st.rerun()
@@ -1007,9 +856,9 @@ else:
             st.session_state.delete_debt_clicked = not st.session_state.get("delete_debt_clicked", False)
 
         if st.session_state.get("delete_debt_clicked", False):
-            response = requests.get(f"http://localhost:8000/debts/{user_id}")
-            if response.status_code == 200:
-                debts = response.json()  # Expecting [{"id": 1, "category": "Credit Card"}, ...]
+            debts, response = fetch_all_pages(f"http://localhost:8000/debts/{user_id}")
+            if response.ok:
+                # Expecting [{"id": 1, "category": "Credit Card"}, ...]
                 debt_options = {d["category"]: d["id"] for d in debts}  # Map category to ID
             else:
                 st.error("Failed to fetch debts.")
@@ -1019,7 +868,7 @@ else:
 
             if st.button("Confirm Deletion"):
                 debt_id_to_delete = debt_options[selected_debt]
-                response = requests.delete(f"http://localhost:8000/debts/{debt_id_to_delete}")
+                response = send_write("delete", f"http://localhost:8000/debts/{debt_id_to_delete}", user_id)
                 if response.status_code == 200:
                     st.success("Debt deleted successfully!")
                     st.rerun()
@@ -1030,11 +879,10 @@ else:
 
 
 def delete_income(user_id):
-    db = SessionLocal()
-    income_entries = db.execute("""
-        SELECT id, category, amount, date FROM income WHERE user_id = :user_id
-    """, {"user_id": user_id}).fetchall()
-    db.close()
+    with ReadSessionLocal(user_id) as db:
+        income_entries = db.execute(text("""
+            SELECT id, category, amount, date FROM income WHERE user_id = :user_id
+        """), {"user_id": user_id}).fetchall()
     
     if not income_entries:
         st.warning("No income entries found.")
@@ -1044,11 +892,11 @@ def delete_income(user_id):
                                    [f"{entry.id}: {entry.category} - ${entry.amount} ({entry.date})" for entry in income_entries])
     
     if st.button("Delete Income"):
-        db = SessionLocal()
         income_id = int(selected_income.split(':')[0])
-        db.execute("DELETE FROM income WHERE id = :income_id", {"income_id": income_id})
-        db.commit()
-        db.close()
+        with SessionLocal() as db:
+            db.execute(text("DELETE FROM income WHERE id = :income_id"), {"income_id": income_id})
+            db.commit()
+        replica_router.record_write(user_id)
         st.success("Income deleted successfully!")
         st.rerun()
 
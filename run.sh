@@ -2,6 +2,10 @@
 
 # If running this gives a permission denied error run this command before ./run.sh : chmod +x run.sh
 
+# Apply pending database migrations
+echo "Applying database migrations..."
+python -m backend.migrate || exit 1
+
 # Start FastAPI backend
 echo "Starting FastAPI backend..."
 cd backend
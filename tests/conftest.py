@@ -0,0 +1,170 @@
+"""Shared fixtures.
+
+Most tests need PostgreSQL (the triggers, plpgsql functions and migrations are the behaviour
+under test) and are skipped unless TEST_DATABASE_URL points at a database they may wipe:
+
+    TEST_DATABASE_URL=postgresql://postgres@localhost/finance_test python -m pytest -q
+
+The database gets the hand-made schema the app started from (BASE_SCHEMA_SQL), then every
+migration, as an existing deployment would.
+"""
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+
+# backend/main.py imports its siblings bare, as it does when uvicorn runs from backend/
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, ROOT)
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+# Background workers are started by the tests that need them
+for flag in ("RECURRING_SCHEDULER", "NET_WORTH_CLOSER", "CHANGE_LISTENER"):
+    os.environ[flag] = "0"
+
+requires_postgres = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL is not set")
+
+# The tables that were created by hand with psql before backend/db/migrations existed
+BASE_SCHEMA_SQL = """
+    CREATE TABLE users (id SERIAL PRIMARY KEY, username VARCHAR UNIQUE, password VARCHAR);
+    CREATE TABLE expenses (
+        id SERIAL PRIMARY KEY, user_id INT REFERENCES users(id) ON DELETE CASCADE,
+        category VARCHAR, amount DOUBLE PRECISION, date DATE NOT NULL
+    );
+    CREATE TABLE income (
+        id SERIAL PRIMARY KEY, user_id INT REFERENCES users(id) ON DELETE CASCADE,
+        source VARCHAR, amount DOUBLE PRECISION, date DATE NOT NULL
+    );
+    CREATE TABLE budgets (
+        id SERIAL PRIMARY KEY, user_id INT REFERENCES users(id) ON DELETE CASCADE,
+        category VARCHAR, budget_amount DOUBLE PRECISION
+    );
+    CREATE TABLE assets (
+        id SERIAL PRIMARY KEY, user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        category VARCHAR(50) NOT NULL, value NUMERIC NOT NULL, date_added DATE DEFAULT CURRENT_DATE
+    );
+    CREATE TABLE debts (
+        id SERIAL PRIMARY KEY, user_id INT NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+        category VARCHAR(50) NOT NULL, amount NUMERIC NOT NULL, date_incurred DATE DEFAULT CURRENT_DATE
+    );
+    CREATE TABLE income_expense_summary (
+        user_id INT REFERENCES users(id) ON DELETE CASCADE, year INT, month INT,
+        total_income DECIMAL(12,2) DEFAULT 0, total_expenses DECIMAL(12,2) DEFAULT 0,
+        UNIQUE (user_id, year, month)
+    );
+    CREATE TABLE savings_goals (
+        user_id INT REFERENCES users(id) ON DELETE CASCADE, goal_amount DECIMAL(10,2),
+        current_amount DECIMAL(10,2), month DATE,
+        UNIQUE (user_id, month)
+    );
+"""
+
+# Everything a test may have written; users cascades to the rest
+TRUNCATE_SQL = "TRUNCATE users, category_rules RESTART IDENTITY CASCADE"
+
+
+def build_base_schema(engine, schema: str = "public"):
+    """(Re)create schema with just the hand-made tables; engine's search_path must lead to it."""
+    from backend.migrate import split_statements
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        for statement in split_statements(BASE_SCHEMA_SQL):
+            cursor.execute(statement)
+        connection.commit()
+    finally:
+        connection.close()
+
+
+@pytest.fixture(scope="session")
+def engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from sqlalchemy import create_engine
+    from backend.migrate import migrate
+
+    engine = create_engine(TEST_DATABASE_URL)
+    build_base_schema(engine)
+    migrate(engine, probe=False)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    from sqlalchemy import text
+    from sqlalchemy.orm import sessionmaker
+
+    with engine.begin() as connection:
+        connection.execute(text(TRUNCATE_SQL))
+    session = sessionmaker(bind=engine, autoflush=False)()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def user_id(db):
+    from sqlalchemy import text
+
+    user_id = db.execute(text("INSERT INTO users (username, password) VALUES ('alice', 'x') RETURNING id")).scalar()
+    db.commit()
+    return user_id
+
+
+@pytest.fixture
+def client(db):
+    from fastapi.testclient import TestClient
+    import main
+
+    main.read_cache.clear()
+    with TestClient(main.app) as client:
+        yield client
+
+
+def apply_random_writes(db, user_ids, steps: int = 200, seed: int = 0):
+    """Random single-row and bulk inserts, updates and deletes on expenses and income.
+
+    Updates move rows across days, months, users and labels, so the trigger-maintained
+    rollups see every kind of delta. Amounts are whole numbers, so sums compare exactly.
+    """
+    import random
+    from datetime import date, timedelta
+    from sqlalchemy import text
+
+    rng = random.Random(seed)
+    labels = {"expenses": ("category", ["Food", "Rent", "Travel", None]),
+              "income": ("source", ["Salary", "Bonus", None])}
+
+    def random_day():
+        return date(2023, 11, 1) + timedelta(days=rng.randrange(120))
+
+    for _ in range(steps):
+        table = rng.choice(["expenses", "income"])
+        label_column, label_values = labels[table]
+        action = rng.random()
+        if action < 0.45:
+            rows = [{"u": rng.choice(user_ids), "l": rng.choice(label_values), "a": rng.randrange(1, 500),
+                     "d": random_day()} for _ in range(rng.choice([1, 1, 3]))]
+            db.execute(text(f"INSERT INTO {table} (user_id, {label_column}, amount, date) VALUES (:u, :l, :a, :d)"),
+                       rows)
+        elif action < 0.8:
+            row_id = db.execute(text(f"SELECT id FROM {table} ORDER BY random() LIMIT 1")).scalar()
+            if row_id is not None:
+                db.execute(text(f"UPDATE {table} SET user_id = :u, {label_column} = :l, amount = :a, date = :d "
+                                f"WHERE id = :id"),
+                           {"id": row_id, "u": rng.choice(user_ids), "l": rng.choice(label_values),
+                            "a": rng.randrange(1, 500), "d": random_day()})
+        elif action < 0.95:
+            db.execute(text(f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} ORDER BY random() LIMIT 1)"))
+        else:
+            # A bulk statement spanning several users and months
+            db.execute(text(f"DELETE FROM {table} WHERE date >= :d"), {"d": random_day()})
+        if rng.random() < 0.3:
+            db.commit()
+    db.commit()
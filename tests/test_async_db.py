@@ -0,0 +1,41 @@
+import asyncio
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+
+import async_db
+from backend.replicas import DatabaseTarget
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+
+def _count_expenses(session, user_id, minimum=0):
+    count = session.execute(text("SELECT count(*) FROM expenses WHERE user_id = :u AND amount >= :m"),
+                            {"u": user_id, "m": minimum}).scalar()
+    return count, threading.get_ident(), session
+
+
+def test_run_calls_crud_functions_in_the_threadpool_with_the_request_session(engine, db, user_id):
+    assert not async_db.ASYNC_ENABLED
+    db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Food', 5, '2025-01-01'), "
+                    "(:u, 'Rent', 500, '2025-01-01')"), {"u": user_id})
+    db.commit()
+
+    async def scenario():
+        database = async_db.AsyncDB(DatabaseTarget("test", engine, sessionmaker(bind=engine)))
+        try:
+            assert isinstance(database.session, Session)
+            first = await database.run(_count_expenses, user_id)
+            second = await database.run(_count_expenses, user_id, minimum=100)
+            await database.rollback()
+            return threading.get_ident(), database.session, first, second
+        finally:
+            await database.close()
+
+    loop_thread, session, (count, fn_thread, fn_session), (large, _, _) = asyncio.run(scenario())
+    assert (count, large) == (2, 1)
+    assert fn_session is session
+    # The blocking query did not run on the event loop's thread
+    assert fn_thread != loop_thread
@@ -0,0 +1,74 @@
+from sqlalchemy import text
+
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+
+def _expense(user_id, amount, day="2024-01-10"):
+    return {"op": "add_expense", "args": {"user_id": user_id, "amount": amount, "category": "Food", "date": day}}
+
+
+def _counts(db, user_id):
+    return (db.execute(text("SELECT COUNT(*) FROM expenses WHERE user_id = :u"), {"u": user_id}).scalar(),
+            db.execute(text("SELECT COUNT(*) FROM budgets WHERE user_id = :u"), {"u": user_id}).scalar(),
+            db.execute(text("SELECT COALESCE(SUM(total_expenses), 0) FROM income_expense_summary WHERE user_id = :u"),
+                       {"u": user_id}).scalar())
+
+
+def test_atomic_batch_commits_everything(client, db, user_id):
+    response = client.post("/batch", json={"operations": [
+        _expense(user_id, 10),
+        _expense(user_id, 15),
+        {"op": "create_budget", "args": {"user_id": user_id, "category": "Food", "budget_amount": 100}},
+    ]})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["succeeded"], body["failed"], body["affected_users"]) == (3, 0, [user_id])
+    assert body["totals"][str(user_id)]["total_expenses"] == 25
+    db.rollback()
+    assert _counts(db, user_id) == (2, 1, 25)
+
+
+def test_atomic_batch_rolls_back_every_operation_on_failure(client, db, user_id):
+    version = db.execute(text("SELECT version FROM user_data_versions WHERE user_id = :u"), {"u": user_id}).scalar()
+
+    response = client.post("/batch", json={"operations": [
+        _expense(user_id, 10),
+        {"op": "create_budget", "args": {"user_id": user_id, "category": "Food", "budget_amount": 100}},
+        {"op": "delete_budget", "args": {"budget_id": 999999}},
+        _expense(user_id, 20),
+    ]})
+    assert response.status_code == 400
+    detail = response.json()["detail"]
+    assert (detail["message"], detail["index"], detail["op"]) == ("Batch rolled back", 2, "delete_budget")
+
+    db.rollback()
+    assert _counts(db, user_id) == (0, 0, 0)
+    # The triggers' writes went with the rest of the transaction
+    assert db.execute(text("SELECT version FROM user_data_versions WHERE user_id = :u"),
+                      {"u": user_id}).scalar() == version
+
+
+def test_non_atomic_batch_rolls_back_only_the_failed_operation(client, db, user_id):
+    response = client.post("/batch", json={"atomic": False, "operations": [
+        _expense(user_id, 10),
+        {"op": "delete_budget", "args": {"budget_id": 999999}},
+        {"op": "no_such_op", "args": {}},
+        {"op": "add_expense", "args": {"user_id": user_id}},
+        _expense(user_id, 20, day="2024-02-01"),
+    ]})
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [r["status"] for r in body["results"]] == ["ok", "error", "error", "error", "ok"]
+    assert body["totals"][str(user_id)]["total_expenses"] == 30
+
+    db.rollback()
+    assert _counts(db, user_id) == (2, 0, 30)
+
+
+def test_batch_size_is_capped(client, user_id):
+    import main
+
+    operations = [_expense(user_id, 1)] * (main.MAX_BATCH_OPERATIONS + 1)
+    assert client.post("/batch", json={"operations": operations}).status_code == 413
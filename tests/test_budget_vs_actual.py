@@ -0,0 +1,28 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from backend import crud
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+
+def test_budget_vs_actual_groups_months_and_uncategorized_rows(db, user_id):
+    for category, amount in (("Food", 100), ("Food", 50), (None, 30), ("", 5)):
+        db.execute(text("INSERT INTO budgets (user_id, category, budget_amount) VALUES (:u, :c, :a)"),
+                   {"u": user_id, "c": category, "a": amount})
+    for category, amount, day in (("Food", 20, date(2024, 2, 3)), ("Food", 5, date(2024, 3, 9)),
+                                  (None, 7, date(2024, 3, 1)), ("", 1, date(2024, 3, 2)),
+                                  ("Rent", 900, date(2024, 3, 1)),
+                                  ("Food", 999, date(2023, 12, 31))):
+        db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, :c, :a, :d)"),
+                   {"u": user_id, "c": category, "a": amount, "d": day})
+    db.commit()
+
+    result = crud.get_budget_vs_actual_db(db, user_id, 3, as_of=date(2024, 3, 15))
+
+    assert result["months"] == ["2024-01", "2024-02", "2024-03"]
+    assert result["categories"] == ["Food", "Rent", "Uncategorized"]
+    assert result["budgeted"] == [150, 0, 35]
+    assert result["spent"] == [[0, 20, 5], [0, 0, 900], [0, 0, 8]]
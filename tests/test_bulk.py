@@ -0,0 +1,57 @@
+from sqlalchemy import text
+
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+
+def _counts(db, user_id):
+    db.rollback()
+    return (db.execute(text("SELECT COUNT(*) FROM expenses WHERE user_id = :u"), {"u": user_id}).scalar(),
+            db.execute(text("SELECT COALESCE(SUM(total_expenses), 0) FROM income_expense_summary WHERE user_id = :u"),
+                       {"u": user_id}).scalar())
+
+
+def test_bulk_insert_keeps_valid_rows_and_reports_invalid_ones(client, db, user_id):
+    rows = [{"category": "Food", "amount": 10, "date": f"2024-01-{day:02d}"} for day in range(1, 31)]
+    rows.insert(3, {"category": "Food", "amount": "lots", "date": "2024-01-01"})
+    rows.append({"category": "Rent", "date": "2024-02-01"})
+
+    response = client.post(f"/expenses/bulk/{user_id}?wait=true", json=rows)
+    assert response.status_code == 201, response.text
+    body = response.json()
+    assert (body["inserted"], body["rejected"]) == (30, 2)
+    assert [error["index"] for error in body["errors"]] == [3, 31]
+    assert _counts(db, user_id) == (30, 300)
+
+
+def test_bulk_insert_rolls_back_every_row_when_the_statement_fails(client, db, user_id):
+    client.post(f"/expenses/bulk/{user_id}", json=[{"category": "Food", "amount": 5, "date": "2024-01-01"}])
+    assert _counts(db, user_id) == (1, 5)
+
+    # Valid for the request model, but overflows the monthly summary, which fails the whole insert
+    rows = [{"category": "Food", "amount": 10, "date": "2024-01-02"} for _ in range(100)]
+    rows.append({"category": "Food", "amount": 1e15, "date": "2024-03-01"})
+    response = client.post(f"/expenses/bulk/{user_id}", json=rows)
+    assert response.status_code == 400
+    assert _counts(db, user_id) == (1, 5)
+
+    # The session is usable again after the rollback
+    response = client.post(f"/income/bulk/{user_id}", json=[{"source": "Salary", "amount": 100, "date": "2024-01-31"}])
+    assert response.status_code == 201, response.text
+    assert response.json()["inserted"] == 1
+
+
+def test_bulk_insert_for_an_unknown_user_inserts_nothing(client, db, user_id):
+    response = client.post("/income/bulk/999999", json=[{"source": "Salary", "amount": 100, "date": "2024-01-31"}])
+    assert response.status_code == 400
+    db.rollback()
+    assert db.execute(text("SELECT COUNT(*) FROM income")).scalar() == 0
+
+
+def test_bulk_insert_size_is_capped(client, user_id, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "MAX_BULK_ROWS", 2)
+    rows = [{"source": "Salary", "amount": 1, "date": "2024-01-01"}] * 3
+    assert client.post(f"/income/bulk/{user_id}", json=rows).status_code == 413
@@ -0,0 +1,101 @@
+import asyncio
+import time
+
+from backend.cache import ReadCache
+
+
+def test_evicts_the_least_recently_used_entry():
+    cache = ReadCache(max_entries=2, ttl=60)
+    cache.set(("a", 1), 1, "a")
+    cache.set(("b", 1), 1, "b")
+    assert cache.get(("a", 1)) == (True, "a")  # b is now the least recently used
+
+    cache.set(("c", 2), 2, "c")
+    assert cache.get(("b", 1)) == (False, None)
+    assert cache.get(("a", 1)) == (True, "a")
+    assert cache.get(("c", 2)) == (True, "c")
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["entries"] == 2
+
+
+def test_setting_an_existing_key_replaces_it_without_evicting():
+    cache = ReadCache(max_entries=2, ttl=60)
+    cache.set(("a", 1), 1, "old")
+    cache.set(("b", 1), 1, "b")
+    cache.set(("a", 1), 1, "new")
+    assert cache.get(("a", 1)) == (True, "new")
+    assert cache.get(("b", 1)) == (True, "b")
+    assert cache.stats()["evictions"] == 0
+
+
+def test_entries_expire_after_the_ttl():
+    cache = ReadCache(ttl=0.05)
+    cache.set(("a", 1), 1, "a")
+    assert cache.get(("a", 1)) == (True, "a")
+
+    time.sleep(0.1)
+    assert cache.get(("a", 1)) == (False, None)
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["entries"] == 0
+    assert stats["users"] == 0
+
+
+def test_invalidate_user_drops_only_that_users_entries():
+    cache = ReadCache()
+    cache.set(("summary", 1), 1, "one")
+    cache.set(("dashboard", 1), 1, "one")
+    cache.set(("summary", 2), 2, "two")
+
+    assert cache.invalidate_user(1) == 2
+    assert cache.get(("summary", 1)) == (False, None)
+    assert cache.get(("dashboard", 1)) == (False, None)
+    assert cache.get(("summary", 2)) == (True, "two")
+    assert cache.invalidate_user(1) == 0
+
+
+def test_a_read_started_before_an_invalidation_is_not_stored():
+    cache = ReadCache()
+    generation = cache.generation(1)
+    cache.invalidate_user(1)
+    assert not cache.set(("summary", 1), 1, "stale", generation)
+    assert cache.get(("summary", 1)) == (False, None)
+
+    # Other users' generations are untouched
+    assert cache.set(("summary", 2), 2, "two", cache.generation(2))
+
+
+def test_clear_drops_everything_and_in_flight_reads():
+    cache = ReadCache()
+    cache.set(("summary", 1), 1, "one")
+    cache.set(("summary", 2), 2, "two")
+    generation = cache.generation(2)
+
+    cache.clear()
+    assert cache.get(("summary", 1)) == (False, None)
+    assert cache.get(("summary", 2)) == (False, None)
+    assert not cache.set(("summary", 2), 2, "stale", generation)
+    assert cache.stats()["entries"] == 0
+
+
+def test_get_or_load_calls_the_loader_once():
+    cache = ReadCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return "value"
+
+    assert cache.get_or_load(("summary", 1), 1, loader) == "value"
+    assert cache.get_or_load(("summary", 1), 1, loader) == "value"
+    assert len(calls) == 1
+
+    async def async_loader():
+        calls.append(1)
+        return "async value"
+
+    assert asyncio.run(cache.get_or_load_async(("dashboard", 1), 1, async_loader)) == "async value"
+    assert asyncio.run(cache.get_or_load_async(("dashboard", 1), 1, async_loader)) == "async value"
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
@@ -0,0 +1,62 @@
+import pytest
+
+from backend.categorizer import Categorizer, Rule, needs_own_regex, validate_pattern
+
+
+def _categorizer(*rules):
+    return Categorizer([Rule(i, pattern, match_type, category, (0, i)) for i, (pattern, match_type, category)
+                        in enumerate(rules)])
+
+
+def test_best_ranked_rule_wins_across_match_types():
+    categorizer = _categorizer(("^pos ", "regex", "Card"), ("uber eats", "substring", "Food"),
+                               ("uber", "prefix", "Transport"))
+    assert categorizer.classify_category("POS UBER EATS 123") == "Card"
+    assert categorizer.classify_category("Uber Eats order") == "Food"
+    assert categorizer.classify_category("Uber trip") == "Transport"
+    assert categorizer.classify_category("Rent", default="Other") == "Other"
+
+
+def test_backreferences_keep_their_own_group_numbers():
+    # Neither rule has a required literal, so without separate compilation both would be
+    # joined into one alternation and \1 would refer to the first rule's group
+    categorizer = _categorizer(("^[0-9]+ x$", "regex", "Numbered"), (r"(\w)\1{2}", "regex", "Repeated"))
+    assert needs_own_regex(r"(\w)\1{2}")
+    assert categorizer.classify_category("zzz cafe") == "Repeated"
+    assert categorizer.classify_category("abc cafe") is None
+    assert categorizer.classify_category("12 x") == "Numbered"
+
+
+def test_global_flags_apply_only_to_their_rule():
+    categorizer = _categorizer((r"(?x) ^ [0-9]{4} $", "regex", "Code"), ("^a b$", "regex", "Spaced"))
+    assert needs_own_regex(r"(?x) ^ [0-9]{4} $")
+    assert not needs_own_regex("^a b$")
+    assert categorizer.classify_category("2024") == "Code"
+    assert categorizer.classify_category("a b") == "Spaced"
+
+
+def test_own_regexes_respect_rank():
+    categorizer = _categorizer(("^.{3}$", "regex", "Short"), (r"(.)\1", "regex", "Double"))
+    assert categorizer.classify_category("aab") == "Short"
+    assert categorizer.classify_category("aabb") == "Double"
+
+
+@pytest.mark.parametrize("pattern, match_type", [("", "substring"), ("x", "fuzzy"), ("(", "regex"),
+                                                 ("(?P<name>x)", "regex")])
+def test_validate_pattern_rejects(pattern, match_type):
+    with pytest.raises(ValueError):
+        validate_pattern(pattern, match_type)
+
+
+def test_validate_pattern_accepts_backreferences_and_global_flags():
+    validate_pattern(r"(\w)\1", "regex")
+    validate_pattern(r"(?i)^acme", "regex")
+
+
+def test_best_ranked_regex_wins_over_an_earlier_match():
+    # The joined alternation finds "Alpha" at position 0, but "Code" is ranked higher
+    categorizer = _categorizer(("[0-9]{4}$", "regex", "Code"), ("^[a-z]", "regex", "Alpha"),
+                               (r"(\w)\1 ", "regex", "Double"))
+    assert categorizer.classify_category("abc 1234") == "Code"
+    assert categorizer.classify_category("abc 12") == "Alpha"
+    assert categorizer.classify_category("11 x") == "Double"
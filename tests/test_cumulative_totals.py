@@ -0,0 +1,67 @@
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import text
+
+from backend import crud
+from tests.conftest import apply_random_writes, requires_postgres
+
+pytestmark = requires_postgres
+
+DIRECT_SQL = """
+    SELECT
+        (SELECT COALESCE(SUM(amount), 0) FROM income
+         WHERE user_id = :u AND date BETWEEN :start AND :end
+         AND (:source = '' OR COALESCE(NULLIF(source, ''), 'Uncategorized') = :source)) AS total_income,
+        (SELECT COALESCE(SUM(amount), 0) FROM expenses
+         WHERE user_id = :u AND date BETWEEN :start AND :end
+         AND (:category = '' OR COALESCE(NULLIF(category, ''), 'Uncategorized') = :category)) AS total_expenses
+"""
+
+
+def test_range_totals_match_direct_sums_after_random_writes(db):
+    user_ids = [db.execute(text("INSERT INTO users (username) VALUES (:n) RETURNING id"), {"n": name}).scalar()
+                for name in ("a", "b")]
+    db.commit()
+
+    apply_random_writes(db, user_ids, steps=300, seed=18)
+
+    # Every series' running total is the prefix sum of its day totals
+    broken = db.execute(text("""
+        SELECT COUNT(*) FROM (
+            SELECT cumulative, SUM(day_total) OVER (PARTITION BY user_id, kind, label ORDER BY day) AS expected
+            FROM cumulative_totals
+        ) t WHERE cumulative <> expected
+    """)).scalar()
+    assert broken == 0
+
+    rng = random.Random(18)
+    for _ in range(60):
+        start = date(2023, 10, 20) + timedelta(days=rng.randrange(140))
+        end = start + timedelta(days=rng.randrange(60))
+        user = rng.choice(user_ids)
+        category = rng.choice([None, "Food", "Travel", "Uncategorized"])
+        source = rng.choice([None, "Salary", "Uncategorized"])
+        totals = crud.get_range_totals_db(db, user, start, end, category, source)
+        expected = db.execute(text(DIRECT_SQL), {"u": user, "start": start, "end": end,
+                                                 "category": category or "", "source": source or ""}).fetchone()
+        assert (totals["total_income"], totals["total_expenses"]) == (expected.total_income, expected.total_expenses)
+
+
+def test_totals_endpoints(client, db, user_id):
+    for amount, day in ((100, date(2023, 3, 1)), (40, date(2024, 2, 10)), (60, date(2024, 3, 31))):
+        db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Food', :a, :d)"),
+                   {"u": user_id, "a": amount, "d": day})
+    db.execute(text("INSERT INTO income (user_id, source, amount, date) VALUES (:u, 'Salary', 500, :d)"),
+               {"u": user_id, "d": date(2024, 1, 1)})
+    db.commit()
+
+    totals = client.get(f"/totals/{user_id}", params={"from": "2024-01-01", "to": "2024-02-29"}).json()
+    assert (totals["total_income"], totals["total_expenses"], totals["net_savings"]) == (500, 40, 460)
+
+    yoy = client.get(f"/totals/{user_id}/yoy", params={"as_of": "2024-03-15", "category": "Food"}).json()
+    assert yoy["current"]["total_expenses"] == 40
+    assert yoy["previous"]["total_expenses"] == 100
+    assert yoy["change"]["total_expenses"] == {"change": -60, "percent_change": -60.0}
+
+    assert client.get(f"/totals/{user_id}", params={"from": "2024-02-01", "to": "2024-01-01"}).status_code == 400
@@ -0,0 +1,70 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from backend import crud
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+
+def test_dashboard_goes_through_the_data_version_dependency(client, db, user_id):
+    today = date.today()
+    db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Food', 40, :d)"),
+               {"u": user_id, "d": today})
+    db.execute(text("INSERT INTO income (user_id, source, amount, date) VALUES (:u, 'Salary', 100, :d)"),
+               {"u": user_id, "d": today})
+    db.execute(text("INSERT INTO assets (user_id, category, value) VALUES (:u, 'Cash', 500)"), {"u": user_id})
+    db.commit()
+
+    response = client.get(f"/dashboard/{user_id}")
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["totals"] == {"total_income": 100, "total_expenses": 40, "net_savings": 60}
+    assert body["expense_breakdown"] == [{"category": "Food", "total": 40}]
+    assert body["balance_sheet"]["net_worth"] == 500
+    version = db.execute(text("SELECT version FROM user_data_versions WHERE user_id = :u"), {"u": user_id}).scalar()
+    assert response.headers["etag"] == f'"{user_id}-{version}"'
+
+
+def test_dashboard_covers_every_widget(db, user_id):
+    today = date(2024, 3, 10)
+    db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES "
+                    "(:u, 'Food', 40, '2024-02-01'), (:u, 'Food', 10, '2024-03-01'), (:u, 'Rent', 500, '2024-03-02')"),
+               {"u": user_id})
+    db.execute(text("INSERT INTO income (user_id, source, amount, date) VALUES (:u, 'Salary', 1000, '2024-03-01')"),
+               {"u": user_id})
+    db.execute(text("INSERT INTO budgets (user_id, category, budget_amount) VALUES (:u, 'Food', 100)"), {"u": user_id})
+    db.execute(text("INSERT INTO assets (user_id, category, value) VALUES (:u, 'Cash', 500), (:u, 'Cash', 250)"),
+               {"u": user_id})
+    db.execute(text("INSERT INTO debts (user_id, category, amount) VALUES (:u, 'Card', 300)"), {"u": user_id})
+    db.execute(text("INSERT INTO savings_goals (user_id, goal_amount, current_amount, month) VALUES (:u, 400, 0, '2024-03-01')"),
+               {"u": user_id})
+    db.commit()
+
+    body = crud.get_dashboard_db(db, user_id, today=today)
+    db.rollback()
+    assert body["totals"] == {"total_income": 1000, "total_expenses": 550, "net_savings": 450}
+    assert [(m["year"], m["month"], m["savings"]) for m in body["months"]] == [(2024, 2, -40), (2024, 3, 490)]
+    assert [(r["month"], r["category"], r["total"]) for r in body["expenses_by_month"]] == [
+        (2, "Food", 40), (3, "Food", 10), (3, "Rent", 500)]
+    assert body["expense_breakdown"] == [{"category": "Food", "total": 50}, {"category": "Rent", "total": 500}]
+    assert [(b["category"], b["budget_amount"]) for b in body["budgets"]] == [("Food", 100)]
+    assert body["balance_sheet"] == {"total_assets": 750, "total_liabilities": 300, "net_worth": 450,
+                                     "assets": [{"category": "Cash", "total": 750}],
+                                     "debts": [{"category": "Card", "total": 300}]}
+    assert body["savings"] == {"current_savings": 490, "goal_amount": 400}
+
+
+def test_dashboard_reads_one_read_only_snapshot(engine, db, user_id):
+    crud.get_dashboard_db(db, user_id)
+    assert db.execute(text("SHOW transaction_isolation")).scalar() == "repeatable read"
+    assert db.execute(text("SHOW transaction_read_only")).scalar() == "on"
+
+    # A write committed meanwhile is not visible to the rest of the transaction
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Food', 40, :d)"),
+                           {"u": user_id, "d": date.today()})
+    assert db.execute(text("SELECT COUNT(*) FROM expenses")).scalar() == 0
+    db.rollback()
+    assert db.execute(text("SELECT COUNT(*) FROM expenses")).scalar() == 1
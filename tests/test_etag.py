@@ -0,0 +1,38 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+
+def add_expense(db, user_id, amount):
+    db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Food', :a, :d)"),
+               {"u": user_id, "a": amount, "d": date(2025, 1, 1)})
+    db.commit()
+
+
+def test_matching_etag_gets_an_empty_304(client, db, user_id):
+    add_expense(db, user_id, 10)
+    first = client.get(f"/expenses/{user_id}")
+    assert first.status_code == 200
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = client.get(f"/expenses/{user_id}", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+
+def test_write_moves_the_etag(client, db, user_id):
+    add_expense(db, user_id, 10)
+    etag = client.get(f"/financial-summary/{user_id}").headers["etag"]
+
+    add_expense(db, user_id, 5)
+    response = client.get(f"/financial-summary/{user_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert float(response.json()["total_expenses"]) == 15
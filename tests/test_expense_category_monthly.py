@@ -0,0 +1,89 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from tests.conftest import apply_random_writes, requires_postgres
+
+pytestmark = requires_postgres
+
+RECOMPUTED_SQL = """
+    SELECT user_id, EXTRACT(YEAR FROM date)::INT AS year, EXTRACT(MONTH FROM date)::INT AS month,
+           COALESCE(category, 'Uncategorized') AS category, SUM(amount) AS total, COUNT(*) AS expense_count
+    FROM expenses
+    GROUP BY 1, 2, 3, 4
+"""
+
+
+def _rollup(db):
+    rows = db.execute(text("SELECT user_id, year, month, category, total, expense_count FROM expense_category_monthly"))
+    return {(r.user_id, r.year, r.month, r.category): (r.total, r.expense_count) for r in rows if r.expense_count}
+
+
+def test_rollup_matches_a_full_recompute_after_random_writes(db):
+    user_ids = [db.execute(text("INSERT INTO users (username) VALUES (:n) RETURNING id"), {"n": name}).scalar()
+                for name in ("a", "b")]
+    db.commit()
+
+    apply_random_writes(db, user_ids, steps=300, seed=16)
+
+    recomputed = {(r.user_id, r.year, r.month, r.category): (r.total, r.expense_count)
+                  for r in db.execute(text(RECOMPUTED_SQL))}
+    assert _rollup(db) == recomputed
+    # Emptied cells keep their row at zero rather than going negative
+    negative = db.execute(text("SELECT COUNT(*) FROM expense_category_monthly WHERE expense_count < 0 OR total < 0"))
+    assert negative.scalar() == 0
+
+
+def test_heatmap_is_dense_over_months_and_categories(client, db, user_id):
+    for category, amount, day in (("Food", 10, date(2023, 12, 5)), ("Food", 15, date(2023, 12, 20)),
+                                  (None, 7, date(2024, 2, 1)), ("Rent", 900, date(2024, 2, 1))):
+        db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, :c, :a, :d)"),
+                   {"u": user_id, "c": category, "a": amount, "d": day})
+    db.commit()
+
+    response = client.get(f"/expense-heatmap/{user_id}")
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "categories": ["Food", "Rent", "Uncategorized"],
+        "months": ["2023-12", "2024-01", "2024-02"],
+        "values": [[25, 0, 0], [0, 0, 900], [0, 0, 7]],
+    }
+
+    # A category whose expenses are all deleted drops out
+    db.execute(text("DELETE FROM expenses WHERE category = 'Rent'"))
+    db.commit()
+    assert client.get(f"/expense-heatmap/{user_id}").json()["categories"] == ["Food", "Uncategorized"]
+
+
+def test_empty_category_is_uncategorized(db, user_id):
+    for category in (None, "", "Food"):
+        db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, :c, 10, '2024-01-05')"),
+                   {"u": user_id, "c": category})
+    db.commit()
+    assert _rollup(db) == {(user_id, 2024, 1, "Food"): (10, 1), (user_id, 2024, 1, "Uncategorized"): (20, 2)}
+
+    db.execute(text("UPDATE expenses SET category = 'Food' WHERE category = ''"))
+    db.execute(text("DELETE FROM expenses WHERE category IS NULL"))
+    db.commit()
+    assert _rollup(db) == {(user_id, 2024, 1, "Food"): (20, 2)}
+
+
+def test_migration_merges_existing_empty_category_cells(engine, db, user_id):
+    from backend.migrate import apply_migration, discover
+
+    # Cells 0004's trigger used to write
+    db.execute(text("""
+        INSERT INTO expense_category_monthly (user_id, year, month, category, total, expense_count)
+        VALUES (:u, 2024, 1, '', 5, 1), (:u, 2024, 1, 'Uncategorized', 7, 2), (:u, 2024, 2, '', 3, 1)
+    """), {"u": user_id})
+    db.commit()
+
+    migration = next(m for m in discover()[0] if m.name == "expense_category_monthly_empty_category")
+    connection = engine.raw_connection()
+    try:
+        apply_migration(connection, migration)
+    finally:
+        connection.close()
+
+    db.rollback()
+    assert _rollup(db) == {(user_id, 2024, 1, "Uncategorized"): (12, 3), (user_id, 2024, 2, "Uncategorized"): (3, 1)}
@@ -0,0 +1,28 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+
+from backend.fastjson import FastJSONResponse, dumps
+
+
+def test_decimals_are_numbers_and_dates_are_iso_strings():
+    row = {"id": 1, "amount": Decimal("12.50"), "date": date(2025, 2, 28),
+           "created_at": datetime(2025, 2, 28, 13, 45, 0), "category": None}
+    assert json.loads(dumps(row)) == {"id": 1, "amount": 12.5, "date": "2025-02-28",
+                                      "created_at": "2025-02-28T13:45:00", "category": None}
+
+
+def test_response_renders_content_and_passes_rendered_bytes_through():
+    response = FastJSONResponse({"items": [{"amount": Decimal("3"), "date": date(2025, 1, 1)}], "next_cursor": None})
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {"items": [{"amount": 3.0, "date": "2025-01-01"}], "next_cursor": None}
+
+    rendered = dumps({"total": Decimal("1.25")})
+    assert FastJSONResponse(rendered).body == rendered == b'{"total":1.25}'
+
+
+def test_unknown_types_are_rejected():
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
@@ -0,0 +1,55 @@
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from backend import crud
+from tests.conftest import apply_random_writes, requires_postgres
+
+pytestmark = requires_postgres
+
+
+def test_function_matches_the_view_after_random_writes(db):
+    user_ids = [db.execute(text("INSERT INTO users (username) VALUES (:n) RETURNING id"), {"n": name}).scalar()
+                for name in ("a", "b", "c")]
+    db.commit()
+    apply_random_writes(db, user_ids, steps=200, seed=5)
+
+    for user_id in user_ids:
+        function = db.execute(text("SELECT * FROM get_user_financial_summary(:u)"), {"u": user_id}).fetchone()
+        view = db.execute(text("SELECT * FROM financial_summary WHERE user_id = :u"), {"u": user_id}).fetchone()
+        assert (function.username, function.total_income, function.total_expenses, function.net_savings) == \
+               (view.username, view.total_income, view.total_expenses, view.net_savings)
+
+
+def test_savings_fields_come_from_this_months_goal(db, user_id):
+    this_month = date.today().replace(day=1)
+    db.execute(text("INSERT INTO income (user_id, source, amount, date) VALUES (:u, 'Salary', 1000, :d)"),
+               {"u": user_id, "d": this_month})
+    db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Rent', 250, :d)"),
+               {"u": user_id, "d": this_month})
+    db.execute(text("INSERT INTO savings_goals (user_id, goal_amount, current_amount, month) VALUES "
+                    "(:u, 999, 999, '2000-01-01'), (:u, 400, 100, :m)"), {"u": user_id, "m": this_month})
+    db.commit()
+
+    assert crud.get_financial_summary_db(db, user_id) == {
+        "total_income": 1000, "total_expenses": 250, "net_savings": 750,
+        "savings_goal": 400, "current_savings": 100,
+        "savings_progress_percentage": Decimal("25.00"), "expense_to_income_ratio": Decimal("0.2500"),
+    }
+
+
+def test_missing_goal_and_income_leave_the_ratios_empty(client, db, user_id):
+    db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Rent', 250, '2024-01-01')"),
+               {"u": user_id})
+    db.commit()
+
+    summary = client.get(f"/financial-summary/{user_id}").json()
+    assert (summary["total_expenses"], summary["net_savings"]) == (250, -250)
+    assert summary["savings_goal"] is None
+    assert summary["savings_progress_percentage"] is None
+    assert summary["expense_to_income_ratio"] is None
+
+
+def test_unknown_user_has_no_summary(db):
+    assert db.execute(text("SELECT * FROM get_user_financial_summary(999999)")).fetchone() is None
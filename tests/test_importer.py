@@ -0,0 +1,107 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import text
+
+from backend import importer
+from tests.conftest import requires_postgres
+
+STATEMENT = """Date,Amount,Description,Category
+2024-01-05,-4.50,Coffee Shop,
+2024-01-05,-4.50,Coffee Shop,
+2024-01-06,2500.00,ACME Payroll,
+2024-01-07,-60.00,Grocer,Food
+not-a-date,-1.00,Broken,
+2024-01-08,0,Zero,
+"""
+
+
+def _import(engine, user_id, content):
+    job = importer.ImportJob(user_id, "statement.csv")
+    return importer.run_import(engine, job, importer.parse_csv(io.StringIO(content)))
+
+
+def test_fingerprint_ignores_formatting_but_not_ordinal():
+    day, amount = date(2024, 1, 5), Decimal("-4.50")
+    assert importer.fingerprint(day, amount, "Coffee Shop") == importer.fingerprint(day, amount, "  COFFEE-shop!")
+    assert importer.fingerprint(day, amount, "Coffee Shop", 0) != importer.fingerprint(day, amount, "Coffee Shop", 1)
+    assert importer.fingerprint(day, amount, "Coffee") != importer.fingerprint(day, Decimal("-4.51"), "Coffee")
+
+
+@requires_postgres
+def test_reimporting_a_statement_adds_nothing(engine, db, user_id):
+    first = _import(engine, user_id, STATEMENT)
+    assert first.status == "completed", first.error
+    # Identical rows within one file are separate transactions
+    assert (first.expenses_inserted, first.income_inserted, first.rows_duplicate) == (3, 1, 0)
+    assert [r["line"] for r in first.rejected] == [6, 7]
+
+    second = _import(engine, user_id, STATEMENT)
+    assert second.status == "completed", second.error
+    assert (second.expenses_inserted, second.income_inserted, second.rows_duplicate) == (0, 0, 4)
+    assert [d["line"] for d in second.duplicates] == [2, 3, 4, 5]
+
+    assert db.execute(text("SELECT COUNT(*) FROM expenses WHERE user_id = :u"), {"u": user_id}).scalar() == 3
+    assert db.execute(text("SELECT COUNT(*) FROM income WHERE user_id = :u"), {"u": user_id}).scalar() == 1
+
+
+@requires_postgres
+def test_overlapping_statement_only_adds_new_rows(engine, db, user_id):
+    _import(engine, user_id, STATEMENT)
+    # A later export re-formats descriptions and covers one more coffee and one new day
+    overlapping = """Date,Amount,Description,Category
+2024-01-05,-4.50,COFFEE SHOP,
+2024-01-05,-4.50,coffee shop.,
+2024-01-05,-4.50,Coffee Shop,
+2024-01-09,-12.00,Cinema,
+"""
+    job = _import(engine, user_id, overlapping)
+    assert (job.expenses_inserted, job.rows_duplicate) == (2, 2)
+
+    rows = db.execute(text("SELECT date, amount FROM expenses WHERE user_id = :u AND fingerprint IS NOT NULL "
+                           "ORDER BY date, id"), {"u": user_id}).fetchall()
+    assert [(r.date.day, r.amount) for r in rows] == [(5, 4.5), (5, 4.5), (5, 4.5), (7, 60), (9, 12)]
+
+
+@requires_postgres
+def test_other_users_do_not_count_as_duplicates(engine, db, user_id):
+    other = db.execute(text("INSERT INTO users (username) VALUES ('bob') RETURNING id")).scalar()
+    db.commit()
+    _import(engine, user_id, STATEMENT)
+    job = _import(engine, other, STATEMENT)
+    assert (job.expenses_inserted, job.income_inserted, job.rows_duplicate) == (3, 1, 0)
+
+
+@requires_postgres
+def test_import_endpoint_runs_the_job(client, db, user_id):
+    response = client.post(f"/import/{user_id}", files={"file": ("statement.csv", STATEMENT.encode())})
+    assert response.status_code == 202, response.text
+    job = client.get(f"/import/jobs/{response.json()['job_id']}").json()
+    assert job["status"] == "completed", job["error"]
+    assert (job["expenses_inserted"], job["income_inserted"], job["rows_rejected"]) == (3, 1, 2)
+
+
+@requires_postgres
+def test_job_reports_are_shared_and_expire(engine, db, user_id):
+    store = importer.JobStore(engine, ttl=3600)
+    job = store.create(user_id, "statement.csv")
+    importer.run_import(engine, job, importer.parse_csv(io.StringIO(STATEMENT)), on_progress=store.save)
+
+    # Another worker only has the database
+    report = importer.JobStore(engine).get(job.id)
+    assert report["status"] == "completed"
+    assert (report["expenses_inserted"], report["rows_rejected"]) == (3, 2)
+    assert [r["line"] for r in report["rejected"]] == [6, 7]
+    assert importer.JobStore(engine).get("no-such-job") is None
+
+    db.execute(text("UPDATE import_jobs SET updated_at = now() - INTERVAL '2 hours' WHERE id = :id"), {"id": job.id})
+    db.commit()
+    store.create(user_id, "next.csv")
+    assert store.get(job.id) is None
+
+
+@requires_postgres
+def test_import_for_unknown_user_is_rejected(client):
+    response = client.post("/import/999999", files={"file": ("statement.csv", STATEMENT.encode())})
+    assert response.status_code == 404
@@ -0,0 +1,59 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from backend.migrate import MIGRATIONS_DIR, discover, migrate, status
+from tests.conftest import TEST_DATABASE_URL, build_base_schema, requires_postgres
+
+pytestmark = requires_postgres
+
+SCHEMA = "migrate_test"
+
+
+@pytest.fixture
+def scratch_engine():
+    """An engine whose search_path is a scratch schema holding only the hand-made tables."""
+    engine = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA}"})
+    build_base_schema(engine, SCHEMA)
+    yield engine
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    engine.dispose()
+
+
+def function_exists(connection, name: str):
+    return connection.execute(text("""
+        SELECT 1 FROM pg_proc p JOIN pg_namespace n ON n.oid = p.pronamespace
+        WHERE n.nspname = :schema AND p.proname = :name
+    """), {"schema": SCHEMA, "name": name}).scalar() is not None
+
+
+def test_migrates_a_hand_made_database_and_is_idempotent(scratch_engine):
+    versioned, repeatable = discover()
+    reports = migrate(scratch_engine, probe=False)
+    assert [r["version"] for r in reports] == [m.version for m in versioned + repeatable]
+    assert {state for *_, state in status(scratch_engine)} == {"applied"}
+    assert migrate(scratch_engine, probe=False) == []
+
+
+def test_baseline_skips_versioned_migrations_but_applies_repeatable_scripts(scratch_engine):
+    # A database that ran the old tables.sql (now 0001) by hand
+    with open(os.path.join(MIGRATIONS_DIR, "0001_tables.sql")) as f, scratch_engine.begin() as connection:
+        connection.exec_driver_sql(f.read())
+
+    reports = migrate(scratch_engine, baseline="0001", probe=False)
+    applied = [r["version"] for r in reports]
+    assert "0001" not in applied
+    assert {"0002", "triggers.sql", "functions.sql", "views.sql"} <= set(applied)
+
+    with scratch_engine.begin() as connection:
+        assert function_exists(connection, "get_user_financial_summary")
+        # The delta triggers from triggers.sql keep the monthly summary current
+        user_id = connection.execute(text("INSERT INTO users (username) VALUES ('bob') RETURNING id")).scalar()
+        connection.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Food', 12.5, '2025-03-04')"),
+                           {"u": user_id})
+        total = connection.execute(text("""
+            SELECT total_expenses FROM income_expense_summary WHERE user_id = :u AND year = 2025 AND month = 3
+        """), {"u": user_id}).scalar()
+    assert float(total) == 12.5
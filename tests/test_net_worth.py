@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from backend import networth
+from tests.conftest import TEST_DATABASE_URL, requires_postgres
+
+pytestmark = requires_postgres
+
+
+def _snapshots(db, user_id):
+    return db.execute(text("""
+        SELECT day, total_assets, total_liabilities, net_worth FROM net_worth_snapshots
+        WHERE user_id = :u ORDER BY day
+    """), {"u": user_id}).fetchall()
+
+
+def test_triggers_keep_todays_row_current(db, user_id):
+    today = db.execute(text("SELECT CURRENT_DATE")).scalar()
+    db.execute(text("INSERT INTO assets (user_id, category, value) VALUES (:u, 'Cash', 500), (:u, 'Car', 300)"),
+               {"u": user_id})
+    db.execute(text("INSERT INTO debts (user_id, category, amount) VALUES (:u, 'Loan', 200)"), {"u": user_id})
+    db.execute(text("UPDATE assets SET value = value + 50 WHERE user_id = :u AND category = 'Cash'"), {"u": user_id})
+    db.commit()
+    assert _snapshots(db, user_id) == [(today, 850, 200, 650)]
+
+    db.execute(text("DELETE FROM debts WHERE user_id = :u"), {"u": user_id})
+    db.commit()
+    assert _snapshots(db, user_id) == [(today, 850, 0, 850)]
+
+
+def test_first_change_of_a_day_starts_from_the_previous_row(db, user_id):
+    today = db.execute(text("SELECT CURRENT_DATE")).scalar()
+    db.execute(text("INSERT INTO net_worth_snapshots (user_id, day, total_assets, total_liabilities) "
+                    "VALUES (:u, :d, 1000, 400)"), {"u": user_id, "d": today - timedelta(days=5)})
+    db.execute(text("INSERT INTO assets (user_id, category, value) VALUES (:u, 'Cash', 25)"), {"u": user_id})
+    db.commit()
+    assert _snapshots(db, user_id)[-1] == (today, 1025, 400, 625)
+
+
+def test_close_carries_the_latest_row_forward(engine, db, user_id):
+    today = db.execute(text("SELECT CURRENT_DATE")).scalar()
+    three_days_ago = today - timedelta(days=3)
+    db.execute(text("INSERT INTO net_worth_snapshots (user_id, day, total_assets, total_liabilities) "
+                    "VALUES (:u, :d, 100, 30)"), {"u": user_id, "d": three_days_ago})
+    db.commit()
+    version = db.execute(text("SELECT version FROM user_data_versions WHERE user_id = :u"), {"u": user_id}).scalar()
+
+    reports = networth.close_days(sessionmaker(bind=engine), three_days_ago, today, batch_size=1)
+    assert [report["closed"] for report in reports] == [0, 1, 1, 1]
+    assert [row.day for row in _snapshots(db, user_id)] == [three_days_ago + timedelta(days=n) for n in range(4)]
+    assert {(row.total_assets, row.total_liabilities) for row in _snapshots(db, user_id)} == {(100, 30)}
+    # New rows change GET /net-worth, so the user's ETag moves
+    assert db.execute(text("SELECT version FROM user_data_versions WHERE user_id = :u"),
+                      {"u": user_id}).scalar() != version
+
+    # Closing is idempotent
+    assert networth.close_day(sessionmaker(bind=engine), today)["closed"] == 0
+
+
+@pytest.mark.parametrize("timezone", ["Pacific/Kiritimati", "Etc/GMT+12"])
+def test_close_defaults_to_the_databases_today(db, user_id, timezone):
+    # UTC+14 and UTC-12 never share a date, so at least one of them differs from the app's clock
+    zoned = create_engine(TEST_DATABASE_URL, connect_args={"options": f"-ctimezone={timezone}"})
+    try:
+        session_factory = sessionmaker(bind=zoned)
+        database_today = networth.database_today(session_factory)
+        with zoned.begin() as connection:
+            connection.execute(text("INSERT INTO assets (user_id, category, value) VALUES (:u, 'Cash', 10)"),
+                               {"u": user_id})
+
+        report = networth.close_day(session_factory)
+        assert report["day"] == database_today.isoformat()
+        # The trigger already wrote the row for that same day, so there was nothing to close
+        assert report["closed"] == 0
+        assert [row.day for row in _snapshots(db, user_id)] == [database_today]
+    finally:
+        zoned.dispose()
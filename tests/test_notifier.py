@@ -0,0 +1,122 @@
+import queue
+import time
+
+from sqlalchemy import text
+
+from backend import notifier
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+TIMEOUT = 10
+
+
+def _listener(engine):
+    events = queue.Queue()
+    listener = notifier.ChangeListener(
+        engine,
+        on_change=lambda user_id: events.put(("change", user_id)),
+        on_reconnect=lambda: events.put(("reconnect", None)),
+        on_rules_change=lambda user_id: events.put(("rules", user_id)),
+        reconnect_delay=0.1,
+    )
+    return listener, events
+
+
+def _wait_listening(listener):
+    deadline = time.monotonic() + TIMEOUT
+    while not listener.listening:
+        assert time.monotonic() < deadline, listener.last_error
+        time.sleep(0.02)
+
+
+def test_category_rule_changes_reach_on_rules_change(engine, db, user_id):
+    listener, events = _listener(engine)
+    listener.start()
+    try:
+        _wait_listening(listener)
+        db.execute(text("INSERT INTO category_rules (user_id, pattern, match_type, category, priority) "
+                        "VALUES (:u, 'acme', 'substring', 'Shopping', 100)"), {"u": user_id})
+        db.commit()
+        assert events.get(timeout=TIMEOUT) == ("rules", user_id)
+
+        db.execute(text("INSERT INTO category_rules (user_id, pattern, match_type, category, priority) "
+                        "VALUES (NULL, 'uber', 'prefix', 'Transport', 100)"))
+        db.commit()
+        assert events.get(timeout=TIMEOUT) == ("rules", None)
+
+        db.execute(text("DELETE FROM category_rules"))
+        db.commit()
+        assert {events.get(timeout=TIMEOUT), events.get(timeout=TIMEOUT)} == {("rules", user_id), ("rules", None)}
+    finally:
+        listener.stop()
+
+
+def test_rule_change_in_another_process_recompiles_the_categorizer(engine, db, user_id):
+    import main
+
+    rule_set = main.categorizer.get_categorizer(db, user_id)
+    assert rule_set.classify_category("ACME STORE") is None
+    listener, events = _listener(engine)
+    listener.on_rules_change = lambda changed: (main.categorizer.invalidate(changed), events.put(("rules", changed)))
+    listener.start()
+    try:
+        _wait_listening(listener)
+        # Written directly, as another worker would, so this process' invalidate() was never called
+        db.execute(text("INSERT INTO category_rules (user_id, pattern, match_type, category, priority) "
+                        "VALUES (:u, 'acme', 'substring', 'Shopping', 100)"), {"u": user_id})
+        db.commit()
+        assert events.get(timeout=TIMEOUT) == ("rules", user_id)
+        assert main.categorizer.get_categorizer(db, user_id).classify_category("ACME STORE") == "Shopping"
+    finally:
+        listener.stop()
+
+
+def test_committed_writes_reach_on_change_and_rolled_back_ones_do_not(engine, db, user_id):
+    listener, events = _listener(engine)
+    listener.start()
+    try:
+        _wait_listening(listener)
+        db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Food', 1, '2024-01-01')"),
+                   {"u": user_id})
+        db.rollback()
+        # Several rows in one transaction are one notification
+        db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Food', 1, '2024-01-01')"),
+                   {"u": user_id})
+        db.execute(text("INSERT INTO income (user_id, source, amount, date) VALUES (:u, 'Salary', 1, '2024-01-01')"),
+                   {"u": user_id})
+        db.commit()
+        assert events.get(timeout=TIMEOUT) == ("change", user_id)
+        time.sleep(0.2)
+        assert events.empty()
+        assert listener.stats()["notifications"] == 1
+    finally:
+        listener.stop()
+
+
+def test_reconnect_clears_the_read_cache(engine, db, user_id):
+    import main
+
+    listener, events = _listener(engine)
+    listener.on_reconnect = lambda: (main.clear_caches(), events.put(("reconnect", None)))
+    listener.start()
+    try:
+        _wait_listening(listener)
+        main.read_cache.set(("financial-summary", user_id), user_id, {"total_income": 1})
+
+        # Drop the listening connection, as a server restart or network failure would
+        db.execute(text("SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+                        "WHERE query LIKE 'LISTEN %' AND pid <> pg_backend_pid()"))
+        db.commit()
+        assert events.get(timeout=TIMEOUT) == ("reconnect", None)
+        assert main.read_cache.get(("financial-summary", user_id)) == (False, None)
+        assert listener.reconnects == 1
+
+        # And it listens again
+        _wait_listening(listener)
+        db.execute(text("INSERT INTO income (user_id, source, amount, date) VALUES (:u, 'Salary', 1, '2024-01-01')"),
+                   {"u": user_id})
+        db.commit()
+        assert events.get(timeout=TIMEOUT) == ("change", user_id)
+    finally:
+        listener.stop()
@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from backend import crud
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+
+def _all_pages(fetch, limit):
+    items, cursor = fetch(None)
+    pages = [items]
+    while cursor is not None:
+        items, cursor = fetch(cursor)
+        pages.append(items)
+    assert all(len(page) <= limit for page in pages)
+    return [row["id"] for page in pages for row in page]
+
+
+def test_expense_pages_walk_newest_first_without_gaps(db, user_id):
+    for day in (3, 1, 2, 2, 5):
+        db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Food', 1, :d)"),
+                   {"u": user_id, "d": date(2024, 1, day)})
+    db.commit()
+
+    ids = _all_pages(lambda cursor: crud.get_expenses_page(db, user_id, 2, cursor), 2)
+    # 5th, 3rd, then the two rows of the 2nd (higher id first), then the 1st
+    assert ids == [5, 1, 4, 3, 2]
+
+
+def test_undated_assets_come_first_and_can_end_a_page(db, user_id):
+    for value, day in ((1, date(2024, 1, 1)), (2, None), (3, date(2024, 2, 1)), (4, None), (5, None)):
+        db.execute(text("INSERT INTO assets (user_id, category, value, date_added) VALUES (:u, 'Cash', :v, :d)"),
+                   {"u": user_id, "v": value, "d": day})
+    db.commit()
+
+    for limit in (1, 2, 3, 4):
+        ids = _all_pages(lambda cursor: crud.get_assets_page(db, user_id, limit, cursor), limit)
+        assert ids == [5, 4, 2, 3, 1]
+
+
+def test_undated_debts_page_through_the_endpoint(client, db, user_id):
+    for day in (None, date(2024, 3, 1), None):
+        db.execute(text("INSERT INTO debts (user_id, category, amount, date_incurred) VALUES (:u, 'Loan', 10, :d)"),
+                   {"u": user_id, "d": day})
+    db.commit()
+
+    first = client.get(f"/debts/{user_id}", params={"limit": 1})
+    assert first.status_code == 200, first.text
+    assert [row["id"] for row in first.json()["items"]] == [3]
+    second = client.get(f"/debts/{user_id}", params={"limit": 5, "cursor": first.json()["next_cursor"]})
+    assert second.status_code == 200, second.text
+    assert [row["id"] for row in second.json()["items"]] == [1, 2]
+    assert second.json()["next_cursor"] is None
+
+
+def test_cursor_round_trips_and_rejects_garbage():
+    assert crud.decode_cursor(crud.encode_cursor(date(2024, 5, 6), 42)) == (date(2024, 5, 6), 42)
+    assert crud.decode_cursor(crud.encode_cursor(None, 7)) == (None, 7)
+    with pytest.raises(ValueError):
+        crud.decode_cursor("not-a-cursor")
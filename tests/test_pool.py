@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from backend.poolstats import TimedQueuePool, pool_stats
+from tests.conftest import ROOT, TEST_DATABASE_URL, requires_postgres
+
+POOL_SETTINGS = """
+import json
+from backend import database
+pool = database.engine.pool
+print(json.dumps({
+    "options": database.POOL_OPTIONS,
+    "pool": [pool.size(), pool._max_overflow, pool.timeout(), pool._recycle, pool._pre_ping],
+    "async_url": str(database._async_url("postgresql://u@db/app")),
+}))
+"""
+
+
+def test_pool_settings_come_from_the_environment():
+    env = {**os.environ, "DATABASE_URL": "postgresql://u@db/app", "DB_POOL_SIZE": "7", "DB_MAX_OVERFLOW": "3",
+           "DB_POOL_TIMEOUT": "2.5", "DB_POOL_RECYCLE": "60", "DB_POOL_PRE_PING": "0",
+           "DB_QUERY_CACHE_SIZE": "50", "DB_STATEMENT_CACHE_SIZE": "0"}
+    output = subprocess.run([sys.executable, "-c", POOL_SETTINGS], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    settings = json.loads(output.strip().splitlines()[-1])
+    assert settings["pool"] == [7, 3, 2.5, 60, False]
+    assert settings["options"]["query_cache_size"] == 50
+    # The driver's prepared statement cache, not SQLAlchemy's query cache
+    assert settings["async_url"] == "postgresql+asyncpg://u@db/app?prepared_statement_cache_size=0"
+
+
+@requires_postgres
+def test_pool_stats_count_checkouts_and_timeouts():
+    engine = create_engine(TEST_DATABASE_URL, poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.1)
+    try:
+        with engine.connect():
+            stats = pool_stats(engine)
+            assert (stats["checked_out"], stats["idle"]) == (1, 0)
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+        stats = pool_stats(engine)
+        assert (stats["checkouts"], stats["timeouts"], stats["checked_out"], stats["idle"]) == (1, 1, 0, 1)
+        assert sum(stats["checkout_ms_histogram"].values()) == 2
+
+        # dispose() replaces the pool; the counts carry over
+        engine.dispose()
+        with engine.connect():
+            pass
+        assert pool_stats(engine)["checkouts"] == 2
+    finally:
+        engine.dispose()
+
+
+@requires_postgres
+def test_internal_pool_endpoint(client, user_id):
+    before = client.get("/internal/pool").json()["primary"]["sync"]
+    client.get(f"/expenses/{user_id}")
+    after = client.get("/internal/pool").json()["primary"]["sync"]
+    assert after["checkouts"] > before["checkouts"]
+    assert after["checked_out"] == 0
+    assert {"pool_size", "idle", "overflow", "max_overflow", "mean_checkout_ms", "checkout_ms_histogram"} <= set(after)
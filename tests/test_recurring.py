@@ -0,0 +1,114 @@
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.orm import sessionmaker
+
+from backend import crud, recurring
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+
+def _rule(db, user_id, frequency, start_date, end_date=None, kind="expense", label="Rent", amount=100):
+    rule = crud.create_recurring_rule_db(db, user_id=user_id, kind=kind, label=label, amount=amount,
+                                         frequency=frequency, start_date=start_date, end_date=end_date)
+    return rule.id
+
+
+def _dates(db, user_id, table="expenses"):
+    return [row.date for row in db.execute(text(f"SELECT date FROM {table} WHERE user_id = :u ORDER BY date, id"),
+                                           {"u": user_id})]
+
+
+def test_catches_up_missed_periods_once(engine, db, user_id):
+    _rule(db, user_id, "monthly", date(2024, 1, 15))
+    _rule(db, user_id, "weekly", date(2024, 1, 1), label="Gym", amount=10)
+    session_factory = sessionmaker(bind=engine)
+
+    report = recurring.materialize_due(session_factory, today=date(2024, 2, 20))
+    assert (report["rules"], report["expenses_inserted"]) == (2, 10)
+    assert _dates(db, user_id) == sorted([date(2024, 1, 15), date(2024, 2, 15)]
+                                         + [date(2024, 1, d) for d in (1, 8, 15, 22, 29)]
+                                         + [date(2024, 2, d) for d in (5, 12, 19)])
+
+    # Nothing is due again the same day
+    assert recurring.materialize_due(session_factory, today=date(2024, 2, 20))["rules"] == 0
+    # A later run only adds the new periods (the gym on the 26th; rent is next due on 3-15)
+    report = recurring.materialize_due(session_factory, today=date(2024, 3, 1))
+    assert report["expenses_inserted"] == 1
+    db.rollback()
+    assert len(_dates(db, user_id)) == 11
+    # The summary triggers see the materialized rows like any other insert
+    assert db.execute(text("SELECT SUM(total_expenses) FROM income_expense_summary WHERE user_id = :u"),
+                      {"u": user_id}).scalar() == 2 * 100 + 9 * 10
+
+
+def test_claimed_periods_are_never_inserted_twice(engine, db, user_id):
+    rule_id = _rule(db, user_id, "monthly", date(2024, 1, 1), kind="income", label="Salary")
+    session_factory = sessionmaker(bind=engine)
+    recurring.materialize_due(session_factory, today=date(2024, 3, 1))
+
+    # As if an overlapping run had read the rule before this one advanced it
+    db.execute(text("UPDATE recurring_rules SET next_index = 0, next_due = start_date WHERE id = :id"), {"id": rule_id})
+    db.commit()
+    report = recurring.materialize_due(session_factory, today=date(2024, 3, 1))
+    assert (report["occurrences"], report["skipped_existing"], report["income_inserted"]) == (0, 3, 0)
+    db.rollback()
+    assert _dates(db, user_id, "income") == [date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)]
+
+
+def test_month_end_dates_stay_anchored_to_the_start_date(engine, db, user_id):
+    _rule(db, user_id, "monthly", date(2024, 1, 31))
+    _rule(db, user_id, "yearly", date(2024, 2, 29), kind="income", label="Bonus")
+    session_factory = sessionmaker(bind=engine)
+
+    # One run per month, so each step starts from the previous one's next_due
+    for today in (date(2024, 2, 1), date(2024, 3, 1), date(2024, 4, 1), date(2024, 5, 1)):
+        recurring.materialize_due(session_factory, today=today)
+    recurring.materialize_due(session_factory, today=date(2028, 3, 1))
+    db.rollback()
+
+    assert _dates(db, user_id)[:4] == [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+    assert _dates(db, user_id, "income") == [date(2024, 2, 29), date(2025, 2, 28), date(2026, 2, 28),
+                                             date(2027, 2, 28), date(2028, 2, 29)]
+
+
+def test_stops_at_end_date(engine, db, user_id):
+    rule_id = _rule(db, user_id, "monthly", date(2024, 1, 10), end_date=date(2024, 3, 10))
+    session_factory = sessionmaker(bind=engine)
+
+    recurring.materialize_due(session_factory, today=date(2024, 12, 31))
+    assert recurring.materialize_due(session_factory, today=date(2025, 6, 1))["rules"] == 0
+    db.rollback()
+    assert _dates(db, user_id) == [date(2024, 1, 10), date(2024, 2, 10), date(2024, 3, 10)]
+    assert db.execute(text("SELECT next_due FROM recurring_rules WHERE id = :id"), {"id": rule_id}).scalar() \
+        == date(2024, 4, 10)
+
+
+def test_rules_locked_by_another_run_are_skipped(engine, db, user_id):
+    locked_id = _rule(db, user_id, "monthly", date(2024, 1, 1), label="Locked")
+    _rule(db, user_id, "monthly", date(2024, 1, 1), label="Free")
+    session_factory = sessionmaker(bind=engine)
+
+    with engine.connect() as other:
+        other_transaction = other.begin()
+        other.execute(text("SELECT 1 FROM recurring_rules WHERE id = :id FOR UPDATE"), {"id": locked_id})
+
+        # Does not wait for the lock; the locked rule is left for a later run
+        report = recurring.materialize_due(session_factory, today=date(2024, 1, 31))
+        assert (report["rules"], report["expenses_inserted"]) == (1, 1)
+        other_transaction.rollback()
+
+    report = recurring.materialize_due(session_factory, today=date(2024, 1, 31))
+    assert (report["rules"], report["expenses_inserted"]) == (1, 1)
+    db.rollback()
+    labels = db.execute(text("SELECT category FROM expenses WHERE user_id = :u ORDER BY id"), {"u": user_id})
+    assert [row.category for row in labels] == ["Free", "Locked"]
+
+
+def test_rule_endpoint_rejects_end_before_start(client, user_id):
+    rule = {"kind": "expense", "label": "Rent", "amount": 100, "frequency": "monthly", "start_date": "2024-03-01"}
+    response = client.post(f"/recurring-rules/{user_id}", json={**rule, "end_date": "2024-02-01"})
+    assert response.status_code == 422
+    assert client.post(f"/recurring-rules/{user_id}", json={**rule, "end_date": "2024-03-01"}).status_code == 201
+    assert client.post(f"/recurring-rules/{user_id}", json=rule).status_code == 201
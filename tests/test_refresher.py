@@ -0,0 +1,49 @@
+from backend.refresher import SummaryRefresher
+
+
+class FakeSession:
+    def __init__(self, fail_for):
+        self.fail_for = fail_for
+
+    def execute(self, statement, params):
+        if params["user_id"] in self.fail_for:
+            raise RuntimeError("refresh failed")
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_refresher(fail_for=()):
+    return SummaryRefresher(lambda: FakeSession(fail_for), window=0.01, statements=["SELECT 1"])
+
+
+def test_wait_reports_success_only_for_refreshes_that_ran():
+    refresher = make_refresher(fail_for={2})
+    refresher.start()
+    try:
+        ok, failed = refresher.mark_dirty(1), refresher.mark_dirty(2)
+        assert ok.wait(5) is True
+        assert failed.wait(5) is False
+    finally:
+        refresher.stop()
+    assert refresher.stats()["failures"] == 1
+
+
+def test_wait_times_out_as_false():
+    refresher = make_refresher()  # not started, so nothing is refreshed
+    assert refresher.mark_dirty(1).wait(0.01) is False
+
+
+def test_marks_in_one_window_share_a_refresh():
+    refresher = make_refresher()
+    first, second = refresher.mark_dirty(1), refresher.mark_dirty(1)
+    assert first is second
+    refresher.start()
+    try:
+        assert first.wait(5) is True
+    finally:
+        refresher.stop()
+    assert refresher.stats()["refreshes"] == 1
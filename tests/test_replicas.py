@@ -0,0 +1,114 @@
+import time
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from backend.replicas import DatabaseTarget, ReplicaRouter
+from tests.conftest import requires_postgres
+
+
+class FakeTarget(DatabaseTarget):
+    """A target without an engine, with its lag check result and pool usage set by the test."""
+
+    def __init__(self, name, lag=0.0, healthy=True, connections=0):
+        super().__init__(name, engine=None, session_factory=None)
+        self.lag = lag
+        self.healthy = healthy
+        self.connections = connections
+
+    def checked_out(self):
+        return self.connections
+
+
+def _router(replicas, **kwargs):
+    return ReplicaRouter(FakeTarget("primary"), replicas, **kwargs)
+
+
+def test_without_replicas_reads_go_to_the_primary():
+    router = _router([])
+    assert router.read_target(1) is router.primary
+    assert router.fallbacks == 0
+    router.start()
+    assert router._thread is None
+
+
+def test_lagging_unhealthy_and_unchecked_replicas_are_skipped():
+    current = FakeTarget("current", lag=1.0)
+    lagging = FakeTarget("lagging", lag=30.0)
+    down = FakeTarget("down", lag=0.0, healthy=False)
+    unchecked = FakeTarget("unchecked", lag=None, healthy=False)
+    router = _router([lagging, down, unchecked, current], max_lag=5)
+
+    assert {router.read_target().name for _ in range(4)} == {"current"}
+    assert current.reads == 4
+    assert router.fallbacks == 0
+
+
+def test_falls_back_to_the_primary_when_no_replica_is_current():
+    router = _router([FakeTarget("lagging", lag=30.0), FakeTarget("down", healthy=False)], max_lag=5)
+    assert router.read_target() is router.primary
+    assert router.read_target(7) is router.primary
+    assert router.fallbacks == 2
+    assert router.primary.reads == 2
+
+
+def test_reads_stay_on_the_primary_within_the_read_your_writes_window():
+    replica = FakeTarget("replica")
+    router = _router([replica], read_your_writes_window=0.2)
+
+    router.record_write(1)
+    assert router.read_target(1) is router.primary
+    assert router.read_target(2) is replica  # other users are not affected
+    assert router.read_target() is replica
+    assert router.read_your_writes == 1
+
+    time.sleep(0.25)
+    assert not router.wrote_recently(1)
+    assert router.read_target(1) is replica
+    assert router.read_your_writes == 1
+
+
+def test_round_robin_alternates_between_current_replicas():
+    first, second = FakeTarget("first"), FakeTarget("second")
+    router = _router([first, second])
+    assert [router.read_target().name for _ in range(4)] == ["first", "second", "first", "second"]
+
+
+def test_least_connections_picks_the_least_busy_replica():
+    busy, idle = FakeTarget("busy", connections=3), FakeTarget("idle", connections=1)
+    router = _router([busy, idle], selection="least_connections")
+    assert router.read_target() is idle
+    idle.connections = 5
+    assert router.read_target() is busy
+
+
+def test_unknown_selection_is_rejected():
+    with pytest.raises(ValueError):
+        _router([], selection="random")
+
+
+def test_failed_check_marks_the_replica_unhealthy_and_prunes_old_writes():
+    # SQLite has no pg_is_in_recovery(), so the lag query fails like it would on an unreachable server
+    replica = DatabaseTarget("replica", create_engine("sqlite://", poolclass=QueuePool), None)
+    replica.healthy, replica.lag = True, 0.0
+    router = _router([replica], read_your_writes_window=0.05)
+    router.record_write(1)
+    time.sleep(0.1)
+
+    router.check_lag()
+    assert not replica.healthy
+    assert replica.last_error
+    assert router.stats()["recent_writers"] == 0
+    assert router.read_target() is router.primary
+
+
+@requires_postgres
+def test_check_lag_on_a_primary_reports_no_lag(engine):
+    # The test database is not in recovery, which the lag query reports as current
+    replica = DatabaseTarget("replica", engine, None)
+    router = _router([replica])
+    router.check_lag()
+    assert replica.healthy
+    assert replica.lag == 0
+    assert router.read_target() is replica
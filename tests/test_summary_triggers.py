@@ -0,0 +1,63 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from tests.conftest import apply_random_writes, requires_postgres
+
+pytestmark = requires_postgres
+
+RECOMPUTED_SQL = """
+    SELECT user_id, year, month, SUM(income) AS total_income, SUM(expenses) AS total_expenses
+    FROM (
+        SELECT user_id, EXTRACT(YEAR FROM date)::INT AS year, EXTRACT(MONTH FROM date)::INT AS month,
+               amount AS income, 0 AS expenses
+        FROM income
+        UNION ALL
+        SELECT user_id, EXTRACT(YEAR FROM date)::INT, EXTRACT(MONTH FROM date)::INT, 0, amount
+        FROM expenses
+    ) t
+    GROUP BY 1, 2, 3
+"""
+
+
+def _summary(db):
+    rows = db.execute(text("SELECT user_id, year, month, total_income, total_expenses FROM income_expense_summary"))
+    return {(r.user_id, r.year, r.month): (r.total_income, r.total_expenses) for r in rows
+            if r.total_income or r.total_expenses}
+
+
+def _recomputed(db):
+    return {(r.user_id, r.year, r.month): (r.total_income, r.total_expenses) for r in db.execute(text(RECOMPUTED_SQL))}
+
+
+def test_summary_follows_inserts_updates_and_deletes(db, user_id):
+    db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, 'Food', 40, :d)"),
+               {"u": user_id, "d": date(2024, 1, 31)})
+    db.execute(text("INSERT INTO income (user_id, source, amount, date) VALUES (:u, 'Salary', 100, :d)"),
+               {"u": user_id, "d": date(2024, 1, 15)})
+    db.commit()
+    assert _summary(db) == {(user_id, 2024, 1): (100, 40)}
+
+    # Moving an expense into the next month takes it out of January
+    db.execute(text("UPDATE expenses SET date = :d, amount = 45"), {"d": date(2024, 2, 1)})
+    db.commit()
+    assert _summary(db) == {(user_id, 2024, 1): (100, 0), (user_id, 2024, 2): (0, 45)}
+
+    db.execute(text("DELETE FROM income"))
+    db.commit()
+    assert _summary(db) == {(user_id, 2024, 2): (0, 45)}
+
+
+def test_summary_matches_a_full_recompute_after_random_writes(db):
+    user_ids = [db.execute(text("INSERT INTO users (username) VALUES (:n) RETURNING id"), {"n": name}).scalar()
+                for name in ("a", "b", "c")]
+    db.commit()
+
+    apply_random_writes(db, user_ids, steps=300, seed=2)
+
+    assert _summary(db) == _recomputed(db)
+    # populate_income_expense_summary() is the backfill; it must agree with the triggers
+    db.execute(text("TRUNCATE income_expense_summary"))
+    db.execute(text("SELECT populate_income_expense_summary(id) FROM users"))
+    db.commit()
+    assert _summary(db) == _recomputed(db)
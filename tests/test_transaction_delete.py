@@ -0,0 +1,75 @@
+from datetime import date
+
+from sqlalchemy import text
+
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+
+def _add_expenses(db, user_id, rows):
+    db.execute(text("INSERT INTO expenses (user_id, category, amount, date) VALUES (:u, :c, :a, :d)"),
+               [{"u": user_id, "c": category, "a": amount, "d": day} for category, amount, day in rows])
+    db.commit()
+
+
+def _expense_summary(db, user_id):
+    db.rollback()
+    rows = db.execute(text("SELECT year, month, total_expenses FROM income_expense_summary WHERE user_id = :u"),
+                      {"u": user_id})
+    return {(r.year, r.month): r.total_expenses for r in rows if r.total_expenses}
+
+
+def _delete(client, path, **criteria):
+    return client.request("DELETE", path, json=criteria)
+
+
+def test_range_delete_subtracts_every_month_in_one_statement(client, db, user_id):
+    bob = db.execute(text("INSERT INTO users (username) VALUES ('bob') RETURNING id")).scalar()
+    rows = [("Food", 10, date(2024, month, day)) for month in (1, 2, 3) for day in (1, 15, 28)]
+    _add_expenses(db, user_id, rows + [("Rent", None, date(2024, 2, 2))])
+    _add_expenses(db, bob, rows)
+
+    response = _delete(client, f"/expenses/{user_id}", start_date="2024-01-15", end_date="2024-02-28")
+    assert response.status_code == 200, response.text
+    assert response.json()["deleted"] == 6  # a NULL amount counts as 0
+    assert _expense_summary(db, user_id) == {(2024, 1): 10, (2024, 3): 30}
+    # Rows of other users in the same months are untouched
+    assert _expense_summary(db, bob) == {(2024, 1): 30, (2024, 2): 30, (2024, 3): 30}
+
+
+def test_delete_by_ids_and_by_category(client, db, user_id):
+    _add_expenses(db, user_id, [("Food", 10, date(2024, 1, 1)), ("Food", 20, date(2024, 2, 1)),
+                                ("Rent", 500, date(2024, 1, 1)), ("Rent", 500, date(2024, 2, 1))])
+    food_ids = [r.id for r in db.execute(text("SELECT id FROM expenses WHERE category = 'Food' ORDER BY id"))]
+
+    assert _delete(client, f"/expenses/{user_id}", ids=food_ids[:1]).json()["deleted"] == 1
+    assert _expense_summary(db, user_id) == {(2024, 1): 500, (2024, 2): 520}
+
+    assert _delete(client, f"/expenses/{user_id}", category="Rent").json()["deleted"] == 2
+    assert _expense_summary(db, user_id) == {(2024, 2): 20}
+
+
+def test_income_delete_matches_the_source(client, db, user_id):
+    db.execute(text("INSERT INTO income (user_id, source, amount, date) VALUES "
+                    "(:u, 'Salary', 100, '2024-01-31'), (:u, 'Bonus', 40, '2024-01-31')"), {"u": user_id})
+    db.commit()
+
+    assert _delete(client, f"/income/{user_id}", category="Bonus").json()["deleted"] == 1
+    db.rollback()
+    assert db.execute(text("SELECT total_income FROM income_expense_summary WHERE user_id = :u"),
+                      {"u": user_id}).scalar() == 100
+
+
+def test_delete_matching_nothing_changes_nothing(client, db, user_id):
+    _add_expenses(db, user_id, [("Food", 10, date(2024, 1, 1))])
+
+    response = _delete(client, f"/expenses/{user_id}", start_date="2030-01-01")
+    assert response.status_code == 200
+    assert response.json()["deleted"] == 0
+    assert _expense_summary(db, user_id) == {(2024, 1): 10}
+
+
+def test_delete_requires_a_filter(client, user_id):
+    response = _delete(client, f"/expenses/{user_id}")
+    assert response.status_code == 400
@@ -0,0 +1,56 @@
+from tests.conftest import requires_postgres
+
+pytestmark = requires_postgres
+
+
+def test_transaction_writes_return_the_affected_aggregates(client, user_id):
+    client.post(f"/add-expense/{user_id}", json={"category": "Food", "amount": 10, "date": "2024-01-05"})
+    body = client.post(f"/add-expense/{user_id}", json={"category": "Food", "amount": 15, "date": "2024-02-05"}).json()
+    aggregates = body["aggregates"]
+    assert aggregates["totals"] == {"total_income": 0, "total_expenses": 25, "net_savings": -25}
+    # Only the month and category the write touched
+    assert aggregates["months"] == [{"year": 2024, "month": 2, "total_income": 0, "total_expenses": 15}]
+    assert aggregates["categories"] == [{"category": "Food", "total": 25}]
+
+    aggregates = client.post(f"/add-income/{user_id}",
+                             json={"source": "Salary", "amount": 100, "date": "2024-02-01"}).json()["aggregates"]
+    assert aggregates["totals"] == {"total_income": 100, "total_expenses": 25, "net_savings": 75}
+    assert aggregates["months"] == [{"year": 2024, "month": 2, "total_income": 100, "total_expenses": 15}]
+    assert aggregates["sources"] == [{"source": "Salary", "total": 100}]
+
+    # The same numbers a refetch would get
+    totals = client.get(f"/totals/{user_id}").json()
+    assert (totals["total_income"], totals["total_expenses"]) == (100, 25)
+
+    aggregates = client.request("DELETE", f"/expenses/{user_id}", json={"category": "Food", "end_date": "2024-01-31"}).json()["aggregates"]
+    assert aggregates["totals"]["total_expenses"] == 15
+    assert aggregates["months"] == [{"year": 2024, "month": 1, "total_income": 0, "total_expenses": 0}]
+    assert aggregates["categories"] == [{"category": "Food", "total": 15}]
+
+
+def test_budget_writes_return_the_budgeted_and_spent_amounts(client, user_id):
+    client.post(f"/add-expense/{user_id}", json={"category": "Food", "amount": 10, "date": "2024-01-05"})
+
+    body = client.post(f"/budgets/{user_id}", json={"category": "Food", "budget_amount": 50}).json()
+    assert body["aggregates"] == {"budgeted": 50, "categories": [{"category": "Food", "total": 10}]}
+
+    aggregates = client.put(f"/budgets/{body['budget_id']}", json={"new_amount": 70}).json()["aggregates"]
+    assert aggregates["budgeted"] == 70
+
+    aggregates = client.delete(f"/budgets/{body['budget_id']}").json()["aggregates"]
+    assert aggregates == {"budgeted": 0, "categories": [{"category": "Food", "total": 10}]}
+
+
+def test_balance_sheet_writes_return_the_net_worth(client, user_id):
+    aggregates = client.post(f"/assets/{user_id}",
+                             json={"category": "Cash", "value": 1000, "date_added": "2024-01-05"}).json()["aggregates"]
+    assert (aggregates["total_assets"], aggregates["net_worth"]) == (1000, 1000)
+    assert aggregates["asset_categories"] == [{"category": "Cash", "total": 1000}]
+
+    body = client.post(f"/debts/{user_id}", json={"category": "Card", "amount": 300, "date_incurred": "2024-01-05"}).json()
+    assert (body["aggregates"]["total_liabilities"], body["aggregates"]["net_worth"]) == (300, 700)
+    assert body["aggregates"]["debt_categories"] == [{"category": "Card", "total": 300}]
+
+    aggregates = client.delete(f"/debts/{body['debt_id']}").json()["aggregates"]
+    assert (aggregates["total_liabilities"], aggregates["net_worth"]) == (0, 1000)
+    assert aggregates["debt_categories"] == [{"category": "Card", "total": 0}]